@@ -1,4 +1,5 @@
 import traceback
+import importlib
 from pathlib import Path
 import sys
 import logging
@@ -25,59 +26,62 @@ if rootpath not in sys.path:
     sys.path.append(rootpath)
 
 # d2p api-level imports...
+#: ! submodules (and their heavy dependencies: sympy, selenium, pandas, ...) are imported
+#: lazily, on first attribute access (PEP 562).
 
 import desmos2python.utils
 import desmos2python.utils as utils
-from desmos2python.utils import D2P_Resources
-
-greek = None
-try:
-    import desmos2python.resources as resources
-except ModuleNotFoundError:
-    logging.warn('failed to import d2p resources, greek alphabet might not be available.', exc_info=1)
-else:
-    from desmos2python.resources import greek
-    from desmos2python.resources import convert_greek_chars
-
-convert2plain = None
-try:
-    import desmos2python.pdoc as pdoc
-except ModuleNotFoundError:
-    logging.warning('failed to import pdoc utils.', exc_info=1)
-else:
-    from desmos2python.pdoc import convert2plain
-
-try:
-    import desmos2python.latex as latex
-    from desmos2python.latex import DesmosLatexParser
-except ModuleNotFoundError:
-    #: ! these try-except blocks are needed for custom setuptools command
-    logging.warning('failed to import latex utils.', exc_info=1)
-
-try:
-    import desmos2python.browser as browser
-    from desmos2python.browser import DesmosWebSession
-except ModuleNotFoundError:
-    logging.warning('failed to import web utils.', exc_info=1)
-
-try:
-    import desmos2python.api as api
-    from desmos2python.api import (
-        make_latex_parser,
-        make_web_session,
-        make_svg_parser,
-        export_graph_and_parse,
-    )
-except ModuleNotFoundError:
-    logging.warning('failed to import high-level api.', exc_info=1)
-
-make_web_session_with_state = None
-try:
-    import desmos2python.render as render
-except ModuleNotFoundError:
-    logging.warning('failed to import render api.', exc_info=1)
-else:
-    from desmos2python.render import make_web_session_with_state
+from desmos2python.utils import D2P_Resources, load_model
+
+#: lazily imported submodules
+_lazy_submodules = (
+    'api', 'browser', 'cache', 'calc_state', 'cli', 'consts', 'dag', 'export', 'latex', 'latex2plain',
+    'pdoc', 'plain2pycode', 'render', 'resources', 'simple', 'svg', 'sweep', 'synthetic',
+    'templates',
+)
+
+#: lazily imported attributes: {name: (submodule, attribute)}
+_lazy_attrs = {
+    'greek': ('resources', 'greek'),
+    'convert_greek_chars': ('resources', 'convert_greek_chars'),
+    'convert2plain': ('pdoc', 'convert2plain'),
+    'DesmosLatexParser': ('latex', 'DesmosLatexParser'),
+    'DesmosWebSession': ('browser', 'DesmosWebSession'),
+    'make_latex_parser': ('api', 'make_latex_parser'),
+    'make_web_session': ('api', 'make_web_session'),
+    'make_svg_parser': ('api', 'make_svg_parser'),
+    'export_graph_and_parse': ('api', 'export_graph_and_parse'),
+    'export_many': ('export', 'export_many'),
+    'make_web_session_with_state': ('render', 'make_web_session_with_state'),
+}
+
+#: attributes that are None if their (optional) dependencies are missing
+_lazy_optional = ('greek', 'convert2plain', 'make_web_session_with_state')
+
+
+def __getattr__(name):
+    if name in _lazy_submodules:
+        module_name, attr = name, None
+    elif name in _lazy_attrs:
+        module_name, attr = _lazy_attrs[name]
+    else:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    try:
+        module = importlib.import_module(f'.{module_name}', __name__)
+    except ModuleNotFoundError:
+        logging.warning(f"failed to import '{__name__}.{module_name}' (for '{name}').", exc_info=1)
+        if name not in _lazy_optional:
+            raise
+        value = None
+    else:
+        value = module if attr is None else getattr(module, attr)
+    #: ! cache, `__getattr__` is only called for missing attributes
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_submodules) | set(_lazy_attrs))
 
 
 __all__ = [
@@ -90,6 +94,8 @@ __all__ = [
     'make_web_session',
     'make_svg_parser',
     'export_graph_and_parse',
+    'export_many',
     'make_web_session_with_state',
-    'convert2plain'
+    'convert2plain',
+    'load_model',
 ]
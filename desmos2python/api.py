@@ -1,6 +1,6 @@
 """desmos2python.api: high-level API access, helper methods."""
 from desmos2python.latex import DesmosLatexParser
-from desmos2python.browser import DesmosWebSession
+from desmos2python.browser import DesmosWebSession, BrowserPool, default_pool
 from desmos2python.svg import DesmosSVGParser
 
 __all__ = [
@@ -8,6 +8,7 @@ __all__ = [
     'make_web_session',
     'make_svg_parser',
     'export_graph_and_parse',
+    'make_calc_state_parser',
 ]
 
 
@@ -19,16 +20,36 @@ def make_latex_parser(fpath, **kwds):
     return DesmosLatexParser(fpath=fpath, **kwds)
 
 
-def make_web_session(url, **kwds):
-    return DesmosWebSession(url=url, **kwds)
+def make_calc_state_parser(calc_state, tables=False, **kwds):
+    """`DesmosLatexParser` of a calcState (Dict, JSON string or file), no browser needed"""
+    from desmos2python.calc_state import read_calc_state_records
+    return read_calc_state_records(calc_state).latex_parser(tables=tables, **kwds)
 
 
-def export_graph_and_parse(url, kwds_dws={}, kwds_dlp={}, retall=True):
-    """High-level method to quickly export/download from a Desmos graph, automatically parse to executable python code."""
-    dws = make_web_session(url, **kwds_dws)
-    fpath_json = dws.export_latex2json()
+def make_web_session(url, pool: BrowserPool = None, **kwds):
+    """`DesmosWebSession` on a warm browser of `pool` (default: the process-wide pool).
+
+    ! call `dws.close()` (or use `with`) to return the browser to the pool
+    """
+    if pool is None:
+        pool = default_pool()
+    return pool.session(url=url, **kwds)
+
+
+def export_graph_and_parse(url, kwds_dws={}, kwds_dlp={}, retall=True, pool: BrowserPool = None):
+    """High-level method to quickly export/download from a Desmos graph, automatically parse to executable python code.
+
+    ! with `retall=True` the returned session keeps its browser until `dws.close()`
+    """
+    dws = make_web_session(url, pool=pool, **kwds_dws)
+    try:
+        fpath_json = dws.export_latex2json()
+    except BaseException:
+        dws.close(healthy=False)
+        raise
     dlp = make_latex_parser(fpath=fpath_json, **kwds_dlp)
     if retall is False:
+        dws.close()
         return dlp
     elif retall is True:
         return (dws, dlp)
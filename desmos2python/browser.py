@@ -4,28 +4,57 @@ Headless browser functionality
 """
 from selenium import webdriver
 from selenium.webdriver.support.wait import WebDriverWait
-from selenium.common import JavascriptException
+from selenium.common import JavascriptException, WebDriverException
+from contextlib import contextmanager
 from functools import cached_property
 from pathlib import Path
 from desmos2python.utils import D2P_Resources
-from typing import AnyStr
+from typing import Any, AnyStr, Callable, Dict, List, NamedTuple, Optional
 import json
-from threading import RLock
+import time
+import atexit
+import logging
+from threading import Condition, Lock, RLock
 
 __all__ = [
     'DesmosWebSession',
+    'DesmosExtract',
+    'BrowserPool',
+    'default_pool',
+    'make_firefox_driver',
 ]
 
+logger = logging.getLogger(__name__)
+
 
 class DesmosCalcStrings:
 
-    getExpressions: str = '''
+    #: visible expressions (! same filter for `getExpressions` and `extractAll`)
+    visibleFilter: str = 'el => (el.latex && el.lineStyle && !el.hidden)'
+
+    getExpressions: str = f'''
     var exprs = Calc.getExpressions();
-    return exprs.filter(el => (el.latex && el.lineStyle && !el.hidden));
+    return exprs.filter({visibleFilter});
     '''
 
     getState = 'return Calc.getState()'
 
+    #: cheap readiness probe: the calculator API object exists
+    calcReady: str = "return (typeof Calc !== 'undefined') && (Calc !== null) && (typeof Calc.getState === 'function');"
+
+    #: the svg screenshot (of a mock graph page) exists
+    svgReady: str = "return document.querySelector('span#svg-span svg') !== null;"
+
+    #: expressions, calcState and svg in a single round trip
+    extractAll: str = f'''
+    var svg = document.querySelector('span#svg-span svg');
+    return {{
+        expressions: Calc.getExpressions().filter({visibleFilter}),
+        calcState: Calc.getState(),
+        svg: (svg !== null) ? svg.outerHTML : null
+    }};
+    '''
+
     expressionAnalysis = \
         '''
         var analysis_results = {};
@@ -56,6 +85,24 @@ class DesmosCalcStrings:
         return js_string
 
 
+class DesmosExtract(NamedTuple):
+
+    """everything `DesmosWebSession.extract_all` reads from a loaded graph"""
+
+    url: str
+    #: visible expressions (`Calc.getExpressions()`, filtered)
+    expressions: List[Dict]
+    #: `Calc.getState()`
+    calc_state: Dict
+    #: svg screenshot source (None if the page has no `span#svg-span` screenshot)
+    svg: Optional[str] = None
+
+    @property
+    def latex_list(self) -> List[str]:
+        return [expression.get('latex') for expression in self.expressions
+                if expression.get('latex') is not None]
+
+
 class DesmosWebSession(object):
     """connect to (possibly remote) desmos graphs.
 
@@ -64,12 +111,20 @@ class DesmosWebSession(object):
 
     desmos_url_head = 'https://www.desmos.com/calculator/'
 
-    def __init__(self, url='8tb0onyoep', title: AnyStr = None, auto_format_url=False):
+    def __init__(self, url='8tb0onyoep', title: AnyStr = None, auto_format_url=False,
+                 browser=None, pool: 'BrowserPool' = None):
+        """
+        - browser : (warm) webdriver to use instead of launching a new browser
+        - pool : `BrowserPool` the browser is returned to by `close()`
+        """
         self._user_title = title
         self.url = self.format_url(url, auto_format_url=auto_format_url)
         self.outpath = None
         self.browser = None
-        self.init_browser()
+        self.pool = pool
+        #: url of the page currently loaded in the browser (None: unknown, reload)
+        self.loaded_url = None
+        self.init_browser(browser=browser)
         self.lock = RLock()
 
     def format_url(self, url, auto_format_url=False):
@@ -79,44 +134,77 @@ class DesmosWebSession(object):
             url = f'{DesmosWebSession.desmos_url_head}{url}'
         return url
 
-    def init_browser(self):
-        """initialize headless browser webdriver"""
-        #: ref: https://pythonbasics.org/selenium-firefox-headless/
-        fireFoxOptions = webdriver.FirefoxOptions()
-        fireFoxOptions.headless = True
-        browser = webdriver.Firefox(options=fireFoxOptions)
+    def init_browser(self, browser=None):
+        """initialize headless browser webdriver (! launches a new browser if none is given)"""
+        if browser is None:
+            browser = make_firefox_driver()
         self.browser = browser
         self.goto_url(self.url)
 
-    def check_document_initialised(self):
+    def close(self, healthy=True):
+        """return the browser to its pool (or quit it if the session isn't pooled)"""
+        browser, self.browser = self.browser, None
+        if browser is None:
+            return
+        if self.pool is not None:
+            self.pool.release(browser, healthy=healthy)
+        else:
+            browser.quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        #: ! a browser that raised a webdriver error is recycled
+        self.close(healthy=not isinstance(exc, WebDriverException))
+
+    def check_document_initialised(self, js_string=DesmosCalcStrings.calcReady):
         """Confirm document is initialized (useful for awaiting page load).
 
+        ! cheap probe (the `Calc` object exists), doesn't run any graph-sized script
+
         ref: https://www.selenium.dev/documentation/webdriver/waits/
         """
         try:
-            _ = self.browser.execute_script(DesmosCalcStrings().take_svg_screenshot)
+            return bool(self.browser.execute_script(js_string))
         except JavascriptException:
             return False
-        else:
-            return True
 
     def await_DOM(self, callback=None, timeout=10):
-        """wait for browser DOM to be initialized"""
+        """wait for browser DOM to be initialized
+
+        - callback : readiness check (default: `check_document_initialised`)
+        """
+        if callback is None:
+            callback = self.check_document_initialised
         _ = WebDriverWait(self.browser, timeout=timeout).until(
-            lambda __: self.check_document_initialised()
+            lambda __: callback()
         )
         return True
 
     def goto_url(self, url=None):
-        """wrapper around `selenium.webdriver.Firefox.get(<url>)`."""
+        """wrapper around `selenium.webdriver.Firefox.get(<url>)` (! always reloads)."""
         if url is None:
             url = self.url
         elif url is not None:
             url = self.format_url(url)
+        self.loaded_url = None
         self.browser.get(url)
         self.await_DOM()  # ! wait for DOM to update...
+        self.loaded_url = url
         return self.browser
 
+    def ensure_loaded(self, url=None, force=False) -> bool:
+        """load `url` (default: `self.url`) unless it is already loaded.
+
+        returns : bool : True if the page was (re)loaded
+        """
+        url = self.url if url is None else self.format_url(url)
+        if force is False and url == self.loaded_url:
+            return False
+        self.goto_url(url)
+        return True
+
     @property
     def current_url(self):
         """get the current browser URL"""
@@ -141,17 +229,34 @@ class DesmosWebSession(object):
         """
         if js_string is None:
             js_string = DesmosCalcStrings.getExpressions
-        if self.url != self.current_url:
-            self.goto_url(self.url)
+        self.ensure_loaded()
         out = self.browser.execute_script(js_string)
         return out
 
+    def extract_all(self, url=None, force_reload=False, wait_svg=False) -> DesmosExtract:
+        """expressions, calcState and svg screenshot of a graph, in one `execute_script` call.
+
+        ! the page is only loaded if `url` (default: `self.url`) isn't loaded already
+
+        - wait_svg : wait for the (asynchronous) svg screenshot of a mock graph page
+        """
+        url = self.url if url is None else self.format_url(url)
+        self.ensure_loaded(url, force=force_reload)
+        if wait_svg is True:
+            self.await_DOM(callback=lambda: self.check_document_initialised(DesmosCalcStrings.svgReady))
+        out = self.browser.execute_script(DesmosCalcStrings.extractAll)
+        extract = DesmosExtract(url=url, expressions=out['expressions'], calc_state=out['calcState'],
+                                svg=out.get('svg'))
+        if url == self.url:
+            self.__dict__['expressions_list'] = extract.expressions
+        return extract
+
     def take_svg_screenshot(self, reset_cached=False):
         """take a screenshot, return svg object (selenium)."""
         #: first, take the screenshot...
         if reset_cached is True:
-            delattr(self, 'svg_screenshot')
-        self.goto_url(url=self.url)
+            self.__dict__.pop('svg_screenshot', None)
+        self.ensure_loaded()
         sshot = self.execute_js(
             js_string=DesmosCalcStrings().take_svg_screenshot
         )
@@ -159,14 +264,13 @@ class DesmosWebSession(object):
 
     def getState(self):
         """get the calculator state for the current url (self.url)"""
-        self.goto_url(url=self.url)
         calc_state = self.execute_js(js_string=DesmosCalcStrings.getState)
         return calc_state
 
     def get_expressions_from_url(self, url=None):
-        """navigate to the given url, return list of JSON"""
-        self.goto_url(url=url)
-        expressions_list = self.execute_js()
+        """navigate to the given url (if not loaded already), return list of JSON"""
+        self.ensure_loaded(url)
+        expressions_list = self.browser.execute_script(DesmosCalcStrings.getExpressions)
         return expressions_list
 
     @cached_property
@@ -267,3 +371,169 @@ class DesmosWebSession(object):
             .with_suffix('.svg')
         output_path.write_text(svg_src)
         return output_path
+
+
+def make_firefox_driver():
+    """launch a headless Firefox webdriver"""
+    #: ref: https://pythonbasics.org/selenium-firefox-headless/
+    fireFoxOptions = webdriver.FirefoxOptions()
+    fireFoxOptions.headless = True
+    return webdriver.Firefox(options=fireFoxOptions)
+
+
+class BrowserPool:
+
+    """Bounded pool of warm (headless) browser webdrivers.
+
+    - max_size : maximum number of browsers (idle + checked out)
+    - max_uses : browsers are quit (recycled) after `max_uses` checkouts
+    - factory : creates a webdriver (default: `make_firefox_driver`, e.g. a fake driver for tests)
+    - timeout : seconds `acquire` waits for a browser to be returned (None: wait forever)
+
+    e.g.
+
+    >>> with BrowserPool(max_size=2) as pool:                     # doctest: +SKIP
+    ...     with pool.session('8tb0onyoep', auto_format_url=True) as dws:
+    ...         dws.latex_list
+    """
+
+    def __init__(self, max_size: int = 2, max_uses: int = 50, factory: Callable[[], Any] = None,
+                 timeout: float = None):
+        if max_size < 1:
+            raise ValueError(f'max_size must be >= 1, got {max_size}')
+        self.max_size, self.max_uses, self.timeout = max_size, max_uses, timeout
+        self.factory = factory if factory is not None else make_firefox_driver
+        self.closed = False
+        #: idle browsers, most recently returned last
+        self._idle: List[Any] = []
+        #: number of checkouts of each live browser (by id)
+        self._uses: Dict[int, int] = {}
+        #: number of browsers being launched
+        self._pending = 0
+        self._cond = Condition(Lock())
+
+    @property
+    def size(self) -> int:
+        """number of live browsers (idle + checked out)"""
+        return len(self._uses) + self._pending
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @staticmethod
+    def check_health(browser) -> bool:
+        """cheap liveness probe (! a crashed browser/geckodriver raises)"""
+        try:
+            return browser.execute_script('return 1') == 1
+        except WebDriverException:
+            return False
+
+    def _quit(self, browser):
+        self._uses.pop(id(browser), None)
+        try:
+            browser.quit()
+        except WebDriverException:
+            logger.debug('failed to quit browser.', exc_info=1)
+
+    def acquire(self, timeout: float = None):
+        """check out a healthy browser (reuses idle browsers, launches one if below `max_size`)"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self.closed:
+                    raise RuntimeError('browser pool is shut down')
+                while len(self._idle) > 0:
+                    browser = self._idle.pop()
+                    if BrowserPool.check_health(browser):
+                        self._uses[id(browser)] += 1
+                        return browser
+                    logger.info('discarding unhealthy browser.')
+                    self._quit(browser)
+                if self.size < self.max_size:
+                    #: ! reserve the slot, the browser is launched outside of the lock
+                    self._pending += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f'no browser returned within {timeout} seconds')
+                self._cond.wait(remaining)
+        browser = None
+        try:
+            browser = self.factory()
+        finally:
+            with self._cond:
+                self._pending -= 1
+                if browser is not None:
+                    self._uses[id(browser)] = 1
+                self._cond.notify()
+        return browser
+
+    def release(self, browser, healthy: bool = True):
+        """return a checked out browser (quit if unhealthy, used `max_uses` times or shut down)"""
+        with self._cond:
+            if id(browser) not in self._uses:
+                logger.warning('releasing a browser that is not checked out of this pool.')
+            elif self.closed or healthy is False or self._uses[id(browser)] >= self.max_uses:
+                self._quit(browser)
+            else:
+                self._idle.append(browser)
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, timeout: float = None):
+        """context manager around `acquire`/`release` (! recycles browsers on webdriver errors)"""
+        browser = self.acquire(timeout=timeout)
+        healthy = True
+        try:
+            yield browser
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self.release(browser, healthy=healthy)
+
+    def session(self, url='8tb0onyoep', timeout: float = None, **kwds) -> DesmosWebSession:
+        """`DesmosWebSession` on a pooled browser, `close()` it to return the browser"""
+        browser = self.acquire(timeout=timeout)
+        try:
+            return DesmosWebSession(url=url, browser=browser, pool=self, **kwds)
+        except BaseException:
+            self.release(browser, healthy=False)
+            raise
+
+    def shutdown(self):
+        """quit idle browsers, checked out browsers are quit when released"""
+        with self._cond:
+            self.closed = True
+            while len(self._idle) > 0:
+                self._quit(self._idle.pop())
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    def __repr__(self):
+        return f'BrowserPool(size={self.size}, idle={self.idle}, max_size={self.max_size}, closed={self.closed})'
+
+
+#: process-wide pool (see `default_pool`)
+_default_pool = None
+_default_pool_lock = Lock()
+
+
+def default_pool(**kwds) -> BrowserPool:
+    """process-wide `BrowserPool` (created on first use, shut down at exit).
+
+    - kwds : `BrowserPool` arguments (only used when the pool is created)
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None or _default_pool.closed:
+            _default_pool = BrowserPool(**kwds)
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
@@ -0,0 +1,318 @@
+"""desmos2python on-disk caches for per-line conversion results and compiled models.
+
+Entries are content-addressed: keyed by a hash of the (whitespace-normalized) line,
+the pipeline stage and the package version. Failed conversions are cached as well
+(with the failure reason), so costly failure paths aren't retried on every build.
+"""
+import os
+import re
+import time
+import pickle
+import marshal
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter, defaultdict
+from importlib.metadata import version, PackageNotFoundError
+from importlib.util import MAGIC_NUMBER
+from pathlib import Path
+from types import CodeType
+from typing import Any, AnyStr, Dict, NamedTuple, Optional, Sequence, Union
+from desmos2python.utils import D2P_Resources
+
+__all__ = [
+    'CacheEntry',
+    'LineCache',
+    'line_cache',
+    'ModelCache',
+    'model_cache',
+]
+
+try:
+    PACKAGE_VERSION = version("desmos2python")
+except PackageNotFoundError:
+    # package is not installed
+    PACKAGE_VERSION = 'unknown'
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+
+    """cached result of a single stage for a single line"""
+
+    #: stage output (None for failures)
+    value: Any = None
+    #: failure reason (None for successes)
+    error: Optional[str] = None
+
+
+class LineCache:
+
+    """Size-bounded (LRU) sqlite cache of per-line pipeline results.
+
+    Stages used by desmos2python: 'convert2plain', 'parse_latex_lines2sympy', 'fix_raw_pycode'.
+    """
+
+    #: default location of the cache directory
+    default_cache_dir = D2P_Resources \
+        .get_user_resources_path() \
+        .joinpath('cache')
+
+    #: evictions are checked every `evict_interval` stores
+    evict_interval = 256
+
+    def __init__(self, cache_dir: Union[AnyStr, Path] = None,
+                 max_bytes: int = 256 * 1024 ** 2, enabled: bool = None):
+        if cache_dir is None:
+            cache_dir = LineCache.default_cache_dir
+        if enabled is None:
+            enabled = os.environ.get('D2P_NO_CACHE', '') in ('', '0')
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        #: ! one connection per thread (sqlite connections can't be shared between threads)
+        self._local = threading.local()
+        self._stores = 0
+        self._counts = defaultdict(Counter)
+
+    @property
+    def fpath(self) -> Path:
+        return self.cache_dir.joinpath('lines.sqlite')
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """sqlite connection (! opened lazily, per thread, re-opened in forked processes)"""
+        if getattr(self._local, 'conn', None) is None or self._local.pid != os.getpid():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.fpath), timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS lines ('
+                'key TEXT PRIMARY KEY, stage TEXT, value BLOB, error TEXT, '
+                'size INTEGER, last_access REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS lines_lru ON lines (last_access)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return self._local.conn
+
+    #: stages with latex input (! runs of whitespace are insignificant in latex math)
+    latex_stages = frozenset(['convert2plain', 'parse_latex_lines2sympy'])
+
+    #: latex whitespace: `\text{...}` contents and explicit spaces (`\ `) are kept as-is,
+    #: other runs of whitespace collapse to a single space
+    latex_ws_pattern = re.compile(r'(\\text[a-z]*\{[^{}]*\}|\\\s)|\s+')
+
+    @staticmethod
+    def normalize(line: str, stage: str = 'convert2plain') -> str:
+        """normalize whitespace for latex stages, e.g.
+
+        >>> LineCache.normalize(' a  =\\n1 ')
+        'a = 1'
+        >>> LineCache.normalize(r'\\text{a  b}+x\\ y')
+        '\\\\text{a  b}+x\\\\ y'
+        """
+        if stage in LineCache.latex_stages:
+            return LineCache.latex_ws_pattern.sub(
+                lambda m: m.group(1) or ' ', str(line).strip())
+        return str(line)
+
+    @staticmethod
+    def key(stage: str, line: str, *extra) -> str:
+        """content hash for (package version, stage, extra args, normalized line)"""
+        parts = [PACKAGE_VERSION, stage, *[repr(e) for e in extra],
+                 LineCache.normalize(line, stage=stage)]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def lookup(self, stage: str, line: str, *extra) -> Optional[CacheEntry]:
+        """return the cached entry for `line` at `stage` (None if not cached)"""
+        if self.enabled is False:
+            return None
+        key = LineCache.key(stage, line, *extra)
+        try:
+            row = self.conn.execute(
+                'SELECT value, error FROM lines WHERE key = ?', (key, )).fetchone()
+            if row is None:
+                self._counts[stage]['misses'] += 1
+                return None
+            self.conn.execute(
+                'UPDATE lines SET last_access = ? WHERE key = ?', (time.time(), key))
+            entry = CacheEntry(
+                value=pickle.loads(row[0]) if row[0] is not None else None, error=row[1])
+        except Exception:
+            logger.debug('line cache lookup failed.', exc_info=1)
+            self._counts[stage]['misses'] += 1
+            return None
+        self._counts[stage]['hits'] += 1
+        if entry.error is not None:
+            self._counts[stage]['failure_hits'] += 1
+        return entry
+
+    def store(self, stage: str, line: str, value: Any = None, *extra,
+              error: Optional[str] = None):
+        """cache the `value` (or failure reason: `error`) for `line` at `stage`"""
+        if self.enabled is False:
+            return
+        key = LineCache.key(stage, line, *extra)
+        try:
+            blob = pickle.dumps(value) if error is None else None
+            size = len(blob or b'') + len(error or '')
+            self.conn.execute(
+                'INSERT OR REPLACE INTO lines VALUES (?, ?, ?, ?, ?, ?)',
+                (key, stage, blob, error, size, time.time()))
+        except Exception:
+            logger.debug('line cache store failed.', exc_info=1)
+            return
+        self._counts[stage]['stores'] += 1
+        self._stores += 1
+        if self._stores % LineCache.evict_interval == 0:
+            self.evict()
+
+    @property
+    def size(self) -> int:
+        """total size (bytes) of the cached values"""
+        return self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM lines').fetchone()[0]
+
+    def evict(self, max_bytes: int = None) -> int:
+        """evict least-recently used entries until the cache fits in `max_bytes`.
+
+        returns : int : number of evicted entries
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        excess = self.size - max_bytes
+        if excess <= 0:
+            return 0
+        rows = self.conn.execute('SELECT key, size FROM lines ORDER BY last_access').fetchall()
+        keys = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            keys.append((key, ))
+            excess -= size
+        self.conn.executemany('DELETE FROM lines WHERE key = ?', keys)
+        evicted = len(keys)
+        logger.debug(f'evicted {evicted} entries from the line cache.')
+        return evicted
+
+    def clear(self):
+        """remove all cached entries, reset stats"""
+        self.conn.execute('DELETE FROM lines')
+        self._counts.clear()
+
+    def hits(self, stage: str) -> int:
+        """number of cache hits for `stage` (for the current process)"""
+        return self._counts[stage]['hits'] if stage in self._counts else 0
+
+    def stats(self) -> Dict[str, Dict]:
+        """per-stage cache statistics (for the current process).
+
+        returns : Dict : {stage: {'hits', 'misses', 'failure_hits', 'stores', 'hit_rate'}}
+        """
+        stats = {}
+        for stage, counts in self._counts.items():
+            lookups = counts['hits'] + counts['misses']
+            stats[stage] = {
+                'hits': counts['hits'],
+                'misses': counts['misses'],
+                'failure_hits': counts['failure_hits'],
+                'stores': counts['stores'],
+                'hit_rate': counts['hits'] / lookups if lookups > 0 else 0.0,
+            }
+        return stats
+
+
+#: instantiate for global access (! set `D2P_NO_CACHE=1` to disable)
+line_cache = LineCache()
+
+
+class ModelCache:
+
+    """On-disk cache of rendered model code (`pycode_string`) and compiled (marshalled) code objects.
+
+    Keyed by a hash of the input latex lines, the namespace name and the package version.
+    """
+
+    #: default location of the cache directory
+    default_cache_dir = LineCache.default_cache_dir.joinpath('models')
+
+    def __init__(self, cache_dir: Union[AnyStr, Path] = None, enabled: bool = None):
+        if cache_dir is None:
+            cache_dir = ModelCache.default_cache_dir
+        if enabled is None:
+            enabled = os.environ.get('D2P_NO_CACHE', '') in ('', '0')
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self._counts = Counter()
+
+    @staticmethod
+    def key(latex_lines: Sequence[str], ns_name: str, *extra) -> str:
+        """content hash for (package version, namespace name, extra options, latex lines)"""
+        parts = [PACKAGE_VERSION, ns_name, *[repr(e) for e in extra],
+                 *[str(line) for line in latex_lines]]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def _read(self, fpath: Path) -> Optional[bytes]:
+        if self.enabled is False:
+            return None
+        try:
+            data = fpath.read_bytes()
+        except OSError:
+            self._counts['misses'] += 1
+            return None
+        self._counts['hits'] += 1
+        return data
+
+    def _write(self, fpath: Path, data: bytes):
+        """write atomically (! concurrent builds may share the cache)"""
+        if self.enabled is False:
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_fpath = fpath.with_name(f'{fpath.name}.{os.getpid()}.tmp')
+            tmp_fpath.write_bytes(data)
+            os.replace(tmp_fpath, fpath)
+        except OSError:
+            logger.debug('model cache store failed.', exc_info=1)
+            return
+        self._counts['stores'] += 1
+
+    def lookup_pycode(self, key: str) -> Optional[str]:
+        data = self._read(self.cache_dir.joinpath(f'{key}.py'))
+        return data.decode('utf-8') if data is not None else None
+
+    def store_pycode(self, key: str, pycode_string: str):
+        self._write(self.cache_dir.joinpath(f'{key}.py'), pycode_string.encode('utf-8'))
+
+    def lookup_code(self, key: str) -> Optional[CodeType]:
+        #: ! marshal format is specific to the python version (-> magic number)
+        data = self._read(self.cache_dir.joinpath(f'{key}.{MAGIC_NUMBER.hex()}.marshal'))
+        try:
+            return marshal.loads(data) if data is not None else None
+        except (EOFError, ValueError, TypeError):
+            logger.debug('failed to load marshalled model code.', exc_info=1)
+            return None
+
+    def store_code(self, key: str, code: CodeType):
+        self._write(self.cache_dir.joinpath(f'{key}.{MAGIC_NUMBER.hex()}.marshal'),
+                    marshal.dumps(code))
+
+    @property
+    def hits(self) -> int:
+        """number of cache hits (for the current process)"""
+        return self._counts['hits']
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """model cache statistics (for the current process)"""
+        lookups = self._counts['hits'] + self._counts['misses']
+        return {
+            'hits': self._counts['hits'],
+            'misses': self._counts['misses'],
+            'stores': self._counts['stores'],
+            'hit_rate': self._counts['hits'] / lookups if lookups > 0 else 0.0,
+        }
+
+
+#: instantiate for global access (! set `D2P_NO_CACHE=1` to disable)
+model_cache = ModelCache()
@@ -0,0 +1,219 @@
+"""desmos2python calcState reader (no browser needed).
+
+Reads exported calcStates (`Calc.getState()`, e.g. the `calcState_json` archive) into compact
+records: visible expressions, sliders, folders and table columns. Visibility matches
+`DesmosCalcStrings.visibleFilter` (expressions with latex and a line style that aren't hidden),
+so a calcState feeds `DesmosLatexParser` directly, e.g.
+
+>>> state = read_calc_state_records({'expressions': {'list': [
+...     {'type': 'folder', 'id': 'f1', 'title': 'params'},
+...     {'type': 'expression', 'id': '1', 'folderId': 'f1', 'latex': 'a=2',
+...      'sliderBounds': {'min': '0', 'max': '10', 'step': ''}},
+...     {'type': 'expression', 'id': '2', 'latex': 'b=3', 'hidden': True},
+...     {'type': 'table', 'id': '3', 'columns': [{'id': '4', 'latex': 'x_{1}', 'values': ['1', '2']}]},
+... ]}})
+>>> state.latex_list
+['a=2']
+>>> state.sliders[0]
+CalcSlider(id='1', name='a', value=2.0, min='0', max='10', step=None)
+>>> state.folders[0].members
+['1']
+>>> state.columns[0].list_latex
+'x_{1}=\\\\left[1,2\\\\right]'
+"""
+import json
+from os import PathLike
+from pathlib import Path
+from typing import AnyStr, Dict, List, Optional, Union
+
+__all__ = [
+    'CalcExpression',
+    'CalcSlider',
+    'CalcFolder',
+    'CalcTableColumn',
+    'CalcStateRecords',
+    'read_calc_state',
+    'read_calc_state_records',
+    'visible_latex',
+]
+
+
+def read_calc_state(calc_state: Union[Dict, AnyStr, PathLike]) -> Dict:
+    """calcState as a Dict (from a Dict, a JSON string or a JSON file)"""
+    if isinstance(calc_state, dict):
+        return calc_state
+    if isinstance(calc_state, Path) or not str(calc_state).lstrip().startswith('{'):
+        return json.loads(Path(calc_state).read_text())
+    return json.loads(calc_state)
+
+
+def _float(latex: Optional[str]) -> Optional[float]:
+    """value of a plain number (None for expressions, e.g. `2\\pi`)"""
+    try:
+        return float(latex)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Record:
+
+    """base of the `__slots__` records"""
+
+    __slots__ = ()
+
+    def as_dict(self) -> Dict:
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return f'{type(self).__name__}(' + ', '.join(f'{k}={v!r}' for k, v in self.as_dict().items()) + ')'
+
+
+class CalcExpression(_Record):
+
+    """an expression item"""
+
+    __slots__ = ('id', 'latex', 'folder_id', 'hidden', 'color', 'line_style')
+
+    #: ! the calcState omits default values, `Calc.getExpressions()` fills in 'SOLID'
+    default_line_style = 'SOLID'
+
+    def __init__(self, id: str, latex: str, folder_id: str = None, hidden: bool = False,
+                 color: str = None, line_style: Optional[str] = default_line_style):
+        self.id, self.latex, self.folder_id = id, latex, folder_id
+        self.hidden, self.color, self.line_style = hidden, color, line_style
+
+    @property
+    def visible(self) -> bool:
+        """same as `DesmosCalcStrings.visibleFilter`: `el.latex && el.lineStyle && !el.hidden`"""
+        return bool(self.latex) and bool(self.line_style) and not self.hidden
+
+
+class CalcSlider(_Record):
+
+    """a slider (an expression with `sliderBounds`), bounds are kept as latex"""
+
+    __slots__ = ('id', 'name', 'value', 'min', 'max', 'step')
+
+    def __init__(self, id: str, name: str, value: Optional[float], min: str = None, max: str = None,
+                 step: str = None):
+        self.id, self.name, self.value = id, name, value
+        #: ! continuous sliders have no (or an empty) step
+        self.min, self.max, self.step = min, max, step or None
+
+    @property
+    def bounds(self) -> tuple:
+        """(min, max, step) as floats (None for non-numeric bounds, see `sweep.slider_bounds`)"""
+        return _float(self.min), _float(self.max), _float(self.step)
+
+
+class CalcFolder(_Record):
+
+    """a folder, with the ids of its member items"""
+
+    __slots__ = ('id', 'title', 'hidden', 'collapsed', 'members')
+
+    def __init__(self, id: str, title: str = '', hidden: bool = False, collapsed: bool = False,
+                 members: List[str] = None):
+        self.id, self.title, self.hidden, self.collapsed = id, title, hidden, collapsed
+        self.members = members if members is not None else []
+
+
+class CalcTableColumn(_Record):
+
+    """a table column: header latex (e.g. `x_{1}`) and cell latex values"""
+
+    __slots__ = ('table_id', 'id', 'latex', 'values', 'hidden')
+
+    def __init__(self, table_id: str, id: str, latex: str, values: List[str], hidden: bool = False):
+        self.table_id, self.id, self.latex, self.values, self.hidden = table_id, id, latex, values, hidden
+
+    @property
+    def list_latex(self) -> Optional[str]:
+        """column as a list assignment, e.g. `x_{1}=\\left[1,2\\right]` (None if it has empty cells)"""
+        if not self.latex or len(self.values) == 0 or any(v in (None, '') for v in self.values):
+            return None
+        return f"{self.latex}=\\left[{','.join(self.values)}\\right]"
+
+
+class CalcStateRecords:
+
+    """records of a calcState (see `read_calc_state_records`)"""
+
+    __slots__ = ('expressions', 'sliders', 'folders', 'columns')
+
+    def __init__(self, expressions: List[CalcExpression], sliders: List[CalcSlider],
+                 folders: List[CalcFolder], columns: List[CalcTableColumn]):
+        self.expressions, self.sliders = expressions, sliders
+        self.folders, self.columns = folders, columns
+
+    @property
+    def visible(self) -> List[CalcExpression]:
+        """visible expressions (same filter as `DesmosCalcStrings.getExpressions`)"""
+        return [expr for expr in self.expressions if expr.visible]
+
+    @property
+    def latex_list(self) -> List[str]:
+        """latex of the visible expressions (a `latex_json` list)"""
+        return [expr.latex for expr in self.visible]
+
+    def latex_parser(self, tables: bool = False, **kwds):
+        """`DesmosLatexParser` of the visible expressions
+
+        - tables : include (visible) table columns as list assignments
+
+        raises ValueError if there are no visible expressions (or table columns)
+        """
+        from desmos2python.latex import DesmosLatexParser
+        lines = self.latex_list
+        if tables is True:
+            lines += [col.list_latex for col in self.columns
+                      if not col.hidden and col.list_latex is not None]
+        if len(lines) == 0:
+            raise ValueError('no visible expressions')
+        return DesmosLatexParser(lines=lines, **kwds)
+
+    def __repr__(self):
+        return (f'CalcStateRecords(expressions={len(self.expressions)}, sliders={len(self.sliders)}, '
+                f'folders={len(self.folders)}, columns={len(self.columns)})')
+
+
+def read_calc_state_records(calc_state: Union[Dict, AnyStr, PathLike]) -> CalcStateRecords:
+    """read a calcState (Dict, JSON string or file) into records, in a single pass.
+
+    ! only expressions with latex are kept (as in `Calc.getExpressions()` filtered by
+    `DesmosCalcStrings.getExpressions`), the calcState omits defaults, e.g. `lineStyle`
+    (a missing `lineStyle` is the default, an explicitly empty one is invisible)
+    """
+    calc_state = read_calc_state(calc_state)
+    expressions, sliders, folders, columns = [], [], {}, []
+    for item in calc_state.get('expressions', {}).get('list', []):
+        kind, item_id = item.get('type', 'expression'), str(item.get('id', ''))
+        folder = folders.get(item.get('folderId'))
+        if folder is not None:
+            folder.members.append(item_id)
+        if kind == 'expression' and item.get('latex'):
+            latex = item['latex']
+            expressions.append(CalcExpression(
+                item_id, latex, item.get('folderId'), bool(item.get('hidden', False)), item.get('color'),
+                item.get('lineStyle', CalcExpression.default_line_style)))
+            if 'sliderBounds' in item and '=' in latex:
+                name, value = latex.split('=', 1)
+                bounds = item['sliderBounds']
+                sliders.append(CalcSlider(item_id, name, _float(value), bounds.get('min'),
+                                          bounds.get('max'), bounds.get('step')))
+        elif kind == 'folder':
+            folders[item_id] = CalcFolder(item_id, item.get('title', ''), bool(item.get('hidden', False)),
+                                          bool(item.get('collapsed', False)))
+        elif kind == 'table':
+            for col in item.get('columns', []):
+                columns.append(CalcTableColumn(item_id, str(col.get('id', '')), col.get('latex', ''),
+                                               list(col.get('values', [])), bool(col.get('hidden', False))))
+    return CalcStateRecords(expressions, sliders, list(folders.values()), columns)
+
+
+def visible_latex(calc_state: Union[Dict, AnyStr, PathLike]) -> List[str]:
+    """latex of the visible expressions of a calcState (a `latex_json` list)"""
+    return read_calc_state_records(calc_state).latex_list
@@ -0,0 +1,368 @@
+"""desmos2python command line interface.
+
+usage: d2p compile [-j N] [-o OUTPUT_DIR] INPUT [INPUT ...]
+       d2p export [-j N] [-o OUTPUT_DIR] GRAPH [GRAPH ...]
+       d2p synth [-n N] [--format {latex_json,calc_state}] [-o OUTPUT_DIR]
+
+Inputs are directories (searched for `*.json`), files, glob patterns, or NDJSON streams
+(`-` for stdin, `*.ndjson`/`*.jsonl` files). Each graph is either a `latex_json` list of
+equations or an exported calcState, and is compiled to a `.d2p.py` model in a process pool.
+Results are streamed as they finish, followed by a timing summary (per file and per stage).
+A failing graph is reported, but doesn't abort the batch.
+"""
+import argparse
+import glob
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AnyStr, Dict, Iterator, List, NamedTuple, Optional, Sequence, TextIO
+
+__all__ = [
+    'CompileJob',
+    'collect_jobs',
+    'compile_job',
+    'compile_many',
+    'main',
+]
+
+logger = logging.getLogger(__name__)
+
+#: pipeline stages, in order (timed per graph)
+STAGES = ('read', 'latex2plain', 'pycode', 'fix', 'environment', 'render', 'compile', 'write')
+
+#: suffixes of NDJSON streams (one graph per line)
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+
+
+class CompileJob(NamedTuple):
+
+    """a graph to compile: a JSON file (`path`), or a decoded NDJSON record (`data`)"""
+
+    #: display name, output filename stem
+    name: str
+    path: Optional[str] = None
+    #: latex_json list, or calcState dict
+    data: object = None
+    #: NDJSON decoding error
+    error: Optional[str] = None
+
+
+def _ndjson_jobs(stream: TextIO, source: str) -> Iterator[CompileJob]:
+    """jobs from an NDJSON stream.
+
+    Each record is a latex_json list, a calcState, or {"name": ..., "lines"/"state"/"path": ...}.
+    """
+    for lineno, line in enumerate(stream, start=1):
+        if line.strip() == '':
+            continue
+        name = f'{source}_{lineno}'
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield CompileJob(name=name, error=f'invalid JSON: {e}')
+            continue
+        if isinstance(record, dict) and 'expressions' not in record:
+            name = str(record.get('name', name))
+            if 'path' in record:
+                yield CompileJob(name=record.get('name', Path(record['path']).stem),
+                                 path=str(record['path']))
+                continue
+            record = record.get('lines', record.get('state'))
+        yield CompileJob(name=name, data=record)
+
+
+def _unique_names(jobs: List[CompileJob]) -> List[CompileJob]:
+    """suffix repeated names (`name_2`, ...), so outputs don't overwrite each other"""
+    seen = {}
+    for j, job in enumerate(jobs):
+        count = seen[job.name] = seen.get(job.name, 0) + 1
+        if count > 1:
+            jobs[j] = job._replace(name=f'{job.name}_{count}')
+    return jobs
+
+
+def collect_jobs(inputs: Sequence[AnyStr], stdin: TextIO = None) -> List[CompileJob]:
+    """Resolve command line inputs (directories, files, globs, NDJSON streams) to jobs."""
+    return _unique_names(_collect_jobs(inputs, stdin=stdin))
+
+
+def _collect_jobs(inputs: Sequence[AnyStr], stdin: TextIO = None) -> List[CompileJob]:
+    jobs = []
+    for item in inputs:
+        item = str(item)
+        path = Path(item)
+        if item == '-':
+            jobs.extend(_ndjson_jobs(stdin or sys.stdin, 'stdin'))
+        elif path.is_file() and path.suffix in NDJSON_SUFFIXES:
+            with open(path, 'r') as fp:
+                jobs.extend(_ndjson_jobs(fp, path.stem))
+        elif path.is_dir():
+            jobs.extend(CompileJob(name=p.stem, path=str(p)) for p in sorted(path.rglob('*.json')))
+        elif path.is_file():
+            jobs.append(CompileJob(name=path.stem, path=str(path)))
+        else:
+            matches = sorted(glob.glob(item, recursive=True))
+            if len(matches) == 0:
+                logger.warning(f"no files matching '{item}'")
+            jobs.extend(_collect_jobs(matches, stdin=stdin))
+    return jobs
+
+
+def compile_job(job: CompileJob, output_dir: AnyStr = None, parser_kwds: Dict = None) -> Dict:
+    """Compile a graph to a `.d2p.py` model (runs in a worker process).
+
+    ...never raises: failures are returned as `{'ok': False, 'error': ...}`.
+
+    returns : Dict : {'name', 'source', 'ok', 'output', 'error', 'n_lines', 'timings': {stage: seconds}}
+    """
+    from desmos2python.api import make_latex_parser
+    from desmos2python.cache import model_cache
+    from desmos2python.calc_state import visible_latex
+    from desmos2python.latex import DesmosLatexParser
+    result = {'name': job.name, 'source': job.path or job.name, 'ok': False,
+              'output': None, 'error': job.error, 'n_lines': 0, 'timings': {}}
+    if job.error is not None:
+        return result
+    parser_kwds = dict(parser_kwds or {})
+
+    @contextmanager
+    def _stage(name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            result['timings'][name] = time.perf_counter() - t
+
+    stage = None
+    try:
+        stage = 'read'
+        with _stage(stage):
+            data = job.data
+            if job.path is not None:
+                data = json.loads(Path(job.path).read_text())
+            if isinstance(data, dict):
+                #: ! calcState export (visible expressions, as exported by the browser)
+                lines = visible_latex(data)
+            elif isinstance(data, list):
+                lines = [l for l in data if l not in (None, '')]
+            else:
+                raise ValueError(f'expected a latex_json list or a calcState, got {type(data).__name__}')
+            #: ! checked before parsing (a parser without lines would load the sample graph)
+            if len(lines) == 0:
+                raise ValueError('no visible expressions')
+            if isinstance(data, list) and job.path is not None:
+                dlp = make_latex_parser(job.path, **parser_kwds)
+            else:
+                dlp = make_latex_parser(None, lines=lines, **parser_kwds)
+            result['n_lines'] = len(dlp.latex_lines)
+        #: ! warm start: cached models skip straight to rendering
+        if model_cache.lookup_pycode(dlp.model_key) is None:
+            for stage, attr in (('latex2plain', 'plain_lines'), ('pycode', 'pycode_lines'),
+                                ('fix', 'fixed_lines'), ('environment', 'env')):
+                with _stage(stage):
+                    getattr(dlp, attr)
+        stage = 'render'
+        with _stage(stage):
+            dlp.pycode_string
+        stage = 'compile'
+        with _stage(stage):
+            dlp.pycode_compiled
+        stage = 'write'
+        with _stage(stage):
+            output_dir = Path(output_dir or DesmosLatexParser.default_output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            output = dlp.export_model(output_dir=output_dir,
+                                      output_filename=job.name + DesmosLatexParser.d2p_suffix)
+        result.update(ok=True, output=str(output))
+    except Exception as e:
+        logger.debug(f"failed to compile '{job.name}' ({stage}).", exc_info=1)
+        result['error'] = f'[{stage}] {type(e).__name__}: {e}'
+    return result
+
+
+def compile_many(jobs: Sequence[CompileJob], jobs_n: int = 1, output_dir: AnyStr = None,
+                 parser_kwds: Dict = None) -> Iterator[Dict]:
+    """Compile graphs in a process pool, yielding results as they finish (see `compile_job`)."""
+    if jobs_n <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield compile_job(job, output_dir=output_dir, parser_kwds=parser_kwds)
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs_n, len(jobs))) as pool:
+        futures = {
+            pool.submit(compile_job, job, output_dir=output_dir, parser_kwds=parser_kwds): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                yield future.result()
+            except Exception as e:
+                #: ! e.g. a crashed worker (BrokenProcessPool)
+                yield {'name': job.name, 'source': job.path or job.name, 'ok': False,
+                       'output': None, 'error': f'{type(e).__name__}: {e}', 'n_lines': 0,
+                       'timings': {}}
+
+
+def format_result(result: Dict) -> str:
+    total = sum(result['timings'].values())
+    if result['ok']:
+        return f"ok    {result['source']} -> {result['output']} ({total:.3f} s)"
+    return f"FAIL  {result['source']}: {result['error']}"
+
+
+def format_summary(results: Sequence[Dict], wall: float) -> str:
+    """timing summary table: per file (rows) and per stage (columns), with totals"""
+    stages = [s for s in STAGES if any(s in r['timings'] for r in results)]
+    width = max([len('file')] + [len(r['name']) for r in results])
+    header = f"{'file':<{width}}  {'status':<6}" + ''.join(f'{s:>12}' for s in stages) + f"{'total':>12}"
+    rows = [header, '-' * len(header)]
+
+    def _cells(timings):
+        return ''.join(f'{timings[s]:12.4f}' if s in timings else f"{'-':>12}" for s in stages) + \
+            f'{sum(timings.values()):12.4f}'
+
+    for r in sorted(results, key=lambda r: r['name']):
+        rows.append(f"{r['name']:<{width}}  {'ok' if r['ok'] else 'FAIL':<6}" + _cells(r['timings']))
+    totals = {s: sum(r['timings'].get(s, 0.0) for r in results) for s in stages}
+    rows += ['-' * len(header), f"{'total':<{width}}  {'':<6}" + _cells(totals)]
+    n_ok = sum(r['ok'] for r in results)
+    rows.append(f'{n_ok}/{len(results)} compiled, {len(results) - n_ok} failed, {wall:.3f} s wall time')
+    return '\n'.join(rows)
+
+
+def cmd_compile(args) -> int:
+    jobs = collect_jobs(args.inputs)
+    if len(jobs) == 0:
+        logger.error('no graphs to compile.')
+        return 2
+    parser_kwds = {'codegen': args.codegen, 'backend': args.backend, 'cse': args.cse}
+    t = time.perf_counter()
+    results = []
+    for result in compile_many(jobs, jobs_n=args.jobs, output_dir=args.output_dir,
+                               parser_kwds=parser_kwds):
+        results.append(result)
+        print(json.dumps(result) if args.json else format_result(result), flush=True)
+    wall = time.perf_counter() - t
+    if args.json:
+        stages = {s: sum(r['timings'].get(s, 0.0) for r in results) for s in STAGES}
+        print(json.dumps({'summary': {'n_ok': sum(r['ok'] for r in results),
+                                      'n_failed': sum(not r['ok'] for r in results),
+                                      'wall': wall, 'stages': stages}}))
+    else:
+        print('\n' + format_summary(results, wall))
+    return 0 if all(r['ok'] for r in results) else 1
+
+
+def cmd_export(args) -> int:
+    from desmos2python.export import export_many_sync
+    ids = [graph_id for graph_id in args.graphs if graph_id != '-']
+    if '-' in args.graphs:
+        ids += [line.strip() for line in sys.stdin if line.strip() != '']
+    if len(ids) == 0:
+        logger.error('no graphs to export.')
+        return 2
+
+    def _progress(result, n_done, n_total):
+        if args.json:
+            print(json.dumps({'id': result.id, 'ok': result.ok, 'latex': str(result.latex_fpath),
+                              'model': result.model, 'attempts': result.attempts,
+                              'error': result.error or (result.compiled or {}).get('error'),
+                              'seconds': result.seconds}), flush=True)
+        elif result.ok:
+            print(f'ok    [{n_done}/{n_total}] {result.id} -> {result.model or result.latex_fpath} '
+                  f'({result.seconds:.3f} s, {result.attempts} attempts)', flush=True)
+        else:
+            print(f"FAIL  [{n_done}/{n_total}] {result.id}: "
+                  f"{result.error or result.compiled['error']}", flush=True)
+
+    parser_kwds = {'codegen': args.codegen, 'backend': args.backend, 'cse': args.cse}
+    results = export_many_sync(ids, concurrency=args.jobs, output_dir=args.output_dir,
+                               compile_models=not args.no_compile, models_dir=args.models_dir,
+                               parser_kwds=parser_kwds, min_interval=args.min_interval,
+                               retries=args.retries, backoff=args.backoff, progress=_progress)
+    return 0 if all(r.ok for r in results) else 1
+
+
+def cmd_synth(args) -> int:
+    from desmos2python.synthetic import write_synthetic_graph
+    for seed in range(args.seed, args.seed + args.count):
+        fpath = Path(args.output_dir).joinpath(f'synthetic_{args.n}_{seed}.json')
+        write_synthetic_graph(fpath, fmt=args.format, n_expressions=args.n, n_params=args.params,
+                              depth=args.depth, fan_in=args.fan_in, p_frac=args.p_frac,
+                              p_greek=args.p_greek, n_lists=args.lists, n_folders=args.folders,
+                              seed=seed)
+        print(fpath)
+    return 0
+
+
+def make_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='d2p', description='desmos2python command line interface.')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='more logging output (-vv for debug)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    p_compile = subparsers.add_parser(
+        'compile', help='compile latex_json files / calcState exports to .d2p.py models',
+        description=__doc__.split('\n\n')[2].replace('\n', ' '))
+    p_compile.add_argument('inputs', nargs='+', metavar='INPUT',
+                           help="directory, file, glob pattern, or NDJSON stream ('-' for stdin)")
+    p_compile.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+                           help='number of worker processes (default: 1, in-process)')
+    p_compile.add_argument('-o', '--output-dir', default=None,
+                           help='output directory (default: ~/.desmos2python/models)')
+    p_compile.add_argument('--codegen', default='array', choices=('array', 'vectorize'))
+    p_compile.add_argument('--backend', default='numpy', choices=('numpy', 'numba'))
+    p_compile.add_argument('--cse', action='store_true', help='common subexpression elimination')
+    p_compile.add_argument('--json', action='store_true',
+                           help='stream results (and the summary) as NDJSON')
+    p_compile.set_defaults(func=cmd_compile)
+    p_export = subparsers.add_parser(
+        'export', help='export Desmos graphs (headless browsers) and compile them to .d2p.py models')
+    p_export.add_argument('graphs', nargs='+', metavar='GRAPH',
+                          help="graph id or url ('-' to read them from stdin, one per line)")
+    p_export.add_argument('-j', '--jobs', type=int, default=8, metavar='N',
+                          help='number of concurrent exports / browsers (default: 8)')
+    p_export.add_argument('-o', '--output-dir', default=None,
+                          help='latex_json/calcState_json output root (default: ~/.desmos2python)')
+    p_export.add_argument('--models-dir', default=None,
+                          help='model output directory (default: ~/.desmos2python/models)')
+    p_export.add_argument('--no-compile', action='store_true', help='only export, no models')
+    p_export.add_argument('--min-interval', type=float, default=1.0,
+                          help='seconds between requests to the same host (default: 1)')
+    p_export.add_argument('--retries', type=int, default=2, help='retries per graph (default: 2)')
+    p_export.add_argument('--backoff', type=float, default=1.0,
+                          help='retry backoff, doubled after each attempt (default: 1 s)')
+    p_export.add_argument('--codegen', default='array', choices=('array', 'vectorize'))
+    p_export.add_argument('--backend', default='numpy', choices=('numpy', 'numba'))
+    p_export.add_argument('--cse', action='store_true', help='common subexpression elimination')
+    p_export.add_argument('--json', action='store_true', help='stream results as NDJSON')
+    p_export.set_defaults(func=cmd_export)
+    p_synth = subparsers.add_parser(
+        'synth', help='write seeded synthetic graphs (latex_json or calcState), for scaling tests')
+    p_synth.add_argument('-n', type=int, default=100, help='number of expressions')
+    p_synth.add_argument('-o', '--output-dir', default='.')
+    p_synth.add_argument('--format', default='latex_json', choices=('latex_json', 'calc_state'))
+    p_synth.add_argument('--count', type=int, default=1, help='number of graphs (seeds seed, seed+1, ...)')
+    p_synth.add_argument('--seed', type=int, default=0)
+    p_synth.add_argument('--params', type=int, default=None, help='number of parameters')
+    p_synth.add_argument('--depth', type=int, default=2, help='nesting depth')
+    p_synth.add_argument('--fan-in', type=int, default=2, help='functions called by each function')
+    p_synth.add_argument('--p-frac', type=float, default=0.3, help='probability of fractions')
+    p_synth.add_argument('--p-greek', type=float, default=0.3, help='probability of greek names')
+    p_synth.add_argument('--lists', type=int, default=0, help='number of list parameters')
+    p_synth.add_argument('--folders', type=int, default=0, help='number of folders (calcState)')
+    p_synth.set_defaults(func=cmd_synth)
+    return parser
+
+
+def main(argv: Sequence[AnyStr] = None) -> int:
+    args = make_arg_parser().parse_args(argv)
+    logging.basicConfig(level=[logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)])
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
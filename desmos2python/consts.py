@@ -39,4 +39,5 @@ GlobalConsts = GlobalConst
 
 """Global consts -> global namespace:
 """
-builtins.__dict__.update(vars(GlobalConsts))
+builtins.__dict__.update(
+    {k: v for k, v in vars(GlobalConsts).items() if not k.startswith('_')})
@@ -0,0 +1,228 @@
+"""desmos2python equation dependency DAG, with common subexpression elimination across equations.
+
+Nodes are the equations (functions) and parameters of a graph, edges point from an
+equation to the equations/parameters it uses. Outputs are inlined (through calls to other
+equations) and `sympy.cse` is run across them, so shared intermediates are computed once.
+"""
+import ast
+import json
+import logging
+from functools import cached_property
+from os import PathLike
+from pathlib import Path
+from typing import AnyStr, Dict, List, NamedTuple, Sequence, Tuple
+import sympy as sp
+from sympy.core.function import AppliedUndef
+from sympy.printing.numpy import NumPyPrinter
+from desmos2python.latex import SelfAttrTransformer, equation_names
+
+__all__ = [
+    'EquationDAG',
+    'CSEResult',
+]
+
+logger = logging.getLogger(__name__)
+
+#: numpy function names that differ in sympy
+NUMPY2SYMPY = {
+    'arcsin': 'asin', 'arccos': 'acos', 'arctan': 'atan', 'arctan2': 'atan2',
+    'arcsinh': 'asinh', 'arccosh': 'acosh', 'arctanh': 'atanh',
+    'abs': 'Abs', 'absolute': 'Abs', 'power': 'Pow',
+}
+
+
+class SympyNameTransformer(SelfAttrTransformer):
+
+    """Rewrite a generated equation body for `sympy.parse_expr`: `self.a` -> `a`, `np.exp` -> `exp`"""
+
+    def visit_Attribute(self, node):
+        node = super().visit_Attribute(node)
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) \
+                and node.value.id == 'np':
+            return ast.copy_location(
+                ast.Name(id=NUMPY2SYMPY.get(node.attr, node.attr), ctx=node.ctx), node)
+        return node
+
+
+class CSEResult(NamedTuple):
+
+    """result of `EquationDAG.cse(...)`"""
+
+    #: outputs (function names)
+    outputs: Tuple[AnyStr, ...]
+    #: shared intermediates: ((name, expr), ...)
+    replacements: Tuple[Tuple[sp.Symbol, sp.Expr], ...]
+    #: reduced output expressions (in terms of the intermediates)
+    reduced: Tuple[sp.Expr, ...]
+    #: operation count, each output evaluated independently
+    ops_before: int
+    #: operation count, intermediates computed once
+    ops_after: int
+
+    @property
+    def ops_eliminated(self) -> int:
+        return self.ops_before - self.ops_after
+
+    def pycode(self) -> List[AnyStr]:
+        """numpy statements: intermediates, then `return {output: value, ...}`
+
+        ! outputs that don't depend on `x` are broadcast to its shape
+        """
+        printer = NumPyPrinter({'fully_qualified_modules': True})
+        def _print(expr):
+            return printer.doprint(expr).replace('numpy.', 'np.')
+        #: symbols (`x` and intermediates) that depend on `x`
+        arg_symbols = {EquationDAG.arg_symbol}
+        for name, expr in self.replacements:
+            if expr.free_symbols & arg_symbols:
+                arg_symbols.add(name)
+        def _print_output(expr):
+            if expr.free_symbols & arg_symbols:
+                return _print(expr)
+            return f'({_print(expr)}) + np.zeros_like(x)'
+        stmts = [f'{name} = {_print(expr)}' for name, expr in self.replacements]
+        values = ', '.join(
+            f"'{output}': {_print_output(expr)}" for output, expr in zip(self.outputs, self.reduced))
+        return stmts + [f'return {{{values}}}']
+
+
+class EquationDAG:
+
+    """Dependency DAG of the equations (functions) and parameters of a graph.
+
+    Built from the (python) return values of the generated equations, see `from_equations`.
+    """
+
+    #: symbol used for the (single) argument of inlined outputs
+    arg_symbol = sp.Symbol('x')
+
+    def __init__(self, functions: Dict[AnyStr, Tuple[List[AnyStr], AnyStr]],
+                 parameters: Dict[AnyStr, object]):
+        """
+        - functions : Dict : {func_name: (func_args, python expression)}
+        - parameters : Dict : {param_name: value}
+        """
+        self.functions = dict(functions)
+        self.parameters = dict(parameters)
+
+    @classmethod
+    def from_equations(cls, equations: List[Dict], parameters: List[Dict]) -> 'EquationDAG':
+        """from `DesmosLatexParser.template_vars` equations/parameters (`fix_raw_pycode(...)` dicts)"""
+        return cls(
+            functions={
+                eqn.get('func_name'): (list(eqn.get('func_args')), eqn.get('return_value'))
+                for eqn in equations
+            },
+            parameters={param.get('param_name'): param.get('param_value') for param in parameters},
+        )
+
+    @cached_property
+    def sympy_functions(self) -> Dict[AnyStr, sp.Lambda]:
+        """{func_name: sympy.Lambda} for the equations that can be parsed by sympy"""
+        local_dict = {name: sp.Symbol(name) for name in self.parameters}
+        local_dict.update({name: sp.Function(name) for name in self.functions})
+        local_dict['pi'] = sp.pi
+        lambdas = {}
+        for name, (args, expr) in self.functions.items():
+            try:
+                pyexpr = ast.unparse(SympyNameTransformer().visit(
+                    ast.parse(str(expr).strip(), mode='eval')))
+                symbols = [sp.Symbol(arg) for arg in args]
+                sexpr = sp.parse_expr(
+                    pyexpr, local_dict={**local_dict, **dict(zip(args, symbols))})
+            except Exception:
+                logger.debug(f"can't parse '{name}' for the equation DAG.", exc_info=1)
+                continue
+            #: ! only (scalar) expressions of known (sympy) functions, or other equations
+            if not isinstance(sexpr, sp.Expr):
+                continue
+            if not {f.func.__name__ for f in sexpr.atoms(AppliedUndef)} <= set(self.functions):
+                continue
+            lambdas[name] = sp.Lambda(tuple(symbols), sexpr)
+        return lambdas
+
+    @cached_property
+    def deps(self) -> Dict[AnyStr, List[AnyStr]]:
+        """{func_name: [names of the equations and parameters it uses, ...]}"""
+        deps = {}
+        for name, (args, expr) in self.functions.items():
+            names = equation_names({'func_args': args, 'pycode_fixed': f'return {expr}'})
+            if names is None:
+                names = set(self.parameters)
+            deps[name] = sorted(names & (set(self.functions) | set(self.parameters)))
+        return deps
+
+    def inline(self, name: AnyStr) -> sp.Expr:
+        """expression for an equation, with calls to other equations inlined"""
+        lam = self.sympy_functions[name]
+        expr = lam.expr
+        for _ in range(len(self.functions) + 1):
+            calls = expr.atoms(AppliedUndef)
+            if len(calls) == 0:
+                return expr
+            expr = expr.subs({
+                call: self.sympy_functions[call.func.__name__](*call.args) for call in calls
+            })
+        raise ValueError(f"'{name}' has cyclic dependencies")
+
+    def inlined_outputs(self, outputs: Sequence[AnyStr]) -> Dict[AnyStr, sp.Expr]:
+        """single-argument outputs that can be fully inlined (argument -> `arg_symbol`)"""
+        inlined = {}
+        for name in outputs:
+            lam = self.sympy_functions.get(name)
+            if lam is None or len(lam.variables) != 1:
+                continue
+            try:
+                expr = self.inline(name)
+            except (KeyError, ValueError):
+                logger.debug(f"can't inline '{name}'.", exc_info=1)
+                continue
+            inlined[name] = expr.subs(lam.variables[0], EquationDAG.arg_symbol)
+        return inlined
+
+    def cse(self, outputs: Sequence[AnyStr] = None) -> CSEResult:
+        """Eliminate common subexpressions across the (inlined) `outputs`."""
+        if outputs is None:
+            outputs = list(self.functions)
+        inlined = self.inlined_outputs(outputs)
+        exprs = list(inlined.values())
+        replacements, reduced = sp.cse(exprs, symbols=sp.numbered_symbols('_cse'))
+        ops_before = sum(sp.count_ops(expr) for expr in exprs)
+        ops_after = sum(sp.count_ops(expr) for _, expr in replacements) + \
+            sum(sp.count_ops(expr) for expr in reduced)
+        result = CSEResult(
+            outputs=tuple(inlined), replacements=tuple(replacements), reduced=tuple(reduced),
+            ops_before=int(ops_before), ops_after=int(ops_after))
+        logger.info(f'cse: eliminated {result.ops_eliminated} of {result.ops_before} operations '
+                    f'({len(result.replacements)} shared intermediates).')
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            'functions': {
+                name: {'args': args, 'expr': expr, 'deps': self.deps[name]}
+                for name, (args, expr) in self.functions.items()
+            },
+            'parameters': {name: value for name, value in self.parameters.items()},
+        }
+
+    def to_dot(self) -> AnyStr:
+        """graphviz (dot) source: edges point from dependencies to dependents"""
+        lines = ['digraph desmos2python {']
+        lines += [f'  "{name}" [shape=box];' for name in self.parameters]
+        lines += [f'  "{name}" [shape=ellipse];' for name in self.functions]
+        lines += [f'  "{dep}" -> "{name}";' for name in self.functions for dep in self.deps[name]]
+        return '\n'.join(lines + ['}'])
+
+    def dump(self, fpath: PathLike = None, fmt: AnyStr = 'dot') -> AnyStr:
+        """dump the DAG ('dot' or 'json'), optionally to a file"""
+        if fmt == 'dot':
+            out = self.to_dot()
+        elif fmt == 'json':
+            out = json.dumps(self.to_dict(), indent=2, default=str)
+        else:
+            raise ValueError(f"fmt must be 'dot' or 'json', got '{fmt}'")
+        if fpath is not None:
+            Path(fpath).write_text(out)
+        return out
+
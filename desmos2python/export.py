@@ -0,0 +1,186 @@
+"""desmos2python asynchronous bulk graph export.
+
+Many graphs are exported at once over a `BrowserPool`. The (blocking) selenium calls run in a
+thread executor, requests to the same host are rate limited, failed exports are retried
+with exponential backoff. Each export is compiled (`cli.compile_job`) as soon as it finishes,
+e.g.
+
+>>> results = export_many_sync(['8tb0onyoep', 't68sf7nwdo'], concurrency=2)   # doctest: +SKIP
+>>> [(r.id, r.ok, r.model) for r in results]                                  # doctest: +SKIP
+"""
+import re
+import json
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import Any, AnyStr, Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+from urllib.parse import urlparse
+from desmos2python.browser import BrowserPool, DesmosWebSession
+
+__all__ = [
+    'ExportResult',
+    'HostRateLimiter',
+    'export_many',
+    'export_many_sync',
+]
+
+logger = logging.getLogger(__name__)
+
+
+class ExportResult(NamedTuple):
+
+    """result of exporting (and compiling) one graph"""
+
+    #: graph id (or url), as given
+    id: str
+    url: str
+    #: exported `latex_json` file
+    latex_fpath: Optional[Path] = None
+    #: exported calcState file
+    state_fpath: Optional[Path] = None
+    #: `cli.compile_job` result (None if not compiled)
+    compiled: Optional[Dict] = None
+    #: number of export attempts
+    attempts: int = 0
+    #: export failure reason (None on success)
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and (self.compiled is None or self.compiled['ok'])
+
+    @property
+    def model(self) -> Optional[str]:
+        """compiled `.d2p.py` model path"""
+        return self.compiled['output'] if self.compiled is not None else None
+
+
+class HostRateLimiter:
+
+    """Per-host rate limit: requests to the same host start at least `min_interval` seconds apart.
+
+    ! slots are reserved in call order (the event loop is single threaded, no lock needed)
+    """
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        #: earliest start of the next request, per host
+        self._next: Dict[str, float] = {}
+
+    async def wait(self, url: str):
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        start = max(now, self._next.get(host, now))
+        self._next[host] = start + self.min_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def graph_url(graph_id: str) -> str:
+    """graph id (e.g. `8tb0onyoep`) -> desmos calculator url, urls are kept as-is"""
+    if '://' in graph_id:
+        return graph_id
+    return DesmosWebSession.desmos_url_head + graph_id
+
+
+def graph_name(graph_id: str) -> str:
+    """output filename stem of a graph id or url (last path segment)"""
+    name = urlparse(graph_id).path.rstrip('/').split('/')[-1] or urlparse(graph_id).netloc
+    return re.sub(r'[^A-Za-z0-9_\-]', '_', name)
+
+
+def export_graph(pool: BrowserPool, url: str, name: str, output_dir: Path) -> Dict[str, Path]:
+    """export a graph's (visible) latex list and calcState (blocking, runs in a worker thread)"""
+    with pool.session(url=url) as dws:
+        extract = dws.extract_all()
+    fpaths = {}
+    for key, subdir, data in (('latex_fpath', 'latex_json', extract.latex_list),
+                              ('state_fpath', 'calcState_json', extract.calc_state)):
+        fpath = output_dir.joinpath(subdir, name).with_suffix('.json')
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        fpath.write_text(json.dumps(data))
+        fpaths[key] = fpath
+    return fpaths
+
+
+async def export_many(ids: Sequence[str], concurrency: int = 8, pool: BrowserPool = None,
+                      output_dir: Union[AnyStr, PathLike] = None, compile_models: bool = True,
+                      models_dir: Union[AnyStr, PathLike] = None, parser_kwds: Dict = None,
+                      min_interval: float = 1.0, retries: int = 2, backoff: float = 1.0,
+                      progress: Callable[[ExportResult, int, int], Any] = None) -> List[ExportResult]:
+    """Export (and compile) many graphs concurrently.
+
+    - ids : graph ids or urls
+    - concurrency : number of exports running at once (and browsers, if `pool` isn't given)
+    - pool : `BrowserPool` to export with (default: a pool of `concurrency` browsers, shut down after)
+    - output_dir : root of the `latex_json`/`calcState_json` outputs (default: `DesmosWebSession.default_output_dir`)
+    - compile_models : compile each graph to a `.d2p.py` model (in `models_dir`) as soon as it is exported
+    - min_interval : seconds between request starts to the same host
+    - retries, backoff : failed exports are retried after `backoff * 2 ** attempt` seconds
+    - progress : called with `(result, n_done, n_total)` as each graph finishes
+
+    returns : List[ExportResult] : in the order of `ids` (! failures are returned, never raised)
+    """
+    from desmos2python.cli import CompileJob, compile_job
+    output_dir = Path(output_dir or DesmosWebSession.default_output_dir)
+    own_pool = pool is None
+    if own_pool:
+        pool = BrowserPool(max_size=concurrency)
+    loop = asyncio.get_running_loop()
+    limiter = HostRateLimiter(min_interval=min_interval)
+    semaphore = asyncio.Semaphore(concurrency)
+    n_done = 0
+
+    async def _export(graph_id: str) -> ExportResult:
+        nonlocal n_done
+        url, name = graph_url(graph_id), graph_name(graph_id)
+        t = time.perf_counter()
+        result = ExportResult(graph_id, url)
+        async with semaphore:
+            for attempt in range(retries + 1):
+                await limiter.wait(url)
+                try:
+                    fpaths = await loop.run_in_executor(
+                        browser_executor, export_graph, pool, url, name, output_dir)
+                except Exception as e:
+                    logger.info(f"export of '{graph_id}' failed (attempt {attempt + 1}).", exc_info=1)
+                    result = result._replace(attempts=attempt + 1, error=f'{type(e).__name__}: {e}')
+                    if attempt < retries:
+                        await asyncio.sleep(backoff * 2 ** attempt)
+                    continue
+                result = result._replace(attempts=attempt + 1, error=None, **fpaths)
+                break
+        if result.error is None and len(json.loads(result.latex_fpath.read_text())) == 0:
+            #: ! failed before compiling: a parser without lines would compile the sample graph
+            result = result._replace(error='no visible expressions')
+        if compile_models is True and result.error is None:
+            #: ! compiled as soon as exported, while other exports are still running
+            compiled = await loop.run_in_executor(
+                compile_executor, compile_job, CompileJob(name, path=str(result.latex_fpath)),
+                models_dir, parser_kwds)
+            result = result._replace(compiled=compiled)
+        result = result._replace(seconds=time.perf_counter() - t)
+        n_done += 1
+        if progress is not None:
+            progress(result, n_done, len(ids))
+        return result
+
+    #: ! compiles are serialized in one thread, they are CPU bound (GIL)
+    browser_executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='d2p-export')
+    compile_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='d2p-compile')
+    try:
+        return list(await asyncio.gather(*[_export(graph_id) for graph_id in ids]))
+    finally:
+        browser_executor.shutdown(wait=True)
+        compile_executor.shutdown(wait=True)
+        if own_pool:
+            pool.shutdown()
+
+
+def export_many_sync(ids: Sequence[str], **kwds) -> List[ExportResult]:
+    """`export_many` for synchronous callers (runs its own event loop)"""
+    return asyncio.run(export_many(ids, **kwds))
@@ -1,38 +1,63 @@
 from queue import Queue
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from os import PathLike
+import ast
+import atexit
+import cProfile
+import importlib.util
 import inspect
+import hashlib
 import logging
 import json
+import pstats
 import re
-import traceback
 from pathlib import Path
-from functools import cached_property
+from functools import cached_property, lru_cache
 import sympy as sp
 from sympy.parsing.latex import parse_latex
 from sympy import pycode
-from jinja2 import Environment, FileSystemLoader
-from typing import AnyStr, List, Dict, Union, Container
+from typing import AnyStr, Callable, List, Dict, NamedTuple, Optional, Union, Container
 from desmos2python._logger import LoggingContext
 from desmos2python.consts import GlobalConsts
-from desmos2python.utils import flatten, D2P_Resources
+from desmos2python.utils import flatten, D2P_Resources, load_model
+from desmos2python import utils as d2p_utils
 from desmos2python.resources.greek_chars import GreekAlphabet
 from desmos2python.pdoc import convert2plain as pdoc_convert2plain
+from desmos2python.pdoc import convert2plain_batch as pdoc_convert2plain_batch
+from desmos2python.plain2pycode import plain2pycode
+from desmos2python.cache import CacheEntry, LineCache, line_cache, ModelCache, model_cache
+from desmos2python.stats import ParserStats, StageEvent
+from desmos2python.templates import registry as template_registry
 import builtins
 import warnings
 
 __all__ = [
     'DesmosLinesContainer',
     'DesmosLatexParser',
+    'load_model',
 ]    
 
 #: update builtin globals with numerical constants
-builtins.__dict__.update(vars(GlobalConsts))
+builtins.__dict__.update(
+    {k: v for k, v in vars(GlobalConsts).items() if not k.startswith('_')})
 
 #: instantiate namespace-specific logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.WARNING)
 
 
+#: ! bump when generated code changes for the same input, cached lines/models are invalidated
+CODEGEN_VERSION = 4
+
+
+@lru_cache(maxsize=None)
+def template_digest(name: AnyStr) -> AnyStr:
+    """content hash of a package template (! cached models are invalidated by template changes)"""
+    fpath = D2P_Resources.get_package_resources_path().joinpath('templates', name)
+    return hashlib.sha256(Path(fpath).read_bytes()).hexdigest()
+
+
 class DesmosLinesContainer:
 
     """wrapper to avoid warnings/errors for ipython tab-completion.
@@ -100,19 +125,48 @@ class DesmosLatexParser:
     
     __mro__ = (object, )
 
+    #: available code generation modes for equations
+    codegen_modes = ('array', 'vectorize')
+
+    #: available backends for equations
+    backends = ('numpy', 'numba')
+
     def __init__(self, expr_str: AnyStr = None, lines: List[AnyStr] = None,
                  fpath: AnyStr = None, auto_init: bool = True, auto_exec: bool = False,
-                 ns_prefix: AnyStr = '', ns_name: AnyStr = 'DesmosModelNS', **kwds):
+                 ns_prefix: AnyStr = '', ns_name: AnyStr = 'DesmosModelNS',
+                 codegen: AnyStr = 'array', backend: AnyStr = 'numpy', fastcall: bool = True,
+                 cse: bool = False, workers: int = None,
+                 stats_hook: Callable[[StageEvent], None] = None, **kwds):
         """
         Keyword Arguments:
         - expr_str : string : latex equations as a newline-separated string
         - lines : list : list of latex equations (string)
         - fpath : pathlike : path to a JSON file containing a list of latex equations
         - auto_init : flag to automatically attempt to initialize/load default equations
+        - codegen : 'array' (numpy expressions, np.vectorize fallback) or 'vectorize' (np.vectorize only)
+        - backend : 'numpy', or 'numba' (jit-compiled kernels, `codegen` is the per-function fallback)
+        - fastcall : bind parameters/equations once as closure variables (instead of on every call)
+        - cse : add an `outputs(x)` method, evaluating all array-native outputs with common
+            subexpressions computed once (see `desmos2python.dag`)
+        - workers : parse latex -> sympy across a shared process pool (default: in-process)
+        - stats_hook : called with a `desmos2python.stats.StageEvent` when a stage finishes
+            (per-stage timings/counters are collected in `self.stats`)
         """
         #: init properties
         self._template_vars = None
+        self.stats = ParserStats(hook=stats_hook)
         #: kwds -> instance config
+        if codegen not in DesmosLatexParser.codegen_modes:
+            raise ValueError(f"codegen must be one of {DesmosLatexParser.codegen_modes}, got '{codegen}'")
+        self.codegen = codegen
+        if backend not in DesmosLatexParser.backends:
+            raise ValueError(f"backend must be one of {DesmosLatexParser.backends}, got '{backend}'")
+        if backend == 'numba' and importlib.util.find_spec('numba') is None:
+            logging.warning("numba is not installed, backend='numba' will fall back to numpy.")
+        self.backend = backend
+        self.fastcall = fastcall
+        self.cse = cse
+        self.workers = workers
         self.auto_exec = auto_exec
         self.ns_name = f'{ns_prefix}{ns_name}'
         self._errs = []
@@ -120,8 +174,10 @@ class DesmosLatexParser:
         self._lines: DesmosLinesContainer = DesmosLinesContainer()
         self.lines, self.fpath = lines, fpath
         if auto_init is True:
-            self.setup(expr_str=expr_str, lines=self.lines,
-                       fpath=self.fpath, **kwds)
+            with self.stats.stage('setup') as stage:
+                self.setup(expr_str=expr_str, lines=lines,
+                           fpath=self.fpath, **kwds)
+                stage.lines = len(self.lines)
             if auto_exec is True:  # ! only does anything if auto_init is True.
                 #: ! modifies namespace if `auto_exec` is True
                 self.exec_pycode()
@@ -140,6 +196,9 @@ class DesmosLatexParser:
         return self._fpath
     @fpath.setter
     def fpath(self, new):
+        if new is None:
+            self._fpath = None
+            return
         try:
             self._fpath = Path(new)
         except Exception:
@@ -161,19 +220,12 @@ class DesmosLatexParser:
         return self.init_jinja_env()
 
     def init_jinja_env(self):
-        #: initialize environment -> instance
-        templates_dir = D2P_Resources \
-            .get_package_resources_path() \
-            .joinpath('templates')
-        env = Environment(autoescape=False, optimized=True,
-                          loader=FileSystemLoader(
-                              searchpath=[
-                                  templates_dir
-                              ],
-                          ))
-        #: get the dictionary of values to use for the environment...
-        template_vars = self.calc_pycode_environment()
-        self.template_vars = template_vars
+        with self.stats.stage('init_jinja_env'):
+            #: shared (process-wide) environment, templates are compiled once
+            env = template_registry.environment()
+            #: get the dictionary of values to use for the environment...
+            template_vars = self.calc_pycode_environment()
+            self.template_vars = template_vars
         return env
 
     @property
@@ -186,23 +238,28 @@ class DesmosLatexParser:
 
     def setup(self, expr_str=None, lines=None, fpath=None, reset=False,
               **kwds):
+        #: ! given lines (even empty) are never replaced by the default file
+        given = lines is not None or expr_str is not None
         if reset is True:
             self.lines, self.fpath = None, None
         if fpath is not None:
             self.fpath = Path(fpath)
-        if self.fpath is not None:
+        if self.fpath is not None and not self.fpath.is_file():
+            #: ! search the latex_json directories, unless given an existing file
             self.fpath = DesmosLatexParser.get_fpath(pattern='*'+self.fpath.stem+'*')
-        if lines is None:
-            lines = self.lines
+        if lines is not None:
+            self.lines = lines
         if fpath is None and self.fpath is None:
             #: get filepath if needed
             self.fpath = DesmosLatexParser.get_fpath(**kwds)
         if expr_str is not None:
             self.lines = expr_str.split('\n')
-        if self.fpath is not None and (self.lines.empty or reset is True):
-            self.lines = DesmosLatexParser.read_file(self.fpath)
+        if self.fpath is not None and ((self.lines.empty and not given) or reset is True):
+            with self.stats.stage('read_file') as stage:
+                self.lines = DesmosLatexParser.read_file(self.fpath)
+                stage.lines = len(self.lines)
         if self.lines.empty:
-            self.setup(fpath=self.fpath)
+            logging.warning(f'no latex lines (fpath={self.fpath}).')
         return self.lines
 
     @property
@@ -220,31 +277,103 @@ class DesmosLatexParser:
 
         """
         slines = DesmosLinesContainer(lines=[])
-        try:
-            slines.lines = self.parse2sympy(self.latex_lines)
-        except Exception:
-            logging.debug(traceback.format_exc())
-        finally:
-            return slines
+        with self.stats.stage('sympy_lines',
+                              cache_hits=lambda: line_cache.hits('parse_latex_lines2sympy')) as stage:
+            try:
+                slines.lines = self.parse2sympy(self.latex_lines, workers=self.workers)
+            except Exception as e:
+                stage.failures += 1
+                self.stats.error('sympy_lines', e)
+            stage.lines = len(slines)
+            #: ! lines that couldn't be parsed are kept as (latex) strings
+            stage.failures += sum(isinstance(line, str) for line in slines)
+        return slines
 
     @cached_property
     def plain_lines(self):
-        """converted from latex -> 'plain' math format via pandoc"""
-        return DesmosLinesContainer(
-            lines=[pdoc_convert2plain(line) for line in self.latex_lines])
+        """converted from latex -> 'plain' math format via pandoc (single batched call)"""
+        with self.stats.stage('plain_lines', cache_hits=lambda: line_cache.hits('convert2plain')) as stage:
+            plain_lines = pdoc_convert2plain_batch(list(self.latex_lines))
+            stage.lines = len(plain_lines)
+            #: ! failed conversions are left as latex
+            stage.failures = sum('\\' in line for line in plain_lines)
+        return DesmosLinesContainer(lines=plain_lines)
 
     @cached_property
     def pycode_lines(self):
         dlc_plines = DesmosLinesContainer()
-        try:
-            # ! use pandoc instead of sympy here
-            plines_raw = self.plain_lines
-            dlc_plines.lines = DesmosLatexParser.fix_pycode_line(
-                plines_raw, from_sympy=False)
-        except Exception:
-            logging.debug(traceback.format_exc())
-        finally:
-            return dlc_plines
+        # ! use pandoc instead of sympy here
+        plines_raw = self.plain_lines
+        with self.stats.stage('pycode_lines') as stage:
+            try:
+                dlc_plines.lines = DesmosLatexParser.fix_pycode_line(
+                    plines_raw, from_sympy=False)
+            except Exception as e:
+                stage.failures += 1
+                self.stats.error('pycode_lines', e)
+            stage.lines = len(dlc_plines)
+        return dlc_plines
+
+    @cached_property
+    def fixed_lines(self) -> List[Optional[Dict]]:
+        """`fix_raw_pycode(...)` dicts for `self.pycode_lines` (None for lines that can't be fixed)"""
+        pycode_lines = self.pycode_lines
+        with self.stats.stage('fixed_lines', cache_hits=lambda: line_cache.hits('fix_raw_pycode')) as stage:
+            fixed_lines = [fix_raw_pycode(pline) for pline in pycode_lines]
+            stage.lines = len(fixed_lines)
+            stage.failures = sum(line is None for line in fixed_lines)
+        return fixed_lines
+
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def line_key(line: AnyStr) -> AnyStr:
+        """content hash of a latex line (whitespace-normalized, see `LineCache.normalize`)"""
+        return hashlib.sha1(LineCache.normalize(line).encode('utf-8')).hexdigest()
+
+    #: per-line stages reused by `update_lines`
+    line_stages = ('plain_lines', 'pycode_lines', 'fixed_lines')
+
+    #: whole-graph stages invalidated by `update_lines`
+    graph_stages = ('sympy_lines', 'pycode_string', 'pycode_compiled')
+
+    def update_lines(self, new_lines: List[AnyStr]) -> Dict[AnyStr, int]:
+        """Incrementally re-parse after the expression list changed.
+
+        Lines are diffed by content hash: only added/changed lines are converted, the
+        per-line results of unchanged lines are reused (the template is re-rendered).
+        ! nothing is reused if the per-line stages weren't computed (e.g. warm model cache hit).
+
+        returns : Dict : {'reused': n, 'converted': n, 'removed': n}
+        """
+        new_lines = list(new_lines)
+        known = {}
+        if all(stage in self.__dict__ for stage in DesmosLatexParser.line_stages):
+            known = {
+                DesmosLatexParser.line_key(line): results for line, *results in zip(
+                    self.latex_lines, *[getattr(self, stage) for stage in DesmosLatexParser.line_stages])
+            }
+        new_keys = [DesmosLatexParser.line_key(line) for line in new_lines]
+        converted = [j for j, key in enumerate(new_keys) if key not in known]
+        if len(converted) > 0:
+            plain_lines = pdoc_convert2plain_batch([new_lines[j] for j in converted])
+            pycode_lines = DesmosLatexParser.fix_pycode_line(plain_lines, from_sympy=False)
+            for j, plain_line, pycode_line in zip(converted, plain_lines, pycode_lines):
+                known[new_keys[j]] = (plain_line, pycode_line, fix_raw_pycode(pycode_line))
+        stats = {
+            'reused': len(new_lines) - len(converted),
+            'converted': len(converted),
+            'removed': len(set(map(DesmosLatexParser.line_key, self.latex_lines)) - set(new_keys)),
+        }
+        #: ! set the per-line stages directly, drop the whole-graph stages
+        self.lines = new_lines
+        for k, stage in enumerate(DesmosLatexParser.line_stages):
+            stage_lines = [known[key][k] for key in new_keys]
+            self.__dict__[stage] = stage_lines if stage == 'fixed_lines' \
+                else DesmosLinesContainer(lines=stage_lines)
+        for stage in DesmosLatexParser.graph_stages:
+            self.__dict__.pop(stage, None)
+        self.template_vars = self.calc_pycode_environment()
+        return stats
 
     @staticmethod
     def fix_pycode_line(pline: Union[List[AnyStr], AnyStr],
@@ -268,7 +397,7 @@ class DesmosLatexParser:
                 pline = pycode(pline)
         except Exception:
             with LoggingContext(logger, level=verbosity) as logctx:
-                logging.debug(traceback.format_exc())
+                logging.debug('sympy.pycode failed.', exc_info=1)
         pline = pline \
             .split('# Not supported in Python:\n  #')[-1] \
             .split('\n')[-1]
@@ -284,13 +413,12 @@ class DesmosLatexParser:
         for sline in slines:
             try:
                 pline = pycode(sline)
-            except Exception:
-                #: ! on failure, log (line, error_msg) to `self._errs`
-                msg = traceback.format_exc()
-                logging.debug(msg)
+            except Exception as e:
+                #: ! on failure, log (line, error) to `self._errs` (traceback formatted lazily)
+                logging.debug(f"sympy.pycode failed for '{sline}'.", exc_info=1)
                 pline = str(sline)
                 if isinstance(cls, DesmosLatexParser):
-                    cls._errs.append((pline, msg))
+                    cls._errs.append((pline, e))
             finally:
                 pcode_lines.append(pline)
         return pcode_lines
@@ -316,36 +444,94 @@ class DesmosLatexParser:
 
     def calc_pycode_environment(self):
         """setup variables for jinja2 environment"""
-        lines_fixed = [fix_raw_pycode(pline) for pline in self.pycode_lines]
-        lines_fixed = [line for line in lines_fixed if line is not None]
+        lines_fixed = [line for line in self.fixed_lines if line is not None]
         params_fixed = list(
             filter(lambda line: line.get('param_name') != '', lines_fixed))
         params_fixed = sorted(
             params_fixed, key=lambda line: line.get('pycode_fixed'))
         equations_fixed = list(
             filter(lambda line: line.get('func_name') != '', lines_fixed))
-        equations_fixed = sorted(
-            equations_fixed, key=lambda line: line.get('func_name'))
+        equations_fixed = order_equations(sorted(
+            equations_fixed, key=lambda line: line.get('func_name')))
+        param_names = [param.get('param_name') for param in params_fixed]
+        param_deps = param_dependencies(equations_fixed, params=param_names)
+        if self.backend == 'numba':
+            equations_fixed = numba_kernel_equations(equations_fixed, params=param_names)
         constants = self.constants
+        #: ! find equations that can be emitted as array-native numpy expressions
+        if self.codegen == 'array':
+            names = set(constants) | set(vars(GlobalConsts)) | \
+                {param.get('param_name') for param in params_fixed}
+            array_safe = array_safe_equations(equations_fixed, names=names)
+        else:
+            array_safe = set()
+        for j in range(len(equations_fixed)):
+            equations_fixed[j] = dict(
+                equations_fixed[j], return_value=PycodePatterns.get_pycode_return_value(
+                    equations_fixed[j].get('pycode_fixed')).strip())
+        #: ! deferred import (`desmos2python.dag` builds on this module)
+        from desmos2python.dag import EquationDAG
+        dag = EquationDAG.from_equations(equations_fixed, params_fixed)
+        equations_fixed = [broadcast_unused_args(eqn) if eqn.get('func_name') in array_safe else eqn
+                           for eqn in equations_fixed]
+        cse_result, cse_params = None, []
+        if self.cse is True:
+            cse_result = dag.cse(outputs=[
+                eqn.get('func_name') for eqn in equations_fixed
+                if eqn.get('func_name') in array_safe and len(eqn.get('func_args')) == 1])
+            free_names = {
+                str(symbol) for expr in [*[e for _, e in cse_result.replacements], *cse_result.reduced]
+                for symbol in expr.free_symbols}
+            cse_params = [name for name in param_names if name in free_names]
         #: define constants, parameters locally (for equation-level scope)
         tab4 = '    '
         tab8 = tab4 + tab4
+        funcs = [eqn.get('func_name') for eqn in equations_fixed]
         for j in range(len(equations_fixed)):
             eqn_updated = dict(equations_fixed[j])
+            func_name = eqn_updated['func_name']
             eqn_pycode = eqn_updated['pycode_fixed']
+            #: ! fast-call: closure factory, bound once per parameter update (no globals)
+            fast_pycode = fast_call_equation(
+                eqn_updated, names=set(param_names) | set(constants), funcs=funcs,
+                bound=funcs[:j], array=func_name in array_safe) if self.fastcall else None
+            if fast_pycode is not None:
+                eqn_updated['pycode_fixed'] = fast_pycode
+                if func_name in array_safe:
+                    eqn_updated['func_mode'] = 'array'
+                    eqn_updated['func_binding'] = f'{func_name} = self._bind_{func_name}()'
+                else:
+                    eqn_updated['func_mode'] = 'vectorize'
+                    eqn_updated['func_binding'] = \
+                        f'{func_name} = np.vectorize(self._bind_{func_name}(), cache=True)'
+                equations_fixed[j] = eqn_updated
+                continue
             eqn0, eqn1 = eqn_pycode.split(':\n')
-            eqn_new = f'\n{tab8}globals().update(vars(self))\n{tab8}' + \
-                (tab8).join([
-                    f'{param.get("param_name")} = self.{param.get("param_name")}\n'
-                    for param in params_fixed
-                ])
+            eqn_stmts = ['globals().update(vars(self))'] + [
+                f'{param.get("param_name")} = self.{param.get("param_name")}'
+                for param in params_fixed
+            ]
+            if func_name in array_safe:
+                #: ! array-native: broadcast over ndarray inputs, no np.vectorize
+                eqn_stmts += [f'{arg} = np.asarray({arg})' for arg in eqn_updated['func_args']]
+                eqn_updated['func_mode'] = 'array'
+                eqn_updated['func_binding'] = f'{func_name} = self._{func_name}'
+            else:
+                eqn_updated['func_mode'] = 'vectorize'
+                eqn_updated['func_binding'] = eqn_updated['func_vectorized']
+            eqn_new = ''.join([f'\n{tab8}{stmt}' for stmt in eqn_stmts]) + '\n'
             eqn_updated['pycode_fixed'] = eqn0 + ':' + eqn_new + tab4 + eqn1
             equations_fixed[j] = eqn_updated
         return {
             'equations': equations_fixed,
             'parameters': params_fixed,
+            'param_deps': param_deps,
             'constants': constants,
             'ns_name': self.ns_name,
+            'backend': self.backend,
+            'dag': dag,
+            'cse_result': cse_result,
+            'cse_params': cse_params,
         }
 
     @cached_property
@@ -353,14 +539,58 @@ class DesmosLatexParser:
         template = self.env.get_template('desmos_model_ns.jinja2')
         return template
 
+    @property
+    def dag(self):
+        """equation dependency DAG (`desmos2python.dag.EquationDAG`), e.g. `self.dag.dump(fmt='dot')`"""
+        if self.template_vars is None:
+            self.template_vars = self.calc_pycode_environment()
+        return self.template_vars['dag']
+
+    @property
+    def cse_report(self) -> Dict:
+        """operations eliminated by common subexpression elimination (see `cse`)"""
+        dag = self.dag
+        result = self.template_vars.get('cse_result') or dag.cse()
+        return {
+            'outputs': list(result.outputs),
+            'intermediates': len(result.replacements),
+            'ops_before': result.ops_before,
+            'ops_after': result.ops_after,
+            'ops_eliminated': result.ops_eliminated,
+        }
+
+    @property
+    def model_key(self):
+        """content hash of (latex_lines, ns_name, options, template, codegen and package version) for the model cache"""
+        return ModelCache.key(list(self.latex_lines), self.ns_name, self.codegen, self.backend,
+                              self.fastcall, self.cse, template_digest('desmos_model_ns.jinja2'),
+                              CODEGEN_VERSION)
+
     @cached_property
     def pycode_string(self):
         """Finalized pycode string.
 
         Formatted, ready to `exec(...)` !
         """
-        #: render template and return...
-        return self.template.render(**self.template_vars)
+        with self.stats.stage('render', cache_hits=lambda: model_cache.hits):
+            #: ! warm start: skip the whole pipeline if the model is cached
+            pycode_string = model_cache.lookup_pycode(self.model_key)
+            if pycode_string is not None:
+                return pycode_string
+            #: render template and return...
+            pycode_string = self.template.render(**self.template_vars)
+            model_cache.store_pycode(self.model_key, pycode_string)
+        return pycode_string
+
+    @cached_property
+    def pycode_compiled(self):
+        """Compiled code object for `self.pycode_string` (marshalled in the model cache)."""
+        with self.stats.stage('compile', cache_hits=lambda: model_cache.hits):
+            code = model_cache.lookup_code(self.model_key)
+            if code is None:
+                code = compile(self.pycode_string, f'<{self.ns_name}>', 'exec')
+                model_cache.store_code(self.model_key, code)
+        return code
 
     @property
     def pycode_fixed(self):
@@ -376,10 +606,34 @@ class DesmosLatexParser:
         """
         global_dict = dict(globals())
         global_dict.update(vars(GlobalConsts))
-        exec(self.pycode_string, global_dict)
+        code = self.pycode_compiled
+        with self.stats.stage('exec_pycode'):
+            exec(code, global_dict)
         self.get_desmos_ns = lambda *args: global_dict.get('get_desmos_ns')()
         return self.get_desmos_ns()
 
+    def profile_build(self, fpath: PathLike = None, use_cache: bool = False,
+                      sort: AnyStr = 'cumulative') -> pstats.Stats:
+        """Profile a full build (latex -> compiled model code) with cProfile.
+
+        - fpath : dump the profile (`pstats` format, e.g. for snakeviz) to this file
+        - use_cache : use the line/model caches (default: a cold build)
+
+        ! cached stages are reset, i.e. the model is rebuilt
+        """
+        for stage in DesmosLatexParser.line_stages + DesmosLatexParser.graph_stages + ('env', 'template'):
+            self.__dict__.pop(stage, None)
+        enabled = line_cache.enabled, model_cache.enabled
+        line_cache.enabled, model_cache.enabled = use_cache and enabled[0], use_cache and enabled[1]
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(lambda: self.pycode_compiled)
+        finally:
+            line_cache.enabled, model_cache.enabled = enabled
+        if fpath is not None:
+            profiler.dump_stats(fpath)
+        return pstats.Stats(profiler).sort_stats(sort)
+
     @property
     def DesmosModelNS(self):
         """CAUTION: refer to `self.exec_pycode(...)`.
@@ -392,8 +646,43 @@ class DesmosLatexParser:
         .joinpath('models')
 
     #: desmos2python output file suffix (executable model python code)
-    d2p_suffix = '.d2p.py'
+    d2p_suffix = d2p_utils.d2p_suffix
     
+    @property
+    def model_spec(self) -> Dict:
+        """(picklable) keyword arguments to re-build this parser's model, e.g. in a worker process"""
+        return {
+            'lines': list(self.latex_lines),
+            'ns_name': self.ns_name,
+            'codegen': self.codegen,
+            'backend': self.backend,
+            'fastcall': self.fastcall,
+            'cse': self.cse,
+        }
+
+    def sweep(self, grid: Dict = None, output_keys: List[AnyStr] = None, x=0.0,
+              calc_state=None, num: int = 11, workers: int = None, chunk_size: int = None):
+        """Evaluate `output_keys` over the cartesian product of parameter values.
+
+        - grid : Dict : {param_name: values}
+        - calc_state : calcState (Dict, JSON string or path), slider bounds -> `grid`
+            (`num` values for continuous sliders; `grid` takes precedence)
+        - workers : evaluate in chunks across a process pool (default: in-process)
+
+        returns : `desmos2python.sweep.SweepResult` : labelled ndarray, dims ('output', *params, 'x')
+        """
+        from desmos2python.sweep import sweep, sweep_parallel, slider_grid
+        ns = self.exec_pycode()()
+        grid = dict(grid or {})
+        if calc_state is not None:
+            grid = {**slider_grid(calc_state, num=num, params=ns.params), **grid}
+        if output_keys is None:
+            output_keys = list(ns.output_keys)
+        if workers is None or workers <= 1:
+            return sweep(ns, grid, output_keys=output_keys, x=x)
+        return sweep_parallel(self.model_spec, grid, output_keys=output_keys, x=x,
+                              workers=workers, chunk_size=chunk_size)
+
     def export_model(self, output_dir: PathLike = None, output_filename: PathLike = None) -> PathLike:
         """save the desmos model code (executable python code) to disk"""
         if output_dir is None:
@@ -403,16 +692,22 @@ class DesmosLatexParser:
                 .with_suffix(DesmosLatexParser.d2p_suffix) \
                 .name
         output_path = Path(output_dir).joinpath(output_filename)
-        output_path.write_text(self.pycode_string)
+        #: ! skip the write if the content hash hasn't changed
+        pycode_bytes = self.pycode_string.encode('utf-8')
+        if output_path.exists() and \
+           hashlib.sha256(output_path.read_bytes()).digest() == hashlib.sha256(pycode_bytes).digest():
+            logging.info(f'...{output_path} is up to date')
+            return output_path
+        output_path.write_bytes(pycode_bytes)
         logging.info(f'...wrote to {output_path}')
         return output_path
 
     @classmethod
-    def parse2sympy(cls, lines):
+    def parse2sympy(cls, lines, workers: int = None):
         """Get `self.sympy_lines`"""
         if isinstance(lines, DesmosLinesContainer):
             lines = lines.lines
-        parsed_lines = parse_latex_lines2sympy(lines)
+        parsed_lines = parse_latex_lines2sympy(lines, workers=workers)
         return DesmosLinesContainer(lines=parsed_lines)
 
     @staticmethod
@@ -473,70 +768,16 @@ class PatternsMixIn:
 
 class PycodePatterns(PatternsMixIn):
 
-    """Pre-compiled regex patterns for `fix_raw_pycode(...)`.
-    """
-    
-    #: easy replacement for ^ -> ** for pycode math exponents
-    expo_pattern = re.compile(r'\^')
-    expo_repl = r'**'
-
-    #: identify subscripts pattern
-    subscript_pattern = re.compile(r'_\{([a-zA-Z0-9]+)\}')
-    subscript_repl = r'_\1'
+    """Pre-compiled regex patterns for pycode lines."""
 
-    #: same as above, but with multiple groups
+    #: multi-character subscripts, e.g. x_{12} -> x_{1}
     subscript_grouped_pattern = re.compile(r'_\{([a-zA-Z0-9])([a-zA-Z0-9]+)\}')
     subscript_grouped_repl = r'_{\1}'
 
-    #: ! main template pattern
-    main_line_pattern = re.compile(
-        r'([a-zA-Z_]+)\(([a-zA-Z_,\s][a-zA-Z_0-9,\s]*)\)=', re.UNICODE)
-    main_line_repl: AnyStr = \
-        r'def _\1(self, \2):\n    return '
-
-    #: mismatched parentheses
-    fix_mismatch_pattern = re.compile(r'(\(+.*(?![)\)]))', flags=re.DOTALL)
-    fix_mismatch_repl: AnyStr = r'\1'
-    
-    #: comma spacing
-    comma_pattern = r'(\,(?!\W))'
-    comma_repl = r'\1 '
-    
-    @classmethod
-    def find_args(cls, string):
-        """Find and return a list of any comma-separated arguments.
-        
-        Examples
-        --------
-        # ...e.g. from a pycode/math function:
-        > cls.find_args('def fun(x,y,z):'
-        ['x', 'y', 'z']
-        """
-        found = cls.main_line_pattern.findall(string)
-        if len(found) == 0:
-            return []
-        if len(found[0]) > 1:
-            return found[0][1].replace(' ', '').split(',')
-        return []
-            
     @classmethod
     def get_pycode_return_value(cls, string):
         """Get the return values of a pycode method"""
         return string.partition('return')[2]
-        
-    @classmethod
-    def fix_pycode_instance_attrs(cls, string):
-        """For a pycode method string, prefix any pycode instance attributes with `self.`.
-        
-        ...instance attributes are distinguished from local variables by the method signature.
-        """
-        local_vars = cls.find_args(string)
-        def _repl_inst_attrs(m, local_vars=local_vars):
-            filters = all([m.group(0) not in local_vars, ])
-            return f'self.{m.group(0)}' if filters else m.group(0)
-        prefix, sepstr, retstr = string.partition('return')
-        new_retstr = re.sub(string=retstr, pattern=r'(?:(?!np\.[a-zA-Z]+))(?:\()([a-zA-Z]+)', repl=_repl_inst_attrs)
-        return prefix + sepstr + new_retstr
 
 
 def fix_raw_pycode(line: Union[AnyStr, List[AnyStr]], retfull: bool = True) -> Dict:
@@ -565,24 +806,27 @@ def fix_raw_pycode(line: Union[AnyStr, List[AnyStr]], retfull: bool = True) -> D
             lambda l: l is not None,
             [fix_raw_pycode(ll, retfull=retfull) for ll in lines]))
         return outlines
-    #: Pre-conversion formatting...
+    #: ! check the on-disk line cache first
+    entry = line_cache.lookup('fix_raw_pycode', line, retfull, CODEGEN_VERSION)
+    if entry is not None:
+        return entry.value
+    fixed = fix_raw_pycode_line(line, retfull=retfull)
+    line_cache.store('fix_raw_pycode', line, fixed, retfull, CODEGEN_VERSION)
+    return fixed
+
+
+def fix_raw_pycode_line(line: AnyStr, retfull: bool = True) -> Dict:
+    """Fix a single line of sympy.pycode output (uncached, refer to `fix_raw_pycode(...)`)."""
     #: keep original line (! in preparation for `retfull`)
     line0 = str(line)
     #: ! Handle double-equals, leading and following parentheses...
-    line = str(line).replace(') == ', ') = ')
-    line = line.lstrip('(')[:-1]  # remove first and last parentheses
-    line = line.replace('cdot ', 'cdot')  # remove extra spaces for cdot
-    #: convert to plain python math
-    line = pdoc_convert2plain(line, src_format='plain')
-    #: formatting regex...
-    for fmt_key in ['expo', 'subscript_grouped', 'subscript', 'comma', ]:
-        line = PycodePatterns.subn(line, key=fmt_key)[0]
-    #: ! convert to actual python (numpy) syntax -- ready for `DesmosLatexParser.DesmosModelNS`
-    pycode_fixed = re.sub(pattern=PycodePatterns.main_line_pattern,
-                          repl=PycodePatterns.main_line_repl,
-                          string=line)
-    #: ! replace builtin math -> numpy
-    pycode_fixed = pycode_fixed.strip().replace('math.', 'np.')
+    line = str(line)
+    if line.startswith('(') and ' == ' in line:
+        #: ! sympy.pycode output, e.g. '(E(x) == ...)'
+        line = line.replace(') == ', ') = ')
+        line = line.lstrip('(')[:-1]  # remove first and last parentheses
+    #: ! convert to actual python (numpy) syntax, single pass (refer to `plain2pycode`)
+    pycode_fixed, signature = plain2pycode(line)
     #: final replacements...
     param_name, param_value, func_name, func_vectorized = '', '', '', ''
     func_sig, func_args = '', ''
@@ -590,13 +834,16 @@ def fix_raw_pycode(line: Union[AnyStr, List[AnyStr]], retfull: bool = True) -> D
     if len(pycode_fixed) < 5 or 'def ' != pycode_fixed[:4]:
         #: for free parameters (in Desmos, sliders)
         pycode_fixed = pycode_fixed.replace('==', '=')
-        param_name = pycode_fixed.split(' ')[0]  # name of parameter
+        #: ! name/value without instance attributes (only differ if the line contains `return`)
+        pycode_param = pycode_fixed if 'return' not in pycode_fixed else \
+            plain2pycode(line, instance_attrs=False).pycode.replace('==', '=')
+        param_name = pycode_param.split('=')[0].strip()  # name of parameter
         try:
-            param_value = pycode_fixed.split(
+            param_value = pycode_param.split(
                 '=')[1].strip()  # current value
         except IndexError:
             #: ! handle case in which this is neither a parameter, nor an equation
-            logging.debug(traceback.format_exc())
+            logging.debug(f"neither a parameter, nor an equation: '{line}'", exc_info=1)
             return None
         try:
             param_value = float(param_value)
@@ -608,25 +855,13 @@ def fix_raw_pycode(line: Union[AnyStr, List[AnyStr]], retfull: bool = True) -> D
                 .split(', ')
     elif 'def ' == pycode_fixed[:4] and retfull is True:
         #: for functions (formulas/equations)
-        func_sig = re.match(PycodePatterns.main_line_pattern, line) \
-                     .group() \
-                     .split(' ')[0]
-        func_name = func_sig \
-            .split('(')[0]
-        func_args = func_sig \
-            .split('(')[1] \
-            .split(')')[0] \
-            .split(',')
+        #: ! arguments from the parsed signature, e.g. ('L', 'x, y') -> ['x', 'y']
+        func_name = signature[0]
+        func_args = [arg.strip() for arg in signature[1].split(',') if arg.strip() != '']
+        func_sig = f'{func_name}({",".join(func_args)})='
         #: ! also include numpy vectorization for functions
         func_vectorized = \
             f'{func_name} = np.vectorize(self._{func_name}, cache=True, excluded="self")'
-    #: ! final fix of any mismatched parentheses
-    pycode_fixed = \
-        re.subn(pattern=PycodePatterns.fix_mismatch_pattern,
-                repl=PycodePatterns.fix_mismatch_repl,
-                string=pycode_fixed)[0]
-    #: ! fix any instance attributes contained in the return line: (self....)
-    pycode_fixed = PycodePatterns.fix_pycode_instance_attrs(pycode_fixed)
     if retfull is False:
         return pycode_fixed
     return {
@@ -641,6 +876,348 @@ def fix_raw_pycode(line: Union[AnyStr, List[AnyStr]], retfull: bool = True) -> D
     }
 
 
+#: numpy functions that broadcast over ndarray inputs
+NUMPY_UFUNCS = frozenset([
+    'exp', 'exp2', 'expm1', 'log', 'log2', 'log10', 'log1p', 'sqrt', 'cbrt', 'power',
+    'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan', 'arctan2', 'hypot',
+    'sinh', 'cosh', 'tanh', 'arcsinh', 'arccosh', 'arctanh',
+    'abs', 'absolute', 'sign', 'floor', 'ceil', 'mod', 'maximum', 'minimum',
+])
+
+#: expression nodes that broadcast over ndarray operands
+ARRAY_SAFE_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Load,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv,
+    ast.USub, ast.UAdd,
+)
+
+
+class ExpressionInfo(NamedTuple):
+
+    """(cached) static analysis of a generated python expression, see `expression_info`"""
+
+    #: names used (`self.name` counts as `name`)
+    names: frozenset
+    #: bare names (incl. `np`, `self`)
+    bare_names: frozenset
+    #: instance attributes (`self.name`)
+    self_attrs: frozenset
+    #: called (bare) names
+    calls: frozenset
+    #: only array-safe operations (`ARRAY_SAFE_NODES`, numeric constants, numpy ufuncs)
+    array_ops: bool
+
+
+@lru_cache(maxsize=8192)
+def expression_info(expr: AnyStr) -> Optional[ExpressionInfo]:
+    """Analyse a python expression (None if it can't be parsed).
+
+    ...cached, as the same equation bodies are analysed by several codegen passes (and by
+    every `DesmosLatexParser.update_lines`).
+    """
+    try:
+        tree = ast.parse(expr, mode='eval')
+    except SyntaxError:
+        return None
+    bare_names, self_attrs, calls, array_ops = set(), set(), set(), True
+    for node in ast.walk(tree):
+        if isinstance(node, ARRAY_SAFE_NODES):
+            continue
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                array_ops = False
+        elif isinstance(node, ast.Name):
+            bare_names.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            if isinstance(node.value, ast.Name) and node.value.id == 'self':
+                self_attrs.add(node.attr)
+            elif not (isinstance(node.value, ast.Name) and node.value.id == 'np'
+                      and node.attr in NUMPY_UFUNCS):
+                array_ops = False
+        elif isinstance(node, ast.Call):
+            if len(node.keywords) > 0 or not isinstance(node.func, (ast.Name, ast.Attribute)):
+                array_ops = False
+            if isinstance(node.func, ast.Name):
+                calls.add(node.func.id)
+        else:
+            array_ops = False
+    return ExpressionInfo(
+        names=frozenset(bare_names | self_attrs), bare_names=frozenset(bare_names),
+        self_attrs=frozenset(self_attrs), calls=frozenset(calls), array_ops=array_ops)
+
+
+def is_array_safe(expr: AnyStr, names: Container, funcs: Container) -> bool:
+    """Check whether a python expression broadcasts over ndarray inputs.
+
+    Only arithmetic, numeric constants, the given `names`, numpy ufuncs and calls to the
+    given (array-safe) `funcs` are allowed.
+
+    >>> is_array_safe('1/(1+np.exp(-2*x))', names={'x'}, funcs=set())
+    True
+    >>> is_array_safe('E(self.a*x)', names={'x', 'a'}, funcs={'E'})
+    True
+    >>> is_array_safe('1 if x > 0 else 0', names={'x'}, funcs=set())
+    False
+    """
+    info = expression_info(str(expr).strip())
+    if info is None or info.array_ops is False:
+        return False
+    return all(name in names or name in funcs or name in ('np', 'self') for name in info.bare_names) \
+        and all(name in names or name in funcs for name in info.self_attrs) \
+        and all(name in funcs for name in info.calls)
+
+
+def array_safe_equations(equations: List[Dict], names: Container) -> set:
+    """Find the equations (`fix_raw_pycode(...)` dicts) that are array-safe.
+
+    An equation is array-safe if its body only uses array-safe operations, and only calls
+    other array-safe equations.
+
+    ! bodies that don't use all of their arguments are broadcast, see `broadcast_unused_args`
+
+    returns : set : names of the array-safe equations
+    """
+    safe = {eqn.get('func_name') for eqn in equations}
+    while True:
+        unsafe = {
+            eqn.get('func_name') for eqn in equations
+            if eqn.get('func_name') in safe and not is_array_safe(
+                PycodePatterns.get_pycode_return_value(eqn.get('pycode_fixed')),
+                names=set(names) | set(eqn.get('func_args')), funcs=safe)
+        }
+        if len(unsafe) == 0:
+            return safe
+        safe -= unsafe
+
+
+def broadcast_unused_args(equation: Dict) -> Dict:
+    """Broadcast an array-native equation (`fix_raw_pycode(...)` dict) over its unused arguments.
+
+    ...a body without its arguments returns a scalar, not an array shaped like the arguments:
+
+    >>> eqn = broadcast_unused_args({'func_args': ['x'], 'pycode_fixed': 'def _K(self, x):\\n    return 2'})
+    >>> print(eqn['pycode_fixed'])
+    def _K(self, x):
+        return (2) + np.zeros_like(x)
+    """
+    used = equation_names(equation, args=True)
+    unused = [arg for arg in equation.get('func_args') if used is not None and arg not in used]
+    if len(unused) == 0:
+        return equation
+    head, sep, body = equation.get('pycode_fixed').partition('return')
+    body = f'({body.strip()})' + ''.join(f' + np.zeros_like({arg})' for arg in unused)
+    return dict(equation, pycode_fixed=f'{head}{sep} {body}')
+
+
+def equation_names(equation: Dict, args: bool = False) -> Optional[set]:
+    """Names (other than the arguments) used by an equation (`fix_raw_pycode(...)` dict).
+
+    `self.name` counts as `name`. Returns None if the equation body can't be parsed.
+
+    - args : include the (used) arguments
+    """
+    info = expression_info(
+        PycodePatterns.get_pycode_return_value(equation.get('pycode_fixed')).strip())
+    if info is None:
+        return None
+    if args is True:
+        return set(info.names)
+    return set(info.names) - set(equation.get('func_args'))
+
+
+def order_equations(equations: List[Dict]) -> List[Dict]:
+    """Order equations (`fix_raw_pycode(...)` dicts) by dependencies: callees first.
+
+    Ties (and cycles) keep the input order.
+    """
+    by_name = {eqn.get('func_name'): eqn for eqn in equations}
+    ordered, visited = [], set()
+    def _visit(name):
+        if name in visited or name not in by_name:
+            return
+        visited.add(name)
+        for dep in sorted((equation_names(by_name[name]) or set()) & set(by_name)):
+            _visit(dep)
+        ordered.append(by_name[name])
+    for eqn in equations:
+        _visit(eqn.get('func_name'))
+    return ordered
+
+
+def param_dependencies(equations: List[Dict], params: List[AnyStr]) -> Dict[AnyStr, List[AnyStr]]:
+    """Map each parameter to the equations (`fix_raw_pycode(...)` dicts) that depend on it.
+
+    Dependencies are transitive (through calls to other equations). Equations whose body
+    can't be parsed are assumed to depend on every parameter.
+
+    returns : Dict : {param_name: [func_name, ...]}
+    """
+    funcs = {eqn.get('func_name') for eqn in equations}
+    direct, calls = {}, {}
+    for eqn in equations:
+        func_name = eqn.get('func_name')
+        names = equation_names(eqn)
+        if names is None:
+            direct[func_name], calls[func_name] = set(params), set()
+            continue
+        direct[func_name], calls[func_name] = names & set(params), names & funcs
+    #: ! propagate through calls (fixed point)
+    deps = {name: set(direct[name]) for name in direct}
+    changed = True
+    while changed:
+        changed = False
+        for name in deps:
+            for callee in calls[name]:
+                if not deps[callee] <= deps[name]:
+                    deps[name] |= deps[callee]
+                    changed = True
+    return {param: sorted(name for name in deps if param in deps[name]) for param in params}
+
+
+class SelfAttrTransformer(ast.NodeTransformer):
+
+    """Rewrite `self.name` -> `name` in an equation body, recording the names used."""
+
+    def __init__(self):
+        self.names = set()
+
+    def visit_Name(self, node):
+        self.names.add(node.id)
+        return node
+
+    def visit_Attribute(self, node):
+        node = self.generic_visit(node)
+        if isinstance(node.value, ast.Name) and node.value.id == 'self':
+            self.names.add(node.attr)
+            return ast.copy_location(ast.Name(id=node.attr, ctx=node.ctx), node)
+        return node
+
+
+class FastCallTransformer(SelfAttrTransformer):
+
+    """Rewrite an equation body for a fast-call closure (see `fast_call_equation`).
+
+    - `self.name` -> `name` (parameters, constants, equations are bound as closure variables)
+    - calls to equations that aren't bound yet (cycles) `G(...)` -> `self.G(...)`
+    """
+
+    def __init__(self, funcs: Container, bound: Container):
+        super().__init__()
+        self.funcs = funcs
+        self.bound = bound
+
+    def visit_Call(self, node):
+        node = self.generic_visit(node)
+        if isinstance(node.func, ast.Name) and node.func.id in self.funcs \
+                and node.func.id not in self.bound:
+            node.func = ast.Attribute(
+                value=ast.Name(id='self', ctx=ast.Load()), attr=node.func.id, ctx=ast.Load())
+        return node
+
+
+class NumbaKernelTransformer(SelfAttrTransformer):
+
+    """Rewrite an equation body for a numba kernel (parameters passed as arguments).
+
+    - `self.name` -> `name`
+    - calls to other equations `E(...)` -> `_E_kernel(..., *params)`
+    """
+
+    def __init__(self, funcs: Container, params: List[AnyStr]):
+        super().__init__()
+        self.funcs = funcs
+        self.params = params
+        self.deps = set()
+
+    def visit_Call(self, node):
+        node = self.generic_visit(node)
+        if isinstance(node.func, ast.Name) and node.func.id in self.funcs:
+            self.deps.add(node.func.id)
+            node.func = ast.Name(id=f'_{node.func.id}_kernel', ctx=ast.Load())
+            node.args = node.args + [ast.Name(id=p, ctx=ast.Load()) for p in self.params]
+        return node
+
+
+def numba_kernel_equations(equations: List[Dict], params: List[AnyStr]) -> List[Dict]:
+    """Add numba kernel info to the equations (`fix_raw_pycode(...)` dicts).
+
+    Adds 'kernel_args', 'kernel_body', 'kernel_call_args' (empty for equations that can't be
+    rewritten as kernels, these use the plain numpy code). Equations are returned in dependency
+    order (callees first).
+
+    ! each kernel is compiled here: an invalid kernel only falls back for its own function (and
+    its callers), it doesn't break the model module
+    """
+    funcs = {eqn.get('func_name') for eqn in equations}
+    kernels, kernel_names = [], set()
+    for eqn in order_equations(equations):
+        eqn = dict(eqn, kernel_args=[], kernel_body='', kernel_call_args='')
+        func_name, func_args = eqn.get('func_name'), list(eqn.get('func_args'))
+        transformer = NumbaKernelTransformer(funcs=funcs, params=params)
+        kernel_args = func_args + list(params)
+        try:
+            body = ast.parse(
+                PycodePatterns.get_pycode_return_value(eqn.get('pycode_fixed')).strip(),
+                mode='eval')
+            body = ast.unparse(transformer.visit(body))
+            compile(f'def _{func_name}_kernel({", ".join(kernel_args)}):\n    return {body}',
+                    f'<{func_name}_kernel>', 'exec')
+        except SyntaxError:
+            logging.debug(f"can't rewrite '{func_name}' as a numba kernel.", exc_info=1)
+        else:
+            #: ! callers of functions without a kernel fall back as well
+            if len(set(func_args) & set(params)) == 0 and transformer.deps <= kernel_names:
+                eqn['kernel_args'] = kernel_args
+                eqn['kernel_body'] = body
+                eqn['kernel_call_args'] = ', '.join(func_args + [f'self.{p}' for p in params])
+                kernel_names.add(func_name)
+        kernels.append(eqn)
+    return kernels
+
+
+def fast_call_equation(equation: Dict, names: Container, funcs: Container,
+                       bound: Container, array: bool = False) -> Optional[AnyStr]:
+    """Rewrite an equation (`fix_raw_pycode(...)` dict) as a fast-call closure factory.
+
+    Parameters and constants (`names`) and already bound equations (`bound`) are read once,
+    when the equation is bound, instead of on every call:
+
+        def _bind_F(self):
+            alpha_m = self.alpha_m
+            E = self.E
+            def F(x):
+                return E(alpha_m*(1+alpha_m)*x)
+            return F
+
+    returns : str : the factory method definition (None if the body can't be rewritten)
+    """
+    func_name, func_args = equation.get('func_name'), list(equation.get('func_args'))
+    expr = PycodePatterns.get_pycode_return_value(equation.get('pycode_fixed')).strip()
+    info = expression_info(expr)
+    if info is None:
+        logging.debug(f"can't rewrite '{func_name}' as a fast-call closure.")
+        return None
+    #: ! calls to equations that aren't bound yet (cycles) go through `self`
+    body = fast_call_body(expr, unbound=frozenset(
+        name for name in info.calls if name in funcs and name not in bound))
+    used = set(info.names) - set(func_args)
+    tab4 = '    '
+    stmts = [f'{name} = self.{name}' for name in sorted(used & set(names))]
+    stmts += [f'{name} = self.{name}' for name in sorted(used & set(funcs) & set(bound))]
+    stmts += [f'def {func_name}({", ".join(func_args)}):']
+    if array is True:
+        stmts += [f'{tab4}{arg} = np.asarray({arg})' for arg in func_args]
+    stmts += [f'{tab4}return {body}', f'return {func_name}']
+    return f'def _bind_{func_name}(self):' + ''.join(f'\n{tab4 * 2}{stmt}' for stmt in stmts)
+
+
+@lru_cache(maxsize=8192)
+def fast_call_body(expr: AnyStr, unbound: frozenset) -> AnyStr:
+    """equation body for a fast-call closure (`self.a` -> `a`, unbound calls `G(...)` -> `self.G(...)`)"""
+    transformer = FastCallTransformer(funcs=unbound, bound=())
+    return ast.unparse(transformer.visit(ast.parse(expr, mode='eval')))
+
+
 class SympyPatterns(PatternsMixIn):
     """Regex patterns for latex_lines -> sympy_lines.
     """
@@ -670,9 +1247,44 @@ class SympyPatterns(PatternsMixIn):
             r'\end{{\itemize}}'
 
 
-def parse_latex_lines2sympy(latex_list, verbosity=logging.ERROR):
+#: process pool shared by all parsers (see `get_sympy_pool`)
+_sympy_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_sympy_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool for `parse_latex_lines2sympy(..., workers=...)`.
+
+    The pool is shared across parser instances (worker startup, i.e. importing sympy and
+    the latex parser, is only paid once), and re-created if it is too small or broken.
+    """
+    global _sympy_pool
+    if _sympy_pool is not None and \
+       (_sympy_pool._max_workers < workers or getattr(_sympy_pool, '_broken', False)):
+        _sympy_pool.shutdown(wait=False, cancel_futures=True)
+        _sympy_pool = None
+    if _sympy_pool is None:
+        _sympy_pool = ProcessPoolExecutor(max_workers=workers)
+        logger.debug(f'...started sympy process pool ({workers} workers).')
+    return _sympy_pool
+
+
+def shutdown_sympy_pool():
+    """shut down the shared sympy process pool (if any)"""
+    global _sympy_pool
+    if _sympy_pool is not None:
+        _sympy_pool.shutdown(wait=True, cancel_futures=True)
+        _sympy_pool = None
+
+
+atexit.register(shutdown_sympy_pool)
+
+
+def parse_latex_lines2sympy(latex_list, verbosity=logging.ERROR, workers: int = None):
     """Parse the given list of latex strings to sympy.
 
+    - workers : parse uncached lines across a (shared) process pool, results are
+        returned in input order (default: in-process)
+
     >>> parse_latex_lines2sympy(read_latex_lines(get_filepath(pattern='ex')))
     [Eq(E(x), 1/(1 + exp(-2*x))), Eq(alpha_{m}, 1), Eq(F(x), E(x*(alpha_{m}*(alpha_{m} + 1))))]
 
@@ -680,25 +1292,38 @@ def parse_latex_lines2sympy(latex_list, verbosity=logging.ERROR):
     if isinstance(latex_list, str):
         latex_list = [latex_list, ]
     out_list = []
+    latex_list = [PycodePatterns.subn(line, key='subscript_grouped')[0]
+                  for line in latex_list]
+    #: ! check the on-disk line cache (includes cached failures)
+    entries = [lookup_sympy_line(line) for line in latex_list]
+    #: ! convert uncached lines -> plain up front (single batched pandoc call)
+    uncached = [line for line, entry in zip(latex_list, entries) if entry is None]
+    plain_lines = pdoc_convert2plain_batch(uncached)
+    if workers is not None and workers > 1 and len(uncached) > 1:
+        #: ! parse in the pool, store (in order) from this process
+        parsed = parse_plain_lines2sympy_pool(plain_lines, workers)
+        if parsed is not None:
+            parsed_iter = iter(parsed)
+            entries = [next(parsed_iter) if entry is None else entry for entry in entries]
+            for line, entry in zip(uncached, parsed):
+                store_sympy_line(line, entry)
+    plain_iter = iter(plain_lines)
     latex_queue = Queue(maxsize=len(latex_list))
-    for latex_line in latex_list:
-        latex_queue.put(latex_line)
+    for latex_line, entry in zip(latex_list, entries):
+        plain_line = next(plain_iter) if entry is None else None
+        latex_queue.put((latex_line, plain_line, entry))
     while True:
-        line = latex_queue.get_nowait()
-        matches = PycodePatterns.subn(line, key='subscript_grouped')
-        line = matches[0]
+        line, plain_line, entry = latex_queue.get_nowait()
         try:
-            with warnings.catch_warnings() as wctx:
-                warnings.filterwarnings('ignore')
-                out = parse_latex(pdoc_convert2plain(line))
-        except Exception:
-            logging.debug('failed to convert to latex via sympy (parse_latex)', exc_info=1)
-            #: ! replace desmos-style lists with latex lists
-            line_repl = SympyPatterns.subn(line, key='desmos_list')
-            line = line_repl[0]
-            out_list.append(line)
-        else:
-            out_list.append(out)
+            if entry is None:
+                entry = parse_latex_line2sympy(line, plain_line)
+            if entry.error is not None:
+                #: ! replace desmos-style lists with latex lists
+                line_repl = SympyPatterns.subn(line, key='desmos_list')
+                line = line_repl[0]
+                out_list.append(line)
+            else:
+                out_list.append(entry.value)
         finally:
             latex_queue.task_done()
             if latex_queue.empty():
@@ -708,6 +1333,84 @@ def parse_latex_lines2sympy(latex_list, verbosity=logging.ERROR):
     return out_list
 
 
+def parse_plain_lines2sympy_pool(plain_lines: List[AnyStr], workers: int) -> Optional[List[CacheEntry]]:
+    """`parse_plain_line2sympy` across the shared process pool, in input order.
+
+    returns None if the pool fails (the caller falls back to parsing in-process).
+    """
+    try:
+        pool = get_sympy_pool(workers)
+        chunksize = max(1, len(plain_lines) // (4 * workers))
+        results = list(pool.map(_parse_plain_line2sympy_srepr, plain_lines, chunksize=chunksize))
+        return [CacheEntry(value=None if srepr is None else sympy_from_srepr(srepr), error=error)
+                for srepr, error in results]
+    except (BrokenProcessPool, OSError):
+        logging.warning('sympy process pool failed, parsing in-process.', exc_info=1)
+        shutdown_sympy_pool()
+        return None
+
+
+def parse_plain_line2sympy(plain_line) -> CacheEntry:
+    """Parse a single 'plain' line to sympy, the failure reason is kept (not raised)."""
+    try:
+        with warnings.catch_warnings() as wctx:
+            warnings.filterwarnings('ignore')
+            entry = CacheEntry(value=parse_latex(plain_line))
+    except Exception as exc:
+        logging.debug('failed to convert to latex via sympy (parse_latex)', exc_info=1)
+        entry = CacheEntry(error=f'{exc.__class__.__name__}: {exc}')
+    return entry
+
+
+def _parse_plain_line2sympy_srepr(plain_line):
+    """(pool worker) `parse_plain_line2sympy` -> (srepr, error)
+
+    ...`sympy.srepr` instead of pickle: undefined functions (e.g. `F(x)`) aren't picklable.
+    """
+    entry = parse_plain_line2sympy(plain_line)
+    return None if entry.error is not None else sp.srepr(entry.value), entry.error
+
+
+def sympy_from_srepr(srepr: AnyStr):
+    """rebuild a sympy expression from its `sympy.srepr`
+
+    ! not re-evaluated, i.e. terms keep the parsed order
+    """
+    with sp.evaluate(False):
+        return eval(srepr, vars(sp))
+
+
+def lookup_sympy_line(line) -> Optional[CacheEntry]:
+    """cached `parse_latex_line2sympy` entry for a latex line (None if not cached)"""
+    entry = line_cache.lookup('parse_latex_lines2sympy', line, 'srepr')
+    if entry is None or entry.error is not None:
+        return entry
+    try:
+        return CacheEntry(value=sympy_from_srepr(entry.value))
+    except Exception:
+        logging.debug(f"can't rebuild the cached sympy expression of '{line}'.", exc_info=1)
+        return None
+
+
+def store_sympy_line(line, entry: CacheEntry):
+    """cache a `parse_latex_line2sympy` entry (or its failure reason) for a latex line
+
+    ...stored as `sympy.srepr`: undefined functions (e.g. `F(x)`) aren't picklable.
+    """
+    value = sp.srepr(entry.value) if entry.error is None else None
+    line_cache.store('parse_latex_lines2sympy', line, value, 'srepr', error=entry.error)
+
+
+def parse_latex_line2sympy(line, plain_line) -> CacheEntry:
+    """Parse a single latex line (given its plain conversion) to sympy.
+
+    The result, or the failure reason, is stored in the on-disk line cache.
+    """
+    entry = parse_plain_line2sympy(plain_line)
+    store_sympy_line(line, entry)
+    return entry
+
+
 def read_latex_lines(fpth, split=True):
     """open and read JSON file containing a list of latex strings.
     """
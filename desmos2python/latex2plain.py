@@ -0,0 +1,199 @@
+"""desmos2python in-process latex -> plain converter.
+
+Covers the subset of LaTeX emitted by Desmos, producing the same plain output
+as the pandoc path of `desmos2python.pdoc.convert2plain`. Lines containing
+anything outside of the subset are left for pandoc.
+"""
+from functools import cache
+from typing import Dict, Optional
+
+__all__ = [
+    'latex2plain',
+    'DesmosLatexReader',
+]
+
+
+#: characters passed through unchanged
+PASSTHROUGH_CHARS = frozenset(
+    'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,+=*/()[]<>')
+
+#: characters with a different plain representation (same as pandoc)
+REPLACED_CHARS = {
+    '-': '−',
+}
+
+#: simple (argument-free) latex commands
+SIMPLE_COMMANDS = {
+    'cdot': '⋅',
+    'exp': 'exp',
+    'ln': 'ln',
+    'log': 'log',
+    'sin': 'sin',
+    'cos': 'cos',
+    'tan': 'tan',
+    #: ! spacing commands (whitespace is dropped by `convert2plain` anyway)
+    ' ': '',
+    ',': '',
+}
+
+#: `\left` / `\right` delimiters
+LEFT_DELIMS = {'(': '(', '[': '['}
+RIGHT_DELIMS = {')': ')', ']': ']'}
+
+#: pandoc renders all-digit subscripts as unicode subscript digits
+SUBSCRIPT_DIGITS = str.maketrans('0123456789', '₀₁₂₃₄₅₆₇₈₉')
+
+
+@cache
+def greek_commands() -> Dict[str, str]:
+    """map of latex greek command names -> unicode characters, e.g. {'alpha': 'α'}"""
+    from desmos2python.resources.greek_chars import greek
+    commands = {name: char for char, name in greek.d.items()}
+    #: ! the alphabet resource spells lambda as 'lamda'
+    commands.update({'lambda': commands['lamda'], 'Lambda': commands['Lamda']})
+    #: ! variant forms normalize (NFKC) to the plain letters
+    commands.update({var: commands[var[3:]] for var in ('varepsilon', 'vartheta', 'varphi')})
+    return commands
+
+
+class UnsupportedLatex(Exception):
+
+    """raised internally when a construct falls outside the supported subset"""
+
+
+class DesmosLatexReader:
+
+    """Single-pass reader for the Desmos LaTeX subset.
+
+    Supported: `\\left(`/`\\right)`, `\\frac{}{}`, `\\cdot`, subscripts,
+    greek names, `\\exp` (and other simple functions), `\\operatorname{}`.
+    """
+
+    def __init__(self, estr: str):
+        self.estr = estr
+        self.pos = 0
+
+    def peek(self) -> str:
+        return self.estr[self.pos] if self.pos < len(self.estr) else ''
+
+    def next(self) -> str:
+        char = self.peek()
+        if char == '':
+            raise UnsupportedLatex('unexpected end of input')
+        self.pos += 1
+        return char
+
+    def skip_ws(self):
+        while self.peek().isspace():
+            self.pos += 1
+
+    def read_command(self) -> str:
+        """read a command name following a backslash"""
+        char = self.next()
+        if not char.isalpha():
+            return char
+        start = self.pos - 1
+        while self.peek().isalpha():
+            self.pos += 1
+        return self.estr[start:self.pos]
+
+    def read_group(self) -> str:
+        """read a braced `{...}` group, return the converted content"""
+        self.skip_ws()
+        if self.next() != '{':
+            raise UnsupportedLatex('expected group')
+        out = self.read(stop='}')
+        self.next()  # ! consume closing brace
+        return out
+
+    def read_raw_group(self) -> str:
+        """read a braced `{...}` group, return the unconverted content"""
+        self.skip_ws()
+        if self.next() != '{':
+            raise UnsupportedLatex('expected group')
+        end = self.estr.find('}', self.pos)
+        if end < 0:
+            raise UnsupportedLatex('unbalanced group')
+        raw, self.pos = self.estr[self.pos:end], end + 1
+        return raw
+
+    def read_subscript(self) -> str:
+        self.skip_ws()
+        if self.peek() == '{':
+            sub = self.read_group()
+        elif self.peek() == '\\':
+            self.next()
+            sub = self.convert_command(self.read_command())
+        else:
+            sub = self.next()
+        if sub == '' or not all(c.isalnum() for c in sub):
+            raise UnsupportedLatex(f'unsupported subscript: {sub}')
+        if sub.isdigit():
+            return sub.translate(SUBSCRIPT_DIGITS)
+        return f'_({sub})'
+
+    def convert_command(self, name: str) -> str:
+        if name in SIMPLE_COMMANDS:
+            return SIMPLE_COMMANDS[name]
+        if name in greek_commands():
+            return greek_commands()[name]
+        if name in ('left', 'right'):
+            self.skip_ws()
+            delims = LEFT_DELIMS if name == 'left' else RIGHT_DELIMS
+            delim = self.next()
+            if delim not in delims:
+                raise UnsupportedLatex(f'unsupported delimiter: \\{name}{delim}')
+            return delims[delim]
+        if name == 'frac':
+            numer, denom = self.read_group(), self.read_group()
+            return f'(({numer})/({denom}))'
+        if name == 'operatorname':
+            opname = self.read_raw_group()
+            if not opname.isalpha():
+                raise UnsupportedLatex(f'unsupported operator name: {opname}')
+            return opname
+        raise UnsupportedLatex(f'unsupported command: \\{name}')
+
+    def read(self, stop: str = '') -> str:
+        """convert up to (not including) `stop`, or the end of input"""
+        out = []
+        while self.peek() != stop:
+            char = self.next()
+            if char.isspace():
+                continue
+            elif char in PASSTHROUGH_CHARS:
+                out.append(char)
+            elif char in REPLACED_CHARS:
+                out.append(REPLACED_CHARS[char])
+            elif char == '_':
+                out.append(self.read_subscript())
+            elif char == '\\':
+                out.append(self.convert_command(self.read_command()))
+            else:
+                raise UnsupportedLatex(f'unsupported character: {char}')
+        return ''.join(out)
+
+
+def latex2plain(estr: str) -> Optional[str]:
+    """Convert a Desmos latex string to plain format (without pandoc).
+
+    Returns None if the string contains constructs outside of the supported subset.
+
+    Examples:
+    ---------
+    >>> latex2plain(r'F\\left(x\\right)=E\\left(\\alpha_{m}\\cdot\\left(1+\\alpha_{m}\\right)\\cdot x \\right)')
+    'F(x)=E(α_(m)⋅(1+α_(m))⋅x)'
+    >>> latex2plain(r'E\\left(x\\right)=\\frac{1}{1+\\exp\\left(-2x\\right)}')
+    'E(x)=((1)/(1+exp(−2x)))'
+    >>> latex2plain(r'x^{2}') is None
+    True
+    """
+    try:
+        return DesmosLatexReader(estr).read()
+    except UnsupportedLatex:
+        return None
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -10,20 +10,60 @@ if module_root not in sys.path:
     sys.path.insert(0, module_root)
 from desmos2python.utils import D2P_Resources
 from desmos2python import greek
+from desmos2python.latex2plain import latex2plain
+from desmos2python.cache import line_cache
 import importlib
 import logging
 import unicodedata
-from typing import Tuple, Literal
+from collections import Counter
+from typing import Tuple, Literal, List, Sequence
 
 logger = logging.getLogger(__name__)
 
+#: per-line counts of the conversion path taken by `convert2plain`: 'cache', 'native' or 'pandoc'
+convert2plain_paths = Counter()
+
+#: separator paragraph delimiting the strings of a batched pandoc conversion
+BATCH_SEPARATOR = 'D2PBATCHSEPARATOR'
+batch_separator_pattern = re.compile(
+    rf'^(?:<p>)?{BATCH_SEPARATOR}(?:</p>)?$\n?', flags=re.MULTILINE)
+
+
+def convert_text_batch(sources: Sequence[str], to='plain', format='latex',
+                       extra_args=()) -> List[str]:
+    """Convert a list of strings with a single pandoc call.
+
+    The strings are joined into one document (delimited by `BATCH_SEPARATOR` paragraphs),
+    converted, then split back in order. Falls back to one pandoc call per string if the
+    output can't be split back into the same number of strings.
+    """
+    sources = list(sources)
+    if len(sources) == 0:
+        return []
+    document = f'\n\n{BATCH_SEPARATOR}\n\n'.join(sources)
+    out = pdoc.convert_text(source=document, to=to, format=format,
+                            extra_args=list(extra_args))
+    parts = batch_separator_pattern.split(out)
+    if len(parts) != len(sources):
+        logging.debug('failed to split batched pandoc output, converting line-by-line.')
+        return [pdoc.convert_text(source=source, to=to, format=format,
+                                  extra_args=list(extra_args))
+                for source in sources]
+    return [part.strip('\n') + '\n' for part in parts]
+
 
 def convert2html(s, opts=''):
-    """Convert generic input (e.g., latex) to pandoc HTML format.
+    """Convert generic input (e.g., markdown) to pandoc HTML format.
 
-    Wraps around the pandoc CLI.
+    `opts` : extra pandoc command line options.
     """
-    return os.popen(f"echo '{s}' | pandoc {opts}").read()
+    return convert2html_batch([s], opts=opts)[0]
+
+
+def convert2html_batch(strs: Sequence[str], opts='') -> List[str]:
+    """Convert a list of strings to pandoc HTML format (single pandoc call)."""
+    return convert_text_batch(strs, to='html', format='markdown',
+                              extra_args=opts.split())
 
 
 def replace_latex_fracs(estr):
@@ -50,6 +90,20 @@ def fix_unicode(estr: str) -> str:
     return unicodedata.normalize('NFKC', estr)
 
 
+def fix_plain(estr: str, clean_ws = True) -> str:
+    """Post-conversion fixes for plain format (unicode, greek chars, whitespace, operators)."""
+    #: fix unicode
+    estr = fix_unicode(estr)
+    #: replace greek chars
+    estr, repls = greek.convert(estr, infmt='unicode', outfmt='plain')
+    #: clean whitespace...
+    if clean_ws is True:
+        estr = estr.strip().replace('\n', '').replace('\r', '').replace(' ', '')
+    #: fix any missing multiplication operators...
+    estr = fix_missing_multop(estr)
+    return str(estr)
+
+
 def convert2plain(estr: str, clean_ws = True, src_format='latex') -> str:
     """Convert generic input (e.g., latex) to pandoc plain format.
 
@@ -61,20 +115,60 @@ def convert2plain(estr: str, clean_ws = True, src_format='latex') -> str:
     estr = copy.copy(estr)
     
     if src_format == 'latex':
+        #: ! check the on-disk line cache first
+        entry = line_cache.lookup('convert2plain', estr, clean_ws)
+        if entry is not None:
+            convert2plain_paths['cache'] += 1
+            return entry.value
+        line = estr
         #: replace latex fractions with ( () / () ) ! needed ahead of pandoc
         estr = replace_latex_fracs(estr)
-        #: perform pandoc conversion step
-        estr = pdoc.convert_text(source=f"${estr}$", to='plain', format='latex')
-    #: fix unicode
-    estr = fix_unicode(estr)
-    #: replace greek chars
-    estr, repls = greek.convert(estr, infmt='unicode', outfmt='plain')
-    #: clean whitespace...
-    if clean_ws is True:
-        estr = estr.strip().replace('\n', '').replace('\r', '').replace(' ', '')
-    #: fix any missing multiplication operators...
-    estr = fix_missing_multop(estr)
-    return str(estr)
+        #: try the in-process converter first...
+        plain = latex2plain(estr)
+        if plain is not None:
+            convert2plain_paths['native'] += 1
+            estr = plain
+        else:
+            #: ...fall back to the pandoc conversion step for unsupported constructs
+            convert2plain_paths['pandoc'] += 1
+            estr = pdoc.convert_text(source=f"${estr}$", to='plain', format='latex')
+        estr = fix_plain(estr, clean_ws=clean_ws)
+        line_cache.store('convert2plain', line, estr, clean_ws)
+        return estr
+    return fix_plain(estr, clean_ws=clean_ws)
+
+
+def convert2plain_batch(estrs: Sequence[str], clean_ws = True, src_format='latex') -> List[str]:
+    """Convert a list of strings to plain format, same as `convert2plain(...)` for each.
+
+    Lines not handled by the in-process converter are sent to pandoc together (single call).
+
+    Examples:
+    ---------
+    >>> convert2plain_batch([r'\\alpha_{m}=1', r'y=x^{a+1}', r'\\beta=2'])
+    ['alpha_(m)=1', 'y=x^(a+1)', 'beta=2']
+    """
+    estrs = [copy.copy(estr) for estr in estrs]
+    if src_format != 'latex':
+        return [fix_plain(estr, clean_ws=clean_ws) for estr in estrs]
+    #: ! check the on-disk line cache first, only convert the missing lines
+    entries = [line_cache.lookup('convert2plain', estr, clean_ws) for estr in estrs]
+    outs = [entry.value if entry is not None else None for entry in entries]
+    missing = [j for j, entry in enumerate(entries) if entry is None]
+    convert2plain_paths['cache'] += len(estrs) - len(missing)
+    latex_strs = [replace_latex_fracs(estrs[j]) for j in missing]
+    plains = [latex2plain(estr) for estr in latex_strs]
+    fallback = [k for k, plain in enumerate(plains) if plain is None]
+    convert2plain_paths['native'] += len(plains) - len(fallback)
+    convert2plain_paths['pandoc'] += len(fallback)
+    converted = convert_text_batch(
+        [f"${latex_strs[k]}$" for k in fallback], to='plain', format='latex')
+    for k, plain in zip(fallback, converted):
+        plains[k] = plain
+    for j, plain in zip(missing, plains):
+        outs[j] = fix_plain(plain, clean_ws=clean_ws)
+        line_cache.store('convert2plain', estrs[j], outs[j], clean_ws)
+    return outs
 
 
 if __name__ == '__main__':
@@ -0,0 +1,188 @@
+"""desmos2python single-pass plain -> python (numpy) rewriter.
+
+Rewrites a line of plain math (`desmos2python.pdoc.convert2plain` output) to python in
+one pass over its tokens, with the same result as the chain of regex substitutions
+used by `desmos2python.latex.fix_raw_pycode` before:
+
+- `fix_plain` normalization: unicode, greek names, whitespace, missing `*` operators
+- `^` -> `**`, subscripts (`x_{ab}` -> `x_a`, `x_(ab)` -> `x_ab`), comma spacing
+- elementary functions -> numpy, e.g. `exp(` -> `np.exp(`, `ln(` -> `np.log(`
+- function definitions, e.g. `F(x)=` -> `def _F(self, x):\\n    return `
+- instance attributes following `(` in the return expression, e.g. `(a` -> `(self.a`
+"""
+import re
+import string
+import unicodedata
+from typing import List, NamedTuple, Optional, Tuple
+from desmos2python.resources.greek_chars import GREEK_TABLES
+
+__all__ = [
+    'plain2pycode',
+    'PycodeRewrite',
+]
+
+#: single-character normalization: greek characters -> names, unicode operators -> python,
+#: whitespace is dropped
+NORMALIZE_TABLE = str.maketrans({
+    **GREEK_TABLES[('unicode', 'plain')],
+    '⋅': '*', '−': '-', ' ': None, '\n': None, '\r': None,
+})
+
+#: elementary functions (plain format) -> numpy
+NUMPY_FUNCS = {
+    **{name: name for name in ('exp', 'log', 'sin', 'cos', 'tan', 'sinh', 'cosh', 'tanh',
+                               'arcsin', 'arccos', 'arctan', 'sqrt')},
+    'ln': 'log',
+}
+
+#: a `*` is inserted between these (adjacent) characters, e.g. `2x` -> `2*x`, `)(` -> `)*(`
+MULTOP_LEFT = frozenset(')' + string.digits)
+MULTOP_RIGHT = frozenset('(' + string.ascii_letters)
+
+#: ! subscripts with a digit followed by a letter get a `*` inserted, and are left as-is
+TOKEN_PATTERN = re.compile(r'''
+    _\{(?P<sub>[a-zA-Z]+[0-9]*|[0-9]+)\}
+  | _\((?P<subp>[a-zA-Z]+[0-9]*|[0-9]+)\)
+  | (?P<name>[a-zA-Z]+)
+  | (?P<digits>[0-9]+)
+  | (?P<comma>,(?!\W))
+  | (?P<char>.)
+''', re.VERBOSE | re.DOTALL)
+
+#: arguments of a function definition
+ARGS_PATTERN = re.compile(r'[a-zA-Z_,\s][a-zA-Z_0-9,\s]*')
+
+#: identifier following `(` in the return expression
+IDENT_PATTERN = re.compile(r'[a-zA-Z_][a-zA-Z_0-9]*')
+
+#: legacy instance-attribute rewrite, only used for (odd) lines with several definitions,
+#: or `return` in a name
+_INST_ATTR_PATTERN = re.compile(r'\(([a-zA-Z_][a-zA-Z_0-9]*)')
+
+
+class PycodeRewrite(NamedTuple):
+
+    """result of `plain2pycode(...)`"""
+
+    #: rewritten line
+    pycode: str
+    #: (name, arguments) of a function definition at the start of the line, e.g. ('F', 'x, y')
+    signature: Optional[Tuple[str, str]]
+
+
+def _def_args(args: str) -> List[str]:
+    return [a for a in args.replace(' ', '').split(',') if a != '']
+
+
+def _fix_instance_attrs(pycode: str, local_vars: List[str]) -> str:
+    """(fallback) prefix names following `(` in the return expression with `self.`"""
+    prefix, sepstr, retstr = pycode.partition('return')
+    def _repl(m):
+        return f'(self.{m.group(1)}' if m.group(1) not in local_vars and m.group(1) != 'np' \
+            else m.group(0)
+    return prefix + sepstr + _INST_ATTR_PATTERN.sub(_repl, retstr)
+
+
+def plain2pycode(line: str, instance_attrs: bool = True) -> PycodeRewrite:
+    """Rewrite a line of plain math to python.
+
+    - instance_attrs : prefix names following `(` in the return expression with `self.`
+
+    >>> plain2pycode('F(x,y)=E(alpha_(m)⋅(1+y))⋅exp(−2x)+a^2')
+    PycodeRewrite(pycode='def _F(self, x, y):\\n    return E(self.alpha_m*(1+y))*np.exp(-2*x)+a**2', signature=('F', 'x, y'))
+    >>> plain2pycode('beta_{12}=2π').pycode
+    'beta_1=2*pi'
+    """
+    if not line.isascii():
+        line = unicodedata.normalize('NFKC', line)
+    text = line.translate(NORMALIZE_TABLE).strip()
+    buf = ''
+    #: trailing [a-zA-Z_] run of `buf` (function names)
+    word = ''
+    #: open definition candidate: (name start, name, arguments start)
+    cand = None
+    #: function definitions: [(name, arguments), ...]
+    defs = []
+    #: start of the return expression, positions (in `buf`) following `(` in it
+    ret, parens = None, []
+    fallback = False
+    pos, end = 0, len(text)
+    match = TOKEN_PATTERN.match
+    while pos < end:
+        m = match(text, pos)
+        kind, tok, pos = m.lastgroup, m.group(), m.end()
+        if m.start() > 0 and text[m.start() - 1] in MULTOP_LEFT and tok[0] in MULTOP_RIGHT:
+            buf += '*'
+            word = ''
+        if kind == 'name':
+            if text.startswith('(', pos) and tok in NUMPY_FUNCS and \
+               not (buf and (buf[-1].isalnum() or buf[-1] in '_.')):
+                buf += 'np.' + NUMPY_FUNCS[tok]
+                word = NUMPY_FUNCS[tok]
+            else:
+                buf += tok
+                word += tok
+                if ret is None and 'return' in tok:
+                    fallback = True
+        elif kind == 'sub' or kind == 'subp':
+            sub = '_' + (m.group('sub')[0] if kind == 'sub' else m.group('subp'))
+            buf += sub
+            word = word + sub if sub[-1].isalpha() else ''
+            if ret is None and 'return' in sub:
+                fallback = True
+        elif kind == 'digits':
+            buf += tok
+            word = ''
+        elif kind == 'comma':
+            buf += ', '
+            word = ''
+        elif tok == '(':
+            buf += tok
+            #: ! every `(` opens a (new) definition candidate, `name(args)=`
+            cand = (len(buf) - 1 - len(word), word, len(buf)) if word else None
+            word = ''
+            if ret is not None:
+                parens.append(len(buf))
+        elif tok == ')':
+            if cand is not None and text.startswith('=', pos) and \
+               ARGS_PATTERN.fullmatch(buf, cand[2]) is not None:
+                start, name, args = cand[0], cand[1], buf[cand[2]:]
+                buf = buf[:start] + f'def _{name}(self, {args}):\n    return '
+                defs.append((name, args, start))
+                pos += 1  # ! consume `=`
+                if len(defs) > 1 or 'return' in name or 'return' in args:
+                    fallback = True
+                elif ret is None:
+                    ret = len(buf)
+            else:
+                buf += tok
+            cand = None
+            word = ''
+        elif tok == '.':
+            #: ! builtin math -> numpy
+            if buf.endswith('math'):
+                buf = buf[:-4] + 'np'
+            buf += tok
+            word = ''
+        elif tok == '_':
+            buf += tok
+            word += tok
+        else:
+            buf += '**' if tok == '^' else tok
+            word = ''
+    buf = buf.strip()
+    signature = (defs[0][0], defs[0][1]) if defs and defs[0][2] == 0 else None
+    local_vars = _def_args(defs[0][1]) if defs else []
+    if not instance_attrs:
+        return PycodeRewrite(buf, signature)
+    if fallback:
+        return PycodeRewrite(_fix_instance_attrs(buf, local_vars), signature)
+    if len(parens) > 0:
+        parts, last = [], 0
+        for p in parens:
+            m = IDENT_PATTERN.match(buf, p)
+            if m is not None and m.group() not in local_vars and m.group() != 'np':
+                parts += [buf[last:p], 'self.']
+                last = p
+        buf = ''.join(parts) + buf[last:]
+    return PycodeRewrite(buf, signature)
@@ -1,8 +1,15 @@
 import base64
 import json
-import jinja2cli
+import logging
+from os import PathLike
+from pathlib import Path
+from typing import Any, AnyStr, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+from selenium.common import WebDriverException
 from desmos2python.utils import D2P_Resources
-from desmos2python.browser import DesmosWebSession
+from desmos2python.templates import registry as template_registry
+from desmos2python.browser import BrowserPool, DesmosCalcStrings, DesmosWebSession, default_pool
+
+logger = logging.getLogger(__name__)
 
 default_template_fpath = D2P_Resources.get_package_resources_path() \
     .joinpath('templates', 'desmos_mock_graph.html.jinja2')
@@ -10,12 +17,13 @@ default_template_fpath = D2P_Resources.get_package_resources_path() \
 
 def render_jinja_html(template_fpath = default_template_fpath,
                       data_fpath = None, data = {}, output_fpath=None):
+    """render an html template (compiled once per process, see `desmos2python.templates`)"""
     if data_fpath is not None:
         with open(data_fpath, 'r') as fp:
             data_new = json.load(fp)
             data_new.update(data)
             data = data_new
-    out = jinja2cli.cli.render(template_fpath, data, [])
+    out = template_registry.get_template_fpath(template_fpath).render(**data)
     if output_fpath is not None:
         with open(output_fpath, 'w') as f:
             f.write(out)
@@ -47,6 +55,146 @@ def make_web_session_with_state(state_fname='withCortisolimagev3Circadianultradi
     return dws
 
 
+#: apply a calcState on the (loaded) mock graph page, return its visible expressions and svg
+#: screenshot (! async: `Calc.asyncScreenshot` calls back, no polling)
+set_state_and_capture_js = f'''
+var done = arguments[arguments.length - 1];
+Calc.setState(arguments[0]);
+mapExpressionsInit();
+Calc.asyncScreenshot(opts, function(data) {{
+    document.getElementById("svg-span").innerHTML = data;
+    done({{expressions: Calc.getExpressions().filter({DesmosCalcStrings.visibleFilter}), svg: data}});
+}});
+'''
+
+
+class RenderedState(NamedTuple):
+
+    """result of rendering one calcState (see `BulkStateRenderer`)"""
+
+    name: str
+    latex_list: Optional[list] = None
+    svg: Optional[str] = None
+    latex_fpath: Optional[Path] = None
+    svg_fpath: Optional[Path] = None
+    #: failure reason (None on success)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def iter_calc_states(inputs: Iterable[Union[AnyStr, PathLike]] = None) -> Iterator[Tuple[str, Any]]:
+    """(name, calcState) of calcState json files/directories (default: the user's `calcState_json`)
+
+    ! files are read lazily, one at a time
+    """
+    if inputs is None:
+        inputs = [D2P_Resources.get_user_resources_path().joinpath('calcState_json')]
+    for inp in inputs:
+        inp = Path(inp)
+        for fpath in (sorted(inp.glob('*.json')) if inp.is_dir() else [inp]):
+            try:
+                yield fpath.stem, json.loads(fpath.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"failed to read calcState '{fpath}'.", exc_info=1)
+                yield fpath.stem, e
+
+
+class BulkStateRenderer:
+
+    """Render many calcStates on one (kept loaded) mock graph page.
+
+    The page (`desmos_mock_graph.html.jinja2`) is loaded once, each state is then applied with
+    `Calc.setState` and captured in a single async script call. Results are streamed to
+    `<output_dir>/latex_json/<name>.json` and `<output_dir>/screenshots/<name>.svg`.
+
+    - pool : `BrowserPool` the browser is checked out from (default: the process-wide pool)
+    - output_dir : root output directory (default: `DesmosWebSession.default_output_dir`)
+    - write : write the outputs (else results are only returned)
+    - timeout : seconds to wait for each state to render
+    """
+
+    def __init__(self, pool: BrowserPool = None, output_dir: Union[AnyStr, PathLike] = None,
+                 write: bool = True, timeout: float = 30, template_fpath=default_template_fpath):
+        if output_dir is None:
+            output_dir = DesmosWebSession.default_output_dir
+        self.pool = pool if pool is not None else default_pool()
+        self.output_dir = Path(output_dir)
+        self.write_outputs = write
+        self.timeout = timeout
+        self.template_fpath = template_fpath
+        self.session: Optional[DesmosWebSession] = None
+
+    def open(self, calc_state: Dict) -> DesmosWebSession:
+        """load the mock graph page (initialized with `calc_state`)"""
+        url = format_html_string_for_driver(
+            render_jinja_html(template_fpath=self.template_fpath, data={'calc_state_json': calc_state}))
+        self.session = self.pool.session(url=url, timeout=self.timeout)
+        #: ! wait for the page's own `init_calc` (on load), it would overwrite the first `setState`
+        self.session.await_DOM(
+            callback=lambda: self.session.check_document_initialised(DesmosCalcStrings.svgReady),
+            timeout=self.timeout)
+        self.session.browser.set_script_timeout(self.timeout)
+        return self.session
+
+    def close(self, healthy=True):
+        if self.session is not None:
+            self.session.close(healthy=healthy)
+            self.session = None
+
+    def render_state(self, name: str, calc_state: Dict) -> RenderedState:
+        """apply one calcState, write its outputs (! never raises for a bad state)"""
+        try:
+            if self.session is None:
+                self.open(calc_state)
+            out = self.session.browser.execute_async_script(set_state_and_capture_js, calc_state)
+        except (WebDriverException, TimeoutError) as e:
+            #: ! TimeoutError: no browser checked out of the pool in time
+            logger.warning(f"failed to render state '{name}'.", exc_info=1)
+            #: ! the page (or browser) may be broken, start over with the next state
+            self.close(healthy=False)
+            return RenderedState(name, error=f'{type(e).__name__}: {e}')
+        latex_list = [expr.get('latex') for expr in out['expressions'] if expr.get('latex') is not None]
+        result = RenderedState(name, latex_list=latex_list, svg=out.get('svg'))
+        if self.write_outputs is True:
+            result = result._replace(**self.write(name, latex_list, out.get('svg')))
+        return result
+
+    def write(self, name: str, latex_list: list, svg: Optional[str]) -> Dict[str, Path]:
+        latex_fpath = self.output_dir.joinpath('latex_json', name).with_suffix('.json')
+        latex_fpath.parent.mkdir(parents=True, exist_ok=True)
+        latex_fpath.write_text(json.dumps(latex_list))
+        fpaths = {'latex_fpath': latex_fpath}
+        if svg is not None:
+            svg_fpath = self.output_dir.joinpath('screenshots', name).with_suffix('.svg')
+            svg_fpath.parent.mkdir(parents=True, exist_ok=True)
+            svg_fpath.write_text(svg)
+            fpaths['svg_fpath'] = svg_fpath
+        return fpaths
+
+    def render_many(self, states: Iterable[Tuple[str, Any]]) -> Iterator[RenderedState]:
+        """render (name, calcState) pairs, yields results as they are written"""
+        for name, calc_state in states:
+            if isinstance(calc_state, Exception):
+                yield RenderedState(name, error=f'{type(calc_state).__name__}: {calc_state}')
+                continue
+            yield self.render_state(name, calc_state)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def render_calc_states(inputs: Iterable[Union[AnyStr, PathLike]] = None, **kwds) -> Iterator[RenderedState]:
+    """render archived calcState files on a single page (see `BulkStateRenderer`, `iter_calc_states`)"""
+    with BulkStateRenderer(**kwds) as renderer:
+        yield from renderer.render_many(iter_calc_states(inputs))
+
+
 if __name__ == '__main__':
     dws = make_web_session_with_state()
     print('dws = ', dws)
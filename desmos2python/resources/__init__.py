@@ -7,16 +7,20 @@ __all__ = [
     'convert_greek_chars'
 ]
 
-#: globally accessible
-greek_chars = None
-GreekAlphabet = None
-greek = None
-convert_greek_chars = None
-try:
-    greek_chars = importlib.import_module('.greek_chars', 'desmos2python.resources')
-except ModuleNotFoundError:
-    logging.warn("couldn't import greek_chars module.", exc_info=1)
-else:
-    GreekAlphabet = greek_chars.GreekAlphabet
-    greek = greek_chars.greek
-    convert_greek_chars = greek_chars.convert_greek_chars
\ No newline at end of file
+#: globally accessible (! lazily: `greek_chars` is imported on first access, PEP 562)
+_greek_chars_attrs = ('greek_chars', ) + tuple(__all__)
+
+
+def __getattr__(name):
+    if name not in _greek_chars_attrs:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    try:
+        greek_chars = importlib.import_module('.greek_chars', 'desmos2python.resources')
+    except ModuleNotFoundError:
+        logging.warn("couldn't import greek_chars module.", exc_info=1)
+        values = dict.fromkeys(_greek_chars_attrs)
+    else:
+        values = {attr: getattr(greek_chars, attr) for attr in __all__}
+        values['greek_chars'] = greek_chars
+    globals().update(values)
+    return values[name]
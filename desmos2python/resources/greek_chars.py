@@ -1,14 +1,17 @@
 import json
-import pandas as pd
-from desmos2python.utils import D2P_Resources
+import re
+from pathlib import Path
+from types import MappingProxyType
 from typing import (
     Union,
     Container,
     Literal,
+    Mapping,
     Tuple,
 )
 import numpy as np
 from functools import cached_property
+from desmos2python.utils import D2P_Resources
 
 __all__ = [
     'GreekAlphabet',
@@ -20,34 +23,74 @@ __all__ = [
 #: choices for convert_greek_chars
 FormatLiteral = Literal['latex', 'unicode', 'plain']
 
+#: {unicode character: name}, e.g. {'α': 'alpha'} (read once, at import)
+GREEK_ALPHABET: Mapping[str, str] = MappingProxyType(json.loads(
+    Path(__file__).with_name('greek_alphabet.json').read_text(encoding='utf-8')))
+
+#: symbols of each format, in alphabet order
+GREEK_SYMBOLS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    'latex': tuple('\\' + name for name in GREEK_ALPHABET.values()),
+    'unicode': tuple(GREEK_ALPHABET.keys()),
+    'plain': tuple(GREEK_ALPHABET.values()),
+})
+
+#: conversion tables: {(infmt, outfmt): {symbol: replacement}}
+GREEK_TABLES: Mapping[Tuple[str, str], Mapping[str, str]] = MappingProxyType({
+    (infmt, outfmt): MappingProxyType(dict(zip(GREEK_SYMBOLS[infmt], GREEK_SYMBOLS[outfmt])))
+    for infmt in GREEK_SYMBOLS for outfmt in GREEK_SYMBOLS if infmt != outfmt
+})
+
+#: one compiled pattern per input format (! longest first: alternation is ordered)
+GREEK_PATTERNS: Mapping[str, re.Pattern] = MappingProxyType({
+    'latex': re.compile('|'.join(
+        re.escape(sym) for sym in sorted(GREEK_SYMBOLS['latex'], key=len, reverse=True))),
+    'unicode': re.compile('[' + ''.join(GREEK_SYMBOLS['unicode']) + ']'),
+    #: ! plain names only as whole identifiers ('pi' in 'pi_x', not in 'spin')
+    'plain': re.compile('(?<![A-Za-z])(?:' + '|'.join(
+        sorted(GREEK_SYMBOLS['plain'], key=len, reverse=True)) + ')(?![A-Za-z])'),
+})
+
 
 class GreekAlphabet:
 
     """Namespace for accessing the greek alphabet as (name, unicode symbol).
 
+    Conversions use the (module-level, read-only) `GREEK_TABLES` and `GREEK_PATTERNS`,
+    i.e. a single pass over the input string.
+
     ref: https://gist.githubusercontent.com/beniwohli/765262/raw/68980c0e2135777db9bd7cfdf1eea365dc8c68f9/greek_alphabet.py
     """
 
+    #: {name: unicode character}, e.g. {'alpha': 'α'}
+    _chars_by_name: Mapping[str, str] = MappingProxyType({v: k for k, v in GREEK_ALPHABET.items()})
+
     def __init__(self):
-        self.rpath = D2P_Resources.get_package_resources_path()
-        self.d = json.loads(self.rpath.joinpath('greek_alphabet.json').read_text())
-        #: access like: GreekAlphabet().df['Alpha'], output: 'A'
-        self.df = pd.Series(self.d) \
-                    .to_frame() \
-                    .reset_index(names=['uni']) \
-                    .set_index(0).T
+        self.d = GREEK_ALPHABET
 
     @cached_property
-    def latex_names(self):
-        return "\\" + self.names
+    def rpath(self):
+        return D2P_Resources.get_package_resources_path()
+
+    @cached_property
+    def df(self):
+        """access like: GreekAlphabet().df['Alpha'], output: 'A' (! requires pandas)"""
+        import pandas as pd
+        return pd.Series(dict(self.d)) \
+                 .to_frame() \
+                 .reset_index(names=['uni']) \
+                 .set_index(0).T
+
+    @cached_property
+    def latex_names(self) -> np.ndarray:
+        return np.array(GREEK_SYMBOLS['latex'])
 
     @cached_property
     def chars(self) -> np.ndarray:
-        return self.df.values[0]
+        return np.array(GREEK_SYMBOLS['unicode'])
 
     @cached_property
     def names(self) -> np.ndarray:
-        return self.df.columns.values
+        return np.array(GREEK_SYMBOLS['plain'])
 
     def match_names(self, names: Container) -> Container:
         """return a vector of names found in the input vector"""
@@ -57,27 +100,30 @@ class GreekAlphabet:
         """return a vector of characters found in the input vector"""
         return np.intersect1d(chars, self.chars)
 
+    @staticmethod
+    def _extract(instr: str, fmt: FormatLiteral) -> list:
+        found = set(GREEK_PATTERNS[fmt].findall(instr))
+        return [sym for sym in GREEK_SYMBOLS[fmt] if sym in found]
+
     def extract_names(self, instr: str) -> list:
         """return a list of names found in the input string"""
-        return [n for n in self.names if n in instr]
+        return [n for n in GREEK_SYMBOLS['plain'] if n in instr]
 
     def extract_latex_names(self, instr: str) -> list:
         """return a list of latex names found in input string"""
-        return [n for n in self.latex_names if n in instr]
+        return GreekAlphabet._extract(instr, 'latex')
 
     def extract_chars(self, instr: str) -> list:
         """return a list of unicode characters found in the input string"""
-        return [c for c in self.chars if c in instr]
+        return GreekAlphabet._extract(instr, 'unicode')
 
     def _get(self, name: str, as_item = True) -> str:
         """given a name (e.g. 'alpha'), return the unicode character (e.g., 'α').
         """
-        if name in self.df.columns:
-            if as_item is True:
-                return self.df[name].item()
-            return self.df[name]
-        else:
+        char = GreekAlphabet._chars_by_name.get(name)
+        if char is None:
             return self.get_from_unicode(name)
+        return char
 
     @property
     def _get_vectorized(self):
@@ -89,17 +135,24 @@ class GreekAlphabet:
     def get_from_unicode(self, uni: str) -> str:
         """given a unicode character (e.g. α), return the name (e.g., 'alpha').
         """
-        cols = [c for c in self.df.columns if self.df[c].item() == uni]
-        if len(cols) == 0:
+        name = self.d.get(uni)
+        if name is None:
             raise RuntimeError(f"no greek character matching given name: '{uni}'")
-        return cols[0]
+        return name
 
     def convert(self, estr: str,
                 infmt: FormatLiteral = 'latex',
                 outfmt: FormatLiteral = 'unicode',
-                ignore_operators=True, ignore=[]) -> Tuple:
+                ignore_operators=True, ignore=()) -> Tuple:
         """convert between latex <-> unicode representations of greek characters.
 
+        >>> greek.convert(r'\\alpha_{m}\\cdot\\beta', infmt='latex', outfmt='unicode')
+        ('α_{m}\\\\cdotβ', {'\\\\alpha': 'α', '\\\\beta': 'β'})
+        >>> greek.convert('α+Ω', infmt='unicode', outfmt='plain')
+        ('alpha+Omega', {'α': 'alpha', 'Ω': 'Omega'})
+        >>> greek.convert('pi_x*spin', infmt='plain', outfmt='unicode')
+        ('π_x*spin', {'pi': 'π'})
+
         Arguments:
         ----------
         - estr: input string to be converted
@@ -110,34 +163,23 @@ class GreekAlphabet:
 
         returns: (new string, replacement dict)
         """
+        table = GREEK_TABLES.get((infmt, outfmt))
+        if table is None:
+            raise ValueError(f"unsupported conversion: '{infmt}' -> '{outfmt}'")
+        ignore = set(ignore)
         if ignore_operators is True:
-            plainops = ['*']
-            latexops = []
-            operators = plainops + latexops  # operators to ignore
-            ignore.extend(operators)
-            #: init syms map of { input_syms -> output_syms }
-        match (infmt, outfmt):
-            case ('latex', 'unicode'):
-                syms = dict(zip(latexops, plainops))
-                syms.update(zip(self.latex_names, self.chars))
-                extract = self.extract_latex_names
-            case ('latex', 'plain'):
-                syms = dict(zip(latexops, plainops))
-                syms.update(zip(self.latex_names, self.names))
-                extract = self.extract_latex_names
-            case ('unicode', 'latex'):
-                syms = dict(zip(plainops, latexops))
-                syms.update(zip(self.chars, self.latex_names))
-                extract = self.extract_chars
-            case ('unicode', 'plain'):
-                syms = dict(zip(self.chars, self.names))
-                extract = self.extract_chars
-                repls = {}  # store complete map of { found_symbols -> corresponding_replacements }
-                #: get replacements (without those to be ignored)
-        repls = {extracted: syms[extracted] for extracted in extract(estr) if extracted not in ignore}
-        #: apply replacements
-        for symbol, replacement in repls.items():
-            estr = estr.replace(symbol, replacement)
+            ignore.add('*')  # operators to ignore
+        repls = {}  # store complete map of { found_symbols -> corresponding_replacements }
+
+        def _repl(m):
+            symbol = m.group(0)
+            if symbol in ignore:
+                return symbol
+            repls[symbol] = table[symbol]
+            return repls[symbol]
+
+        #: apply replacements (single pass)
+        estr = GREEK_PATTERNS[infmt].sub(_repl, estr)
         return (estr, repls)
 
 
@@ -145,13 +187,17 @@ class GreekAlphabet:
 greek = GreekAlphabet()
 
 
-def convert_greek_chars(estr: str, infmt : FormatLiteral = 'latex', ignore_operators=True, ignore=[]) -> Tuple:
+def convert_greek_chars(estr: str, infmt : FormatLiteral = 'latex', outfmt: FormatLiteral = None,
+                        ignore_operators=True, ignore=()) -> Tuple:
     """go between latex <-> unicode representations of greek characters.
 
     Arguments:
     ----------
-    - infmt: input format (output will be the other)
+    - infmt: input format
+    - outfmt: output format (default: the other of latex/unicode)
 
     return: new string, replacement dict
     """
+    if outfmt is None:
+        outfmt = 'unicode' if infmt == 'latex' else 'latex'
     return greek.convert(estr, infmt=infmt, outfmt=outfmt, ignore_operators=ignore_operators, ignore=ignore)
@@ -0,0 +1,146 @@
+"""desmos2python per-stage build statistics (`DesmosLatexParser.stats`).
+
+Each pipeline stage records wall time, line counts, failures and cache hits. Errors are kept
+as exception objects, tracebacks are only formatted on demand (`ErrorRecord.format()`).
+
+>>> stats = ParserStats()
+>>> with stats.stage('plain_lines') as stage:
+...     stage.lines += 3
+>>> stats.stages['plain_lines'].lines
+3
+"""
+import time
+import logging
+import traceback
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+__all__ = [
+    'ErrorRecord',
+    'StageEvent',
+    'StageStats',
+    'ParserStats',
+]
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+
+    """counters of a pipeline stage (accumulated over calls)"""
+
+    __slots__ = ('calls', 'seconds', 'lines', 'failures', 'cache_hits')
+
+    def __init__(self, calls: int = 0, seconds: float = 0.0, lines: int = 0, failures: int = 0,
+                 cache_hits: int = 0):
+        self.calls, self.seconds, self.lines = calls, seconds, lines
+        self.failures, self.cache_hits = failures, cache_hits
+
+    def add(self, other: 'StageStats'):
+        for attr in StageStats.__slots__:
+            setattr(self, attr, getattr(self, attr) + getattr(other, attr))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {attr: getattr(self, attr) for attr in StageStats.__slots__}
+
+    def __repr__(self):
+        return 'StageStats(' + ', '.join(f'{k}={v!r}' for k, v in self.as_dict().items()) + ')'
+
+
+class StageEvent(NamedTuple):
+
+    """passed to the `hook` callback when a stage finishes"""
+
+    stage: str
+    #: counters of this call
+    stats: StageStats
+    #: exception raised by the stage (None on success)
+    error: Optional[BaseException] = None
+
+
+class ErrorRecord(NamedTuple):
+
+    """a failure, the traceback is formatted lazily"""
+
+    stage: str
+    error: BaseException
+    #: input line (for per-line failures)
+    line: Any = None
+
+    def format(self) -> str:
+        """formatted traceback (! formatting is deferred until needed)"""
+        return ''.join(traceback.format_exception(type(self.error), self.error, self.error.__traceback__))
+
+
+class ParserStats:
+
+    """Per-stage build statistics.
+
+    - hook : called with a `StageEvent` whenever a stage finishes
+    """
+
+    def __init__(self, hook: Callable[[StageEvent], Any] = None):
+        self.hook = hook
+        self.stages: Dict[str, StageStats] = {}
+        self.errors: List[ErrorRecord] = []
+        #: seconds spent in nested stages, for each running stage
+        self._nested: List[float] = []
+
+    @contextmanager
+    def stage(self, name: str, cache_hits: Callable[[], int] = None) -> Iterator[StageStats]:
+        """time a stage, yields the `StageStats` of this call (to add lines, failures).
+
+        - cache_hits : returns the (cumulative) number of cache hits, diffed around the stage
+
+        ! times are exclusive: time spent in nested stages (e.g. `fixed_lines` triggered by
+        `init_jinja_env`) is only counted for the nested stage
+        ! exceptions are recorded (as failures) and re-raised
+        """
+        record = StageStats(calls=1)
+        hits = cache_hits() if cache_hits is not None else 0
+        error = None
+        self._nested.append(0.0)
+        t = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            error = e
+            record.failures += 1
+            self.error(name, e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - t
+            record.seconds = elapsed - self._nested.pop()
+            if len(self._nested) > 0:
+                self._nested[-1] += elapsed
+            if cache_hits is not None:
+                record.cache_hits = cache_hits() - hits
+            self.stages.setdefault(name, StageStats()).add(record)
+            if self.hook is not None:
+                self.hook(StageEvent(name, record, error))
+
+    def error(self, stage: str, error: BaseException, line: Any = None):
+        """record a failure (! no traceback formatting unless debug logging is enabled)"""
+        self.errors.append(ErrorRecord(stage, error, line))
+        logger.debug(f"'{stage}' failed" + (f" for '{line}'" if line is not None else ''),
+                     exc_info=error)
+
+    def reset(self):
+        self.stages.clear()
+        self.errors.clear()
+
+    def as_dict(self) -> Dict[str, Dict]:
+        return {name: stats.as_dict() for name, stats in self.stages.items()}
+
+    def report(self) -> str:
+        """table of the stage counters"""
+        width = max([len('stage')] + [len(name) for name in self.stages])
+        rows = [f"{'stage':<{width}}  {'calls':>6}  {'seconds':>10}  {'lines':>7}  "
+                f"{'failures':>8}  {'cache_hits':>10}"]
+        for name, s in self.stages.items():
+            rows.append(f'{name:<{width}}  {s.calls:6d}  {s.seconds:10.4f}  {s.lines:7d}  '
+                        f'{s.failures:8d}  {s.cache_hits:10d}')
+        return '\n'.join(rows)
+
+    def __repr__(self):
+        return f'ParserStats(stages={list(self.stages)}, errors={len(self.errors)})'
@@ -0,0 +1,219 @@
+"""desmos2python parameter sweeps: evaluate model outputs over (slider) parameter grids.
+
+Parameters are broadcast as extra array axes for array-native (and numba) equations,
+other equations are evaluated point by point. Large sweeps can be split into chunks
+(along the first parameter) and evaluated in a process pool.
+"""
+import os
+import json
+import math
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from os import PathLike
+from typing import AnyStr, Dict, List, Sequence, Tuple, Union
+import numpy as np
+from desmos2python.pdoc import convert2plain_batch
+#: ! `read_calc_state` is kept importable from here
+from desmos2python.calc_state import read_calc_state, read_calc_state_records  # noqa: F401
+
+__all__ = [
+    'SweepResult',
+    'slider_bounds',
+    'slider_grid',
+    'sweep',
+    'sweep_parallel',
+]
+
+logger = logging.getLogger(__name__)
+
+#: equation modes that broadcast over ndarray parameters
+BROADCAST_MODES = ('array', 'numba')
+
+
+class SweepResult(np.ndarray):
+
+    """ndarray labelled with dimension names (`dims`) and coordinates (`coords`).
+
+    dims: ('output', *parameters, 'x')
+    """
+
+    def __new__(cls, data, dims: Sequence[AnyStr], coords: Dict):
+        obj = np.asarray(data).view(cls)
+        obj.dims = tuple(dims)
+        obj.coords = dict(coords)
+        return obj
+
+    def __array_finalize__(self, obj):
+        if obj is None:
+            return
+        #: ! labels are only kept if the shape is unchanged (use `sel` to index)
+        same_shape = getattr(obj, 'shape', None) == self.shape
+        self.dims = getattr(obj, 'dims', None) if same_shape else None
+        self.coords = getattr(obj, 'coords', None) if same_shape else None
+
+    def sel(self, **indexers) -> Union['SweepResult', np.ndarray]:
+        """Select by coordinate values (nearest for numeric coordinates).
+
+        >>> res.sel(output='F', alpha_m=2.0)  # doctest: +SKIP
+        """
+        index, dims, coords = [], [], {}
+        for dim in self.dims:
+            if dim not in indexers:
+                index.append(slice(None))
+                dims.append(dim)
+                coords[dim] = self.coords[dim]
+            elif dim == 'output':
+                index.append(list(self.coords[dim]).index(indexers[dim]))
+            else:
+                index.append(int(np.argmin(np.abs(np.asarray(self.coords[dim]) - indexers[dim]))))
+        values = np.asarray(self)[tuple(index)]
+        if len(dims) == 0:
+            return values
+        return SweepResult(values, dims=dims, coords=coords)
+
+
+def latex_values(lines: List[AnyStr]) -> List[Tuple[AnyStr, object]]:
+    """(python name, value) for latex assignments, e.g. `\\alpha_{m}=2\\pi` -> ('alpha_m', 6.28...)
+
+    ...uses the parser pipeline, so names match the generated model parameters.
+    """
+    from desmos2python.latex import DesmosLatexParser, fix_raw_pycode
+    results = []
+    for line in convert2plain_batch(list(lines)):
+        fixed = fix_raw_pycode(DesmosLatexParser.fix_pycode_line(line))
+        if fixed is None or fixed.get('param_name') == '':
+            results.append(('', None))
+            continue
+        value = fixed.get('param_value')
+        if isinstance(value, list):
+            #: ! expressions, e.g. `2*pi`
+            try:
+                value = float(eval(value[0], {'__builtins__': {}}, {'np': np, 'pi': np.pi}))
+            except Exception:
+                logger.debug(f"failed to evaluate '{value[0]}'.", exc_info=1)
+                value = None
+        results.append((fixed.get('param_name'), value))
+    return results
+
+
+def slider_bounds(calc_state: Union[Dict, AnyStr, PathLike]) -> Dict[AnyStr, Tuple]:
+    """Slider bounds from an (exported) calcState.
+
+    returns : Dict : {param_name: (min, max, step)} (step is None for continuous sliders)
+    """
+    sliders = read_calc_state_records(calc_state).sliders
+    assigns = []
+    for slider in sliders:
+        assigns += [f'{slider.name}={bound or "0"}' for bound in (slider.min, slider.max, slider.step)]
+    values = latex_values(assigns)
+    bounds = {}
+    for j, slider in enumerate(sliders):
+        (name, vmin), (_, vmax), (_, step) = values[3 * j: 3 * j + 3]
+        if name == '' or vmin is None or vmax is None:
+            logger.warning(f"skipping slider with unsupported bounds: '{slider.name}'")
+            continue
+        #: ! continuous sliders have no (or an empty) step
+        bounds[name] = (vmin, vmax, step or None)
+    return bounds
+
+
+def slider_grid(calc_state: Union[Dict, AnyStr, PathLike], num: int = 11,
+                params: Sequence[AnyStr] = None) -> Dict[AnyStr, np.ndarray]:
+    """Parameter grid from the slider bounds of a calcState.
+
+    Stepped sliders use every step, continuous sliders `num` evenly spaced values.
+    """
+    grid = {}
+    for name, (vmin, vmax, step) in slider_bounds(calc_state).items():
+        if params is not None and name not in params:
+            continue
+        if step is None:
+            grid[name] = np.linspace(vmin, vmax, num=num)
+        else:
+            grid[name] = vmin + step * np.arange(math.floor((vmax - vmin) / step + 1e-9) + 1)
+    return grid
+
+
+def sweep(ns, grid: Dict[AnyStr, Sequence], output_keys: Sequence[AnyStr] = None,
+          x: Union[float, Sequence] = 0.0) -> SweepResult:
+    """Evaluate `output_keys` of a model namespace over the cartesian product of `grid`.
+
+    Parameters are restored afterwards.
+
+    returns : SweepResult : shape (len(output_keys), *[len(v) for v in grid.values()], len(x))
+    """
+    output_keys = list(ns.output_keys if output_keys is None else output_keys)
+    names = list(grid)
+    values = [np.atleast_1d(np.asarray(grid[name], dtype=float)) for name in names]
+    shape = tuple(len(v) for v in values)
+    x = np.atleast_1d(np.asarray(x, dtype=float))
+    out = np.empty((len(output_keys), *shape, len(x)))
+    saved = {name: getattr(ns, name) for name in ns.params}
+    broadcast = [j for j, key in enumerate(output_keys)
+                 if ns.func_modes.get(key) in BROADCAST_MODES]
+    pointwise = [j for j in range(len(output_keys)) if j not in broadcast]
+    try:
+        if len(broadcast) > 0:
+            #: ! parameter j -> axis j, x -> last axis
+            ndim = len(names) + 1
+            ns.set_params(**{
+                name: v.reshape([-1 if k == j else 1 for k in range(ndim)])
+                for j, (name, v) in enumerate(zip(names, values))
+            })
+            xb = x.reshape([1] * len(names) + [-1])
+            for j in broadcast:
+                out[j] = getattr(ns, output_keys[j])(xb)
+        if len(pointwise) > 0:
+            for index in np.ndindex(*shape):
+                ns.set_params(**{name: v[k] for name, v, k in zip(names, values, index)})
+                for j in pointwise:
+                    out[(j, *index)] = getattr(ns, output_keys[j])(x)
+    finally:
+        ns.set_params(**saved)
+    coords = {'output': output_keys, **dict(zip(names, values)), 'x': x}
+    return SweepResult(out, dims=['output', *names, 'x'], coords=coords)
+
+
+#: models built by pool workers (per process)
+_worker_models = {}
+
+
+def _sweep_chunk(model_spec: Dict, grid: Dict, output_keys: List[AnyStr], x: np.ndarray):
+    """evaluate a sweep chunk in a worker process (the model is built once per process)"""
+    key = json.dumps(model_spec, sort_keys=True)
+    if key not in _worker_models:
+        from desmos2python.latex import DesmosLatexParser
+        _worker_models[key] = DesmosLatexParser(**model_spec).exec_pycode()()
+    return np.asarray(sweep(_worker_models[key], grid, output_keys=output_keys, x=x))
+
+
+def sweep_parallel(model_spec: Dict, grid: Dict[AnyStr, Sequence],
+                   output_keys: Sequence[AnyStr], x: Union[float, Sequence] = 0.0,
+                   workers: int = None, chunk_size: int = None) -> SweepResult:
+    """Evaluate a sweep in chunks (along the first parameter) across a process pool.
+
+    - model_spec : Dict : `DesmosLatexParser` keyword arguments (must be picklable),
+        e.g. {'lines': [...], 'codegen': 'array'}
+    - workers : number of worker processes (default: os.cpu_count())
+    - chunk_size : number of values of the first parameter per chunk (default: even split)
+    """
+    names = list(grid)
+    if len(names) == 0:
+        raise ValueError('sweep_parallel needs at least one parameter in `grid`')
+    values = {name: np.atleast_1d(np.asarray(grid[name], dtype=float)) for name in names}
+    x = np.atleast_1d(np.asarray(x, dtype=float))
+    output_keys = list(output_keys)
+    workers = workers or os.cpu_count() or 1
+    n_first = len(values[names[0]])
+    if chunk_size is None:
+        chunk_size = math.ceil(n_first / workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_sweep_chunk, model_spec,
+                        {**values, names[0]: values[names[0]][start:start + chunk_size]},
+                        output_keys, x)
+            for start in range(0, n_first, chunk_size)
+        ]
+        out = np.concatenate([future.result() for future in futures], axis=1)
+    coords = {'output': output_keys, **values, 'x': x}
+    return SweepResult(out, dims=['output', *names, 'x'], coords=coords)
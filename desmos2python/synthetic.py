@@ -0,0 +1,208 @@
+"""desmos2python synthetic (seeded) Desmos graphs, for scaling tests and benchmarks.
+
+Graphs are written as `latex_json` lists or calcState exports, e.g.
+
+>>> print('\\n'.join(synthetic_latex(4, n_params=2, depth=1, seed=1)))
+\\gamma_{0}=0.58
+p_{1}=1.00
+FA\\left(x\\right)=x\\cdot x
+FB\\left(x\\right)=FA\\left(\\gamma_{0}\\right)+\\left(p_{1}+\\gamma_{0}\\right)
+
+Expressions are restricted to what the conversion pipeline supports:
+
+- function names are (multi-)letter names, `FA`, `FB`, ... (! subscripted function names are
+  parsed as products)
+- parameters are latin/greek names with digit subscripts, e.g. `a_{12}`, `\\beta_{3}`
+- lists are parameters only (not used in equations, so models evaluate at any `x` shape)
+"""
+import json
+import random
+import string
+from os import PathLike
+from pathlib import Path
+from typing import AnyStr, Dict, List, Literal, NamedTuple, Optional, Union
+
+__all__ = [
+    'SyntheticGraph',
+    'synthetic_latex',
+    'synthetic_calc_state',
+    'write_synthetic_graph',
+]
+
+#: greek parameter names (! no `lambda`: a python keyword, no `pi`: a constant)
+GREEK_NAMES = (
+    'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta', 'kappa', 'mu',
+    'nu', 'xi', 'rho', 'sigma', 'tau', 'phi', 'chi', 'psi', 'omega',
+)
+
+#: latin parameter names (! no `x`: the function argument, no `e`: a constant)
+LATIN_NAMES = tuple(c for c in string.ascii_lowercase if c not in 'ex')
+
+#: elementary functions applied to subexpressions (! in the `latex2plain` subset, no pandoc needed)
+ELEMENTARY = ('sin', 'cos')
+
+#: output file formats
+FormatLiteral = Literal['latex_json', 'calc_state']
+
+#: calcState expression colors (Desmos defaults)
+COLORS = ('#c74440', '#2d70b3', '#388c46', '#6042a6', '#000000', '#fa7e19')
+
+
+class SyntheticExpression(NamedTuple):
+
+    """an expression (list item) of a synthetic graph"""
+
+    #: 'param', 'list' or 'function'
+    kind: str
+    latex: str
+    #: folder index (calcState only)
+    folder: Optional[int] = None
+
+
+class SyntheticGraph:
+
+    """Seeded synthetic Desmos graph.
+
+    - n_expressions : total number of expressions (parameters, lists and functions)
+    - n_params : number of (slider) parameters (default: a third of the expressions)
+    - depth : nesting depth of function bodies
+    - fan_in : number of earlier functions each function calls (composition)
+    - p_frac : probability of a `\\frac{...}{...}` node
+    - p_greek : probability of a greek parameter name (`\\alpha_{3}`)
+    - n_lists : number of list parameters (`c_{2}=\\left[1,2,3\\right]`)
+    - n_folders : number of folders that functions are put in (calcState only)
+    - seed : random seed (same arguments, same graph)
+    """
+
+    def __init__(self, n_expressions: int = 100, n_params: int = None, depth: int = 2,
+                 fan_in: int = 2, p_frac: float = 0.3, p_greek: float = 0.3, n_lists: int = 0,
+                 n_folders: int = 0, seed: int = 0):
+        if n_params is None:
+            n_params = max(1, n_expressions // 3)
+        if n_params + n_lists >= n_expressions:
+            raise ValueError('n_expressions must leave room for at least one function, got '
+                             f'{n_expressions} (n_params={n_params}, n_lists={n_lists})')
+        self.n_expressions, self.n_params, self.n_lists = n_expressions, n_params, n_lists
+        self.depth, self.fan_in, self.n_folders = depth, fan_in, n_folders
+        self.p_frac, self.p_greek = p_frac, p_greek
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.params: List[str] = []
+        self.functions: List[str] = []
+        self.expressions: List[SyntheticExpression] = self._generate()
+
+    @staticmethod
+    def function_name(j: int) -> str:
+        """`FA`, `FB`, ..., `FZ`, `FBA`, ..."""
+        letters = ''
+        while True:
+            j, r = divmod(j, 26)
+            letters = string.ascii_uppercase[r] + letters
+            if j == 0:
+                return 'F' + letters
+
+    def _param_name(self, j: int) -> str:
+        if self.rng.random() < self.p_greek:
+            return f'\\{self.rng.choice(GREEK_NAMES)}_{{{j}}}'
+        return f'{self.rng.choice(LATIN_NAMES)}_{{{j}}}'
+
+    def _leaf(self) -> str:
+        kind = self.rng.random()
+        if kind < 0.4:
+            return 'x'
+        if kind < 0.8:
+            return self.rng.choice(self.params)
+        return str(self.rng.randint(1, 9))
+
+    def _expr(self, depth: int) -> str:
+        """random expression (tree) of the given nesting depth"""
+        if depth <= 0:
+            return self._leaf()
+        a, b = self._expr(depth - 1), self._expr(depth - 1)
+        if self.rng.random() < self.p_frac:
+            #: ! positive denominator
+            return f'\\frac{{{a}}}{{1+\\exp\\left(-{b}\\right)}}'
+        kind = self.rng.choice(('add', 'mul', 'func'))
+        if kind == 'add':
+            return f'\\left({a}+{b}\\right)'
+        if kind == 'mul':
+            return f'{a}\\cdot {b}'
+        return f'\\{self.rng.choice(ELEMENTARY)}\\left({a}\\right)'
+
+    def _function(self, j: int) -> str:
+        name = SyntheticGraph.function_name(j)
+        callees = self.rng.sample(self.functions, k=min(self.fan_in, len(self.functions)))
+        terms = [f'{callee}\\left({self._expr(self.depth - 1)}\\right)' for callee in callees]
+        terms.append(self._expr(self.depth))
+        self.functions.append(name)
+        return f'{name}\\left(x\\right)=' + '+'.join(terms)
+
+    def _generate(self) -> List[SyntheticExpression]:
+        exprs = []
+        for j in range(self.n_params):
+            name = self._param_name(j)
+            self.params.append(name)
+            exprs.append(SyntheticExpression('param', f'{name}={self.rng.uniform(0.1, 2.0):.2f}'))
+        for j in range(self.n_lists):
+            values = ','.join(str(self.rng.randint(1, 9)) for _ in range(self.rng.randint(2, 5)))
+            exprs.append(SyntheticExpression(
+                'list', f'{self.rng.choice(LATIN_NAMES)}_{{{self.n_params + j}}}=\\left[{values}\\right]'))
+        n_functions = self.n_expressions - self.n_params - self.n_lists
+        for j in range(n_functions):
+            folder = j * self.n_folders // n_functions if self.n_folders > 0 else None
+            exprs.append(SyntheticExpression('function', self._function(j), folder))
+        return exprs
+
+    def latex_lines(self) -> List[str]:
+        """`latex_json` list"""
+        return [expr.latex for expr in self.expressions]
+
+    def calc_state(self) -> Dict:
+        """calcState (as exported by `Calc.getState()`), parameters have slider bounds"""
+        items = []
+        folders = {k: [] for k in range(self.n_folders)}
+        for j, expr in enumerate(self.expressions):
+            item = {'type': 'expression', 'id': str(j + 1), 'color': COLORS[j % len(COLORS)],
+                    'latex': expr.latex}
+            if expr.kind == 'param':
+                item['sliderBounds'] = {'min': '0', 'max': '2', 'step': ''}
+            if expr.folder is None:
+                items.append(item)
+            else:
+                item['folderId'] = f'folder{expr.folder}'
+                folders[expr.folder].append(item)
+        #: ! folder members follow their folder
+        for k, members in folders.items():
+            items += [{'type': 'folder', 'id': f'folder{k}', 'title': f'folder {k}'}] + members
+        return {
+            'version': 9,
+            'randomSeed': f'{self.seed:032x}',
+            'graph': {'viewport': {'xmin': -10, 'ymin': -10, 'xmax': 10, 'ymax': 10}},
+            'expressions': {'list': items},
+        }
+
+
+def synthetic_latex(n_expressions: int = 100, **kwds) -> List[str]:
+    """seeded synthetic `latex_json` list (see `SyntheticGraph` for the keyword arguments)"""
+    return SyntheticGraph(n_expressions=n_expressions, **kwds).latex_lines()
+
+
+def synthetic_calc_state(n_expressions: int = 100, **kwds) -> Dict:
+    """seeded synthetic calcState (see `SyntheticGraph` for the keyword arguments)"""
+    return SyntheticGraph(n_expressions=n_expressions, **kwds).calc_state()
+
+
+def write_synthetic_graph(fpath: Union[AnyStr, PathLike], fmt: FormatLiteral = 'latex_json',
+                          n_expressions: int = 100, **kwds) -> Path:
+    """write a synthetic graph to a JSON file (`latex_json` list or calcState)"""
+    graph = SyntheticGraph(n_expressions=n_expressions, **kwds)
+    if fmt == 'latex_json':
+        data = graph.latex_lines()
+    elif fmt == 'calc_state':
+        data = graph.calc_state()
+    else:
+        raise ValueError(f"fmt must be 'latex_json' or 'calc_state', got '{fmt}'")
+    fpath = Path(fpath)
+    fpath.parent.mkdir(parents=True, exist_ok=True)
+    fpath.write_text(json.dumps(data, indent=4))
+    return fpath
@@ -0,0 +1,155 @@
+"""desmos2python shared jinja2 template registry.
+
+One `jinja2.Environment` per template directory for the whole process, each template is
+parsed and compiled once (`get_template`), e.g.
+
+>>> registry.get_template('desmos_model_ns.jinja2') is registry.get_template('desmos_model_ns.jinja2')
+True
+
+Templates can optionally be loaded from precompiled python modules (`Environment.compile_templates`),
+written to the user cache directory on first use and keyed by a hash of the template sources
+and the jinja2 version (! enable with `precompiled=True` or `D2P_PRECOMPILED_TEMPLATES=1`).
+"""
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from os import PathLike
+from pathlib import Path
+from typing import AnyStr, Dict, Tuple, Union
+import jinja2
+from jinja2 import Environment, FileSystemLoader, ModuleLoader, Template
+from desmos2python.utils import D2P_Resources
+
+__all__ = [
+    'TemplateRegistry',
+    'registry',
+    'get_template',
+    'render_template',
+]
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateRegistry:
+
+    """Process-wide cache of jinja2 environments and compiled templates.
+
+    - precompiled : load templates from precompiled modules in `cache_dir` (default: `D2P_PRECOMPILED_TEMPLATES`)
+    - cache_dir : root directory of the precompiled template modules
+    """
+
+    #: package templates directory (`resources/templates`)
+    default_templates_dir = D2P_Resources \
+        .get_package_resources_path() \
+        .joinpath('templates')
+
+    #: default location of the precompiled template modules
+    default_cache_dir = D2P_Resources \
+        .get_user_resources_path() \
+        .joinpath('cache', 'templates')
+
+    #: template file suffixes (! other files in the templates directory are not compiled)
+    suffixes = ('.jinja2',)
+
+    def __init__(self, precompiled: bool = None, cache_dir: Union[AnyStr, PathLike] = None):
+        if precompiled is None:
+            precompiled = os.environ.get('D2P_PRECOMPILED_TEMPLATES', '') not in ('', '0')
+        if cache_dir is None:
+            cache_dir = TemplateRegistry.default_cache_dir
+        self.precompiled = precompiled
+        self.cache_dir = Path(cache_dir)
+        self._envs: Dict[Path, Environment] = {}
+        self._templates: Dict[Tuple[Path, str], Template] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_env(loader: jinja2.BaseLoader) -> Environment:
+        """! `auto_reload=False`: templates are not re-stat'ed on every `get_template`"""
+        return Environment(autoescape=False, optimized=True, auto_reload=False, loader=loader)
+
+    def digest(self, templates_dir: Path) -> AnyStr:
+        """content hash of the templates in `templates_dir` (and the jinja2 version)"""
+        h = hashlib.sha256(jinja2.__version__.encode())
+        for fpath in sorted(templates_dir.iterdir()):
+            if fpath.suffix in TemplateRegistry.suffixes:
+                h.update(fpath.name.encode())
+                h.update(fpath.read_bytes())
+        return h.hexdigest()[:16]
+
+    def precompile(self, templates_dir: Union[AnyStr, PathLike] = None) -> Path:
+        """compile the templates of `templates_dir` to python modules (if not done already).
+
+        returns : Path : directory of the precompiled modules (for `jinja2.ModuleLoader`)
+        """
+        templates_dir = Path(templates_dir or TemplateRegistry.default_templates_dir).resolve()
+        target = self.cache_dir.joinpath(self.digest(templates_dir))
+        if target.is_dir():
+            return target
+        env = TemplateRegistry.make_env(FileSystemLoader(searchpath=[templates_dir]))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        #: ! compile to a temporary directory and rename, concurrent processes never see partial output
+        tmpdir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            env.compile_templates(tmpdir, zip=None, ignore_errors=False,
+                                  filter_func=lambda name: name.endswith(TemplateRegistry.suffixes))
+            os.replace(tmpdir, target)
+        except OSError:
+            #: another process won the race
+            if not target.is_dir():
+                raise
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        return target
+
+    def environment(self, templates_dir: Union[AnyStr, PathLike] = None) -> Environment:
+        """shared environment of a templates directory (default: the package templates)"""
+        templates_dir = Path(templates_dir or TemplateRegistry.default_templates_dir).resolve()
+        env = self._envs.get(templates_dir)
+        if env is not None:
+            return env
+        with self._lock:
+            if templates_dir not in self._envs:
+                loader = FileSystemLoader(searchpath=[templates_dir])
+                if self.precompiled is True:
+                    try:
+                        loader = jinja2.ChoiceLoader([ModuleLoader(self.precompile(templates_dir)), loader])
+                    except Exception:
+                        logger.warning(f"failed to precompile templates in '{templates_dir}'.", exc_info=1)
+                self._envs[templates_dir] = TemplateRegistry.make_env(loader)
+        return self._envs[templates_dir]
+
+    def get_template(self, name: AnyStr, templates_dir: Union[AnyStr, PathLike] = None) -> Template:
+        """compiled template (compiled once per process)"""
+        key = (Path(templates_dir or TemplateRegistry.default_templates_dir).resolve(), name)
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates.setdefault(key, self.environment(key[0]).get_template(name))
+        return template
+
+    def get_template_fpath(self, fpath: Union[AnyStr, PathLike]) -> Template:
+        """compiled template of a template file (in any directory)"""
+        fpath = Path(fpath)
+        return self.get_template(fpath.name, templates_dir=fpath.parent)
+
+    def clear(self):
+        """drop the compiled templates (e.g. after editing a template)"""
+        with self._lock:
+            self._envs.clear()
+            self._templates.clear()
+
+
+#: process-wide registry
+registry = TemplateRegistry()
+
+
+def get_template(name: AnyStr, templates_dir: Union[AnyStr, PathLike] = None) -> Template:
+    """compiled template from the process-wide `registry`"""
+    return registry.get_template(name, templates_dir=templates_dir)
+
+
+def render_template(name: AnyStr, templates_dir: Union[AnyStr, PathLike] = None, **template_vars) -> str:
+    """render a template from the process-wide `registry`"""
+    return registry.get_template(name, templates_dir=templates_dir).render(**template_vars)
@@ -1,13 +1,19 @@
 """utils.py
 """
+from os import PathLike
 from pathlib import Path
 import importlib.resources
+import importlib.util
 
 __all__ = [
     'flatten', 'flatten_list', 'flatten_nested_list',
     'D2P_Resources',
+    'load_model',
 ]
 
+#: desmos2python output file suffix (executable model python code)
+d2p_suffix = '.d2p.py'
+
 
 def flatten(l):
     """flatten nested list.
@@ -39,3 +45,18 @@ class D2P_Resources:
     @staticmethod
     def get_package_resources_path():
         return importlib.resources.path("desmos2python.resources", ".")
+
+
+def load_model(fpath: PathLike):
+    """Import an exported (`.d2p.py`) model, return the model namespace class.
+
+    ...imports from the file, so numba kernels are cached next to the model (`__pycache__`).
+    ! only needs numpy (not sympy, jinja2, ...): cheap to use in worker processes.
+    """
+    import desmos2python.consts  # ! numerical constants -> builtins
+    fpath = Path(fpath)
+    module_name = fpath.name.replace(d2p_suffix, '').replace('.', '_')
+    spec = importlib.util.spec_from_file_location(f'd2p_models.{module_name}', fpath)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.get_desmos_ns()
@@ -0,0 +1,26 @@
+# coding: utf-8
+"""Per-call overhead of generated equations: fast-call closures vs. per-call `globals()` updates.
+
+usage: python scripts/benchmark_fastcall.py [n_params] [n_calls]
+"""
+import sys
+import timeit
+import logging
+from desmos2python import DesmosLatexParser
+
+logging.disable(logging.WARNING)
+
+n_params = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+n_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+
+lines = [r'E\left(x\right)=\frac{1}{1+\exp\left(-2x\right)}'] + \
+    [f'a_{{{j}}}={j}' for j in range(n_params)] + \
+    [r'F\left(x\right)=E\left(a_{0}\cdot\left(1+a_{1}\right)\cdot x \right)']
+
+for fastcall in (False, True):
+    ns = DesmosLatexParser(lines=lines, fastcall=fastcall).exec_pycode()()
+    for func_name in ('E', 'F'):
+        func = getattr(ns, func_name)
+        t = timeit.timeit(lambda: func(0.5), number=n_calls)
+        print(f'fastcall={fastcall!s:5} {func_name}(0.5) : {1e6 * t / n_calls:8.3f} us/call'
+              f' ({n_params} parameters)')
@@ -0,0 +1,209 @@
+# coding: utf-8
+"""Per-stage micro-benchmarks of the latex -> python conversion pipeline.
+
+Times each stage separately (on `ex.json` and larger synthetic graphs), with the line and
+model caches disabled (unless `--cache`), and saves the results to JSON:
+
+- read_latex_lines, convert2plain, greek.convert, parse_latex_lines2sympy, fix_raw_pycode
+- calc_pycode_environment, template render, exec_pycode
+- DesmosModelNS evaluation (every output) at 1, 10^3 and 10^6 points
+
+`scale` measures compile time and peak memory of synthetic graphs (`desmos2python.synthetic`)
+from 10 to 5,000 expressions. `compare` flags regressions (slower than the baseline by more
+than `--threshold`).
+
+usage:
+    python scripts/benchmark_stages.py run [-o results.json] [--sizes 10 100] [--compare baseline.json]
+    python scripts/benchmark_stages.py scale [-o scaling.json] [--sizes 10 100 1000 5000]
+    python scripts/benchmark_stages.py compare baseline.json results.json [--threshold 0.25]
+"""
+import sys
+import json
+import time
+import timeit
+import tracemalloc
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+from pathlib import Path
+import numpy as np
+
+logging.disable(logging.WARNING)
+
+#: evaluation sizes (number of points)
+POINTS = (1, 10 ** 3, 10 ** 6)
+
+#: default allowed slowdown (fraction of the baseline time) before flagging a regression
+THRESHOLD = 0.25
+
+
+def time_case(func, repeat: int = 5, min_time: float = 0.05) -> dict:
+    """per-call timings (seconds) of `func()`: min/median over `repeat` runs of `number` calls"""
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        t = timer.timeit(number)
+        if t >= min_time or number >= 10 ** 6:
+            break
+        number *= 10
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {'min': min(runs), 'median': statistics.median(runs), 'number': number, 'repeat': repeat}
+
+
+def bench_graph(label: str, lines: list, repeat: int = 5, points=POINTS) -> dict:
+    """time each pipeline stage for a graph (given as a list of latex lines)"""
+    from desmos2python.latex import (
+        DesmosLatexParser, read_latex_lines, parse_latex_lines2sympy, fix_raw_pycode)
+    from desmos2python.pdoc import convert2plain_batch
+    from desmos2python.resources import greek
+    results = {}
+
+    def _case(stage, func, **kwds):
+        results[f'{label}/{stage}'] = time_case(func, repeat=repeat, **kwds)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        fpath = Path(tmpdir).joinpath(f'{label}.json')
+        fpath.write_text(json.dumps(lines))
+        _case('read_latex_lines', lambda: read_latex_lines(fpath))
+    dlp = DesmosLatexParser(lines=lines)
+    _case('convert2plain', lambda: convert2plain_batch(lines))
+    plain_lines = list(dlp.plain_lines)
+    _case('greek.convert', lambda: [greek.convert(l, infmt='unicode', outfmt='plain') for l in plain_lines])
+    _case('parse_latex_lines2sympy', lambda: parse_latex_lines2sympy(lines), min_time=0.0)
+    pycode_lines = list(dlp.pycode_lines)
+    _case('fix_raw_pycode', lambda: [fix_raw_pycode(l) for l in pycode_lines])
+    _case('calc_pycode_environment', dlp.calc_pycode_environment)
+    template_vars = dlp.template_vars = dlp.calc_pycode_environment()
+    _case('render', lambda: dlp.template.render(**template_vars))
+    dlp.pycode_compiled
+    _case('exec_pycode', dlp.exec_pycode)
+    dmn = dlp.exec_pycode()()
+    for n in points:
+        x = np.linspace(0, 1, num=n)
+        _case(f'eval[{n}]', lambda: [getattr(dmn, key)(x) for key in dmn.output_keys],
+              min_time=0.0 if n >= 10 ** 6 else 0.05)
+    return results
+
+
+def run(sizes=(10, 100), repeat: int = 5, points=POINTS, cache: bool = False) -> dict:
+    from desmos2python.cache import line_cache, model_cache
+    from desmos2python.latex import get_filepath, read_latex_lines
+    from desmos2python.synthetic import synthetic_latex
+    import desmos2python
+    line_cache.enabled = model_cache.enabled = cache
+    graphs = {'ex': read_latex_lines(get_filepath(pattern='ex'))}
+    #: ! fan_in=1: a chain of compositions, evaluation cost stays linear in the size
+    graphs.update({f'synthetic_{n}': synthetic_latex(n, fan_in=1, seed=0) for n in sizes})
+    results = {}
+    for label, lines in graphs.items():
+        t = time.perf_counter()
+        results.update(bench_graph(label, lines, repeat=repeat, points=points))
+        print(f'...{label} ({len(lines)} lines): {time.perf_counter() - t:.1f} s', file=sys.stderr)
+    return {
+        'meta': {
+            'version': getattr(desmos2python, '__version__', None),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'cache': cache,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def scale(sizes=(10, 100, 1000, 5000), seed: int = 0, cache: bool = False) -> dict:
+    """compile time and peak (python) memory of synthetic graphs, by number of expressions"""
+    from desmos2python.cache import line_cache, model_cache
+    from desmos2python.latex import DesmosLatexParser
+    from desmos2python.synthetic import synthetic_latex
+    line_cache.enabled = model_cache.enabled = cache
+    results = {}
+    for n in sizes:
+        lines = synthetic_latex(n, seed=seed)
+        t = time.perf_counter()
+        DesmosLatexParser(lines=lines).pycode_compiled
+        dt = time.perf_counter() - t
+        #: ! separate run: tracemalloc slows down allocations
+        tracemalloc.start()
+        DesmosLatexParser(lines=lines).pycode_compiled
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[f'scale/compile[{n}]'] = {'min': dt, 'median': dt, 'number': 1, 'repeat': 1,
+                                          'peak_bytes': peak}
+        print(f'...{n} expressions: {dt:.2f} s, {peak / 1024 ** 2:.1f} MiB peak', file=sys.stderr)
+    return {'meta': {'python': platform.python_version(), 'seed': seed, 'cache': cache,
+                     'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results}
+
+
+def compare(baseline: dict, current: dict, threshold: float = THRESHOLD) -> list:
+    """[(case, baseline min, current min, ratio, regressed), ...] for cases in both results"""
+    rows = []
+    for case, base in baseline['results'].items():
+        if case not in current['results']:
+            continue
+        ratio = current['results'][case]['min'] / base['min']
+        rows.append((case, base['min'], current['results'][case]['min'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def print_results(results: dict):
+    width = max(len(case) for case in results['results'])
+    for case, res in results['results'].items():
+        print(f"{case:<{width}}  {1e6 * res['min']:14.3f} us  (median {1e6 * res['median']:.3f} us)")
+
+
+def print_comparison(rows: list, threshold: float) -> int:
+    width = max([len(row[0]) for row in rows] + [4])
+    print(f"{'case':<{width}}  {'baseline':>14}  {'current':>14}  {'ratio':>7}")
+    for case, base, cur, ratio, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{case:<{width}}  {1e6 * base:11.3f} us  {1e6 * cur:11.3f} us  {ratio:7.2f}{flag}')
+    n_regressed = sum(row[-1] for row in rows)
+    print(f'{n_regressed} regression(s) (threshold: +{100 * threshold:.0f}%)')
+    return 1 if n_regressed > 0 else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    p_run = subparsers.add_parser('run', help='run the benchmarks')
+    p_run.add_argument('-o', '--output', default=None, help='save results to this JSON file')
+    p_run.add_argument('--sizes', type=int, nargs='*', default=[10, 100],
+                       help='synthetic graph sizes (number of expressions)')
+    p_run.add_argument('--points', type=int, nargs='*', default=list(POINTS))
+    p_run.add_argument('--repeat', type=int, default=5)
+    p_run.add_argument('--cache', action='store_true', help='keep the line/model caches enabled')
+    p_run.add_argument('--compare', default=None, metavar='BASELINE', help='compare to a baseline JSON file')
+    p_run.add_argument('--threshold', type=float, default=THRESHOLD)
+    p_scale = subparsers.add_parser('scale', help='compile time/memory of synthetic graphs by size')
+    p_scale.add_argument('-o', '--output', default=None, help='save results to this JSON file')
+    p_scale.add_argument('--sizes', type=int, nargs='*', default=[10, 100, 1000, 5000])
+    p_scale.add_argument('--seed', type=int, default=0)
+    p_scale.add_argument('--cache', action='store_true', help='keep the line/model caches enabled')
+    p_cmp = subparsers.add_parser('compare', help='compare two result files')
+    p_cmp.add_argument('baseline')
+    p_cmp.add_argument('current')
+    p_cmp.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        baseline, current = (json.loads(Path(p).read_text()) for p in (args.baseline, args.current))
+        return print_comparison(compare(baseline, current, args.threshold), args.threshold)
+    if args.command == 'scale':
+        results = scale(sizes=args.sizes, seed=args.seed, cache=args.cache)
+    else:
+        results = run(sizes=args.sizes, repeat=args.repeat, points=args.points, cache=args.cache)
+    if args.output is not None:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    print_results(results)
+    if getattr(args, 'compare', None) is not None:
+        baseline = json.loads(Path(args.compare).read_text())
+        return print_comparison(compare(baseline, results, args.threshold), args.threshold)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
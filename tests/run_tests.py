@@ -14,6 +14,71 @@ rpath = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(
 if rpath not in sys.path:
     sys.path.insert(0, rpath)
 
+#: ! temporary line/model caches (the suite never touches `~/.desmos2python/cache`)
+_cache_tmpdir = None
+
+
+def setUpModule():
+    global _cache_tmpdir
+    import tempfile
+    from desmos2python.cache import line_cache, model_cache
+    _cache_tmpdir = tempfile.TemporaryDirectory()
+    line_cache.__init__(cache_dir=Path(_cache_tmpdir.name, 'lines'), enabled=True)
+    model_cache.__init__(cache_dir=Path(_cache_tmpdir.name, 'models'), enabled=True)
+
+
+def tearDownModule():
+    from desmos2python.cache import line_cache, model_cache
+    line_cache.__init__()
+    model_cache.__init__()
+    _cache_tmpdir.cleanup()
+
+
+class FakeWebDriver:
+
+    """stand-in for `selenium.webdriver.Firefox` (no browser needed)"""
+
+    def __init__(self, expressions=None):
+        self.expressions = expressions if expressions is not None else [
+            {'latex': 'a=2', 'lineStyle': 'SOLID'}]
+        self.current_url, self.title = None, 'fake graph'
+        self.crashed, self.quit_called = False, False
+        self.n_get, self.n_scripts = 0, 0
+
+    def get(self, url):
+        self.current_url = url
+        self.n_get += 1
+
+    def execute_script(self, script):
+        from selenium.common import WebDriverException
+        if self.crashed:
+            raise WebDriverException('browser crashed')
+        self.n_scripts += 1
+        if script.strip() == 'return 1':
+            return 1
+        if 'typeof Calc' in script or 'svg !== null;' in script:
+            return True
+        if 'calcState:' in script:
+            return {'expressions': self.expressions, 'svg': '<svg></svg>',
+                    'calcState': {'version': 9, 'expressions': {'list': self.expressions}}}
+        if 'getExpressions' in script:
+            return self.expressions
+        return '<svg></svg>'
+
+    def execute_async_script(self, script, *args):
+        from selenium.common import JavascriptException
+        self.n_scripts += 1
+        if 'Calc.setState(arguments[0])' in script:
+            if 'expressions' not in args[0]:
+                raise JavascriptException('invalid state')
+            return {'expressions': args[0]['expressions']['list'], 'svg': f'<svg>{len(args[0])}</svg>'}
+
+    def set_script_timeout(self, timeout):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
 
 class TestDesmosWebSession(unittest.TestCase):
     def testDWS(self):
@@ -65,6 +130,649 @@ class TestDesmos2Python(unittest.TestCase):
         self.dlp = dlp
         self.dmn = dmn
 
+    def testCodegenModes(self):
+        from desmos2python import DesmosLatexParser
+        x = np.linspace(0, 24, num=100)
+        dmn = DesmosLatexParser(codegen='array').exec_pycode()()
+        dmn_vec = DesmosLatexParser(codegen='vectorize').exec_pycode()()
+        self.assertEqual(dmn.func_modes, {'E': 'array', 'F': 'array'})
+        self.assertEqual(dmn_vec.func_modes, {'E': 'vectorize', 'F': 'vectorize'})
+        np.testing.assert_allclose(dmn.F(x), dmn_vec.F(x))
+        dmn.alpha_m = dmn_vec.alpha_m = 2.0
+        np.testing.assert_allclose(dmn.F(x), dmn_vec.F(x))
+
+    def testCodegenConstantBody(self):
+        from desmos2python import DesmosLatexParser
+        x = np.linspace(0, 1, num=5)
+        lines = ['a=2', r'G\left(x\right)=a', r'H\left(x\right)=G\left(x\right)+x']
+        for fastcall, cse in ((True, False), (False, False), (True, True)):
+            with self.subTest(fastcall=fastcall, cse=cse):
+                dmn = DesmosLatexParser(lines=lines, codegen='array', fastcall=fastcall,
+                                        cse=cse).exec_pycode()()
+                #: ! `G(x)=a` doesn't use `x`: broadcast, callers stay array-native
+                self.assertEqual(dmn.func_modes, {'G': 'array', 'H': 'array'})
+                np.testing.assert_allclose(dmn.G(x), np.full_like(x, 2))
+                np.testing.assert_allclose(dmn.H(x), 2 + x)
+                if cse is True:
+                    np.testing.assert_allclose(dmn.outputs(x)['G'], np.full_like(x, 2))
+
+    def testFastCall(self):
+        from desmos2python import DesmosLatexParser
+        x = np.linspace(0, 24, num=100)
+        dlp = DesmosLatexParser(fastcall=True)
+        Model = dlp.exec_pycode()
+        self.assertNotIn('globals()', dlp.pycode_string)
+        dmn_slow = DesmosLatexParser(fastcall=False).exec_pycode()()
+        dmn, dmn2 = Model(), Model(alpha_m=2.0)
+        np.testing.assert_allclose(dmn.F(x), dmn_slow.F(x))
+        dmn_slow.alpha_m = 2.0
+        #: ! instances don't share parameters
+        np.testing.assert_allclose(dmn2.F(x), dmn_slow.F(x))
+        self.assertFalse(np.allclose(dmn.F(x), dmn2.F(x)))
+
+    def testFastCallMultiArg(self):
+        from desmos2python import DesmosLatexParser
+        lines = ['b=3', r'L\left(x,y\right)=x\cdot y+b']
+        x, y = np.linspace(0, 1, num=5), np.linspace(1, 2, num=5)
+        for fastcall in (True, False):
+            with self.subTest(fastcall=fastcall):
+                dlp = DesmosLatexParser(lines=lines, fastcall=fastcall)
+                self.assertEqual(dlp.fixed_lines[1]['func_args'], ['x', 'y'])
+                dmn = dlp.exec_pycode()()
+                np.testing.assert_allclose(dmn.L(x, y), x * y + 3)
+
+    def testDAG(self):
+        from desmos2python import DesmosLatexParser
+        dlp = DesmosLatexParser(cse=True)
+        dmn = dlp.exec_pycode()(alpha_m=2.0)
+        self.assertEqual(dlp.dag.deps, {'E': [], 'F': ['E', 'alpha_m']})
+        self.assertIn('"E" -> "F";', dlp.dag.dump(fmt='dot'))
+        report = dlp.cse_report
+        self.assertEqual(report['outputs'], ['E', 'F'])
+        self.assertEqual(report['ops_eliminated'], report['ops_before'] - report['ops_after'])
+        x = np.linspace(0, 24, num=100)
+        outputs = dmn.outputs(x)
+        np.testing.assert_allclose(outputs['E'], dmn.E(x))
+        np.testing.assert_allclose(outputs['F'], dmn.F(x))
+
+    def testUpdateLines(self):
+        from desmos2python import DesmosLatexParser
+        dlp = DesmosLatexParser()
+        lines = list(dlp.latex_lines)
+        self.assertEqual(len(dlp.fixed_lines), 3)
+        new_lines = [lines[0], r'\alpha_{m}=3', lines[2], r'G\left(x\right)=2\cdot x']
+        stats = dlp.update_lines(new_lines)
+        self.assertEqual(stats, {'reused': 2, 'converted': 2, 'removed': 1})
+        dmn = dlp.exec_pycode()()
+        dmn_full = DesmosLatexParser(lines=new_lines).exec_pycode()()
+        self.assertEqual(dmn.alpha_m, 3)
+        self.assertEqual(dmn.output_keys, ('E', 'F', 'G'))
+        np.testing.assert_allclose(dmn.F(0.5), dmn_full.F(0.5))
+
+    def testSympyWorkers(self):
+        import desmos2python.latex as latex
+        from desmos2python import DesmosLatexParser
+        lines = list(DesmosLatexParser().latex_lines) + [r'b=\left[1...3\right]']
+        latex.line_cache.enabled = False
+        try:
+            serial = latex.parse_latex_lines2sympy(lines)
+            pooled = DesmosLatexParser(lines=lines, workers=2).sympy_lines.lines
+            pool = latex._sympy_pool
+            latex.parse_latex_lines2sympy(lines, workers=2)
+        finally:
+            latex.line_cache.enabled = True
+        #: ! same order, same (unevaluated) expressions, desmos_list fallback kept
+        self.assertEqual([str(line) for line in pooled], [str(line) for line in serial])
+        self.assertEqual(pooled[-1], r'b=\left[1...3\right]')
+        self.assertIsNotNone(pool)
+        self.assertIs(latex._sympy_pool, pool)
+
+    def testBatchUpdate(self):
+        from desmos2python import DesmosLatexParser
+        dmn = DesmosLatexParser(codegen='vectorize').exec_pycode()()
+        self.assertEqual(dmn.param_deps, {'alpha_m': ('F', )})
+        E = dmn.E
+        F = dmn.F
+        with dmn.batch_update():
+            dmn.alpha_m = 3.0
+            self.assertIs(dmn.F, F)
+        self.assertIs(dmn.E, E)
+        self.assertIsNot(dmn.F, F)
+        dmn.set_params(alpha_m=2.0)
+        self.assertAlmostEqual(float(dmn.F(0.5)), float(dmn.E(3.0)))
+        with self.assertRaises(ValueError):
+            dmn.set_params(beta=1.0)
+
+    def testNumbaBackend(self):
+        from desmos2python import DesmosLatexParser
+        try:
+            import numba
+        except ModuleNotFoundError:
+            self.skipTest('numba is not installed')
+        x = np.linspace(0, 24, num=100)
+        dmn = DesmosLatexParser().exec_pycode()()
+        dmn_nb = DesmosLatexParser(backend='numba').exec_pycode()()
+        self.assertEqual(dmn_nb.func_modes, {'E': 'numba', 'F': 'numba'})
+        np.testing.assert_allclose(dmn.F(x), dmn_nb.F(x))
+        dmn.alpha_m = dmn_nb.alpha_m = 2.0
+        np.testing.assert_allclose(dmn.F(x), dmn_nb.F(x))
+
+    def testNumbaMultiArg(self):
+        from desmos2python import DesmosLatexParser
+        from desmos2python.latex import numba_kernel_equations
+        try:
+            import numba
+        except ModuleNotFoundError:
+            self.skipTest('numba is not installed')
+        lines = ['b=3', r'L\left(x,y\right)=x\cdot y+b', r'M\left(x\right)=L\left(x,2\right)']
+        dlp = DesmosLatexParser(lines=lines, backend='numba')
+        equations = [line for line in dlp.fixed_lines if line is not None and line.get('func_name') != '']
+        kernels = {eqn['func_name']: eqn for eqn in numba_kernel_equations(equations, params=['b'])}
+        self.assertEqual(kernels['L']['kernel_args'], ['x', 'y', 'b'])
+        dmn = dlp.exec_pycode()()
+        x = np.linspace(0, 2, num=5)
+        np.testing.assert_allclose(dmn.L(x, x), x * x + 3)
+        np.testing.assert_allclose(dmn.M(x), 2 * x + 3)
+
+
+class TestLatex2Plain(unittest.TestCase):
+    def testSubset(self):
+        from desmos2python.latex2plain import latex2plain
+        self.assertEqual(latex2plain(r'\alpha_{m}=1'), 'α_(m)=1')
+        self.assertEqual(latex2plain(r'x_{12}\cdot\mu_{0}'), 'x₁₂⋅μ₀')
+        self.assertEqual(latex2plain(r'\operatorname{mod}\left(x,2\right)'), 'mod(x,2)')
+        self.assertEqual(latex2plain(r'\frac{\alpha_{m}}{2}'), '((α_(m))/(2))')
+        self.assertIsNone(latex2plain(r'\sqrt{x}'))
+
+    def testConvertPaths(self):
+        from desmos2python.pdoc import convert2plain, convert2plain_paths, line_cache
+        counts = dict(convert2plain_paths)
+        line_cache.enabled = False
+        try:
+            self.assertEqual(convert2plain(r'E\left(x\right)=\frac{1}{1+\exp\left(-2x\right)}'),
+                             'E(x)=((1)/(1+exp(−2*x)))')
+        finally:
+            line_cache.enabled = True
+        self.assertEqual(convert2plain_paths['native'], counts.get('native', 0) + 1)
+        self.assertEqual(convert2plain_paths['pandoc'], counts.get('pandoc', 0))
+
+    def testBatch(self):
+        from desmos2python.pdoc import convert2plain, convert2plain_batch
+        lines = [r'\alpha_{m}=1', r'y=x^{a+1}', r'F\left(x\right)=\frac{x}{2}', r'z=a^{2}']
+        self.assertEqual(convert2plain_batch(lines),
+                         [convert2plain(line) for line in lines])
+
+
+class TestGreekChars(unittest.TestCase):
+    def testConvert(self):
+        from desmos2python.resources.greek_chars import greek, convert_greek_chars
+        self.assertEqual(greek.convert(r'\alpha_{m}+\Omega\cdot x', infmt='latex', outfmt='plain'),
+                         ('alpha_{m}+Omega\\cdot x', {'\\alpha': 'alpha', '\\Omega': 'Omega'}))
+        self.assertEqual(greek.convert('α*β', infmt='unicode', outfmt='latex', ignore=['β']),
+                         ('\\alpha*β', {'α': '\\alpha'}))
+        self.assertEqual(convert_greek_chars('μ₀', infmt='unicode'), ('\\mu₀', {'μ': '\\mu'}))
+        self.assertEqual(greek.get_from_unicode('λ'), 'lamda')
+        with self.assertRaises(RuntimeError):
+            greek.get_from_unicode('x')
+
+
+class TestFixRawPycode(unittest.TestCase):
+    def testGolden(self):
+        import json
+        from desmos2python.latex import fix_raw_pycode_line
+        #: ! fix_raw_pycode outputs for the sample graphs, doctest lines and multi-arg functions
+        golden = json.loads(Path(__file__).parent.joinpath('golden_fix_raw_pycode.json')
+                            .read_text(encoding='utf-8'))
+        for case in golden:
+            with self.subTest(line=case['line'], retfull=case['retfull']):
+                self.assertEqual(fix_raw_pycode_line(case['line'], retfull=case['retfull']),
+                                 case['expected'])
+
+
+class TestLineCache(unittest.TestCase):
+    def testLookupStoreEvict(self):
+        import tempfile
+        from desmos2python.cache import LineCache
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = LineCache(cache_dir=tmpdir, enabled=True)
+            self.assertIsNone(cache.lookup('convert2plain', r'\alpha_{m}=1'))
+            cache.store('convert2plain', r'\alpha_{m}=1', 'alpha_(m)=1')
+            cache.store('parse_latex_lines2sympy', 'x=', error='LaTeXParsingError: ...')
+            #: ! runs of latex whitespace are normalized
+            self.assertEqual(cache.lookup('convert2plain', ' \\alpha_{m}=1\n').value, 'alpha_(m)=1')
+            self.assertEqual(cache.lookup('parse_latex_lines2sympy', 'x=').error, 'LaTeXParsingError: ...')
+            stats = cache.stats()
+            self.assertEqual(stats['convert2plain']['hit_rate'], 0.5)
+            self.assertEqual(stats['parse_latex_lines2sympy']['failure_hits'], 1)
+            self.assertEqual(cache.evict(max_bytes=0), 2)
+            self.assertIsNone(cache.lookup('convert2plain', r'\alpha_{m}=1'))
+
+    def testNormalizeCollisions(self):
+        from desmos2python.cache import LineCache
+        #: ! significant whitespace: `\text{...}` contents, explicit spaces, word boundaries
+        for line, other in ((r'\text{a b}', r'\text{ab}'), (r'\text{a b}', r'\text{a  b}'),
+                            (r'x\ y', r'x\y'), (r'\alpha x', r'\alphax'), ('a b', 'ab')):
+            with self.subTest(line=line, other=other):
+                self.assertNotEqual(LineCache.key('convert2plain', line), LineCache.key('convert2plain', other))
+        self.assertEqual(LineCache.key('convert2plain', 'a  +\tb'), LineCache.key('convert2plain', ' a + b '))
+
+    def testSympyFunctionLine(self):
+        from desmos2python import DesmosLatexParser
+        from desmos2python.latex import line_cache
+        #: ! undefined functions (e.g. `K(x)`) aren't picklable, cached as srepr
+        lines = ['b=3', r'K\left(x\right)=3x+b']
+        first = DesmosLatexParser(lines=lines).sympy_lines.lines
+        hits = line_cache.hits('parse_latex_lines2sympy')
+        second = DesmosLatexParser(lines=lines).sympy_lines.lines
+        self.assertEqual(line_cache.hits('parse_latex_lines2sympy'), hits + 2)
+        self.assertEqual(str(second), str(first))
+
+
+class TestModelCache(unittest.TestCase):
+    def testPycodeAndCode(self):
+        import tempfile
+        from desmos2python.cache import ModelCache
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = ModelCache(cache_dir=tmpdir, enabled=True)
+            key = ModelCache.key(['a=1'], 'DesmosModelNS')
+            self.assertNotEqual(key, ModelCache.key(['a=2'], 'DesmosModelNS'))
+            self.assertIsNone(cache.lookup_pycode(key))
+            cache.store_pycode(key, 'a = 1\n')
+            cache.store_code(key, compile('a = 1\n', '<DesmosModelNS>', 'exec'))
+            self.assertEqual(cache.lookup_pycode(key), 'a = 1\n')
+            namespace = {}
+            exec(cache.lookup_code(key), namespace)
+            self.assertEqual(namespace['a'], 1)
+            self.assertEqual(cache.stats()['hits'], 2)
+
+
+class TestImportTime(unittest.TestCase):
+    #: import budget (seconds) for `import desmos2python`
+    budget = 0.25
+
+    def testLazyImport(self):
+        import json
+        import subprocess
+        code = ';'.join([
+            'import json, sys, time',
+            't = time.perf_counter()',
+            'import desmos2python',
+            'dt = time.perf_counter() - t',
+            "heavy = [m for m in ('sympy', 'selenium', 'pandas', 'jinja2', 'pypandoc') if m in sys.modules]",
+            'print(json.dumps([dt, heavy]))',
+        ])
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+            [str(Path(__file__).parents[1]), os.environ.get('PYTHONPATH', '')]))
+        timings = []
+        for _ in range(3):
+            out = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                                 capture_output=True, text=True).stdout
+            dt, heavy = json.loads(out.splitlines()[-1])
+            self.assertEqual(heavy, [])
+            timings.append(dt)
+        logging.info(f'import desmos2python: {1e3 * min(timings):.1f} ms')
+        self.assertLess(min(timings), TestImportTime.budget)
+        #: ! lazy attributes still resolve
+        import desmos2python
+        from desmos2python.latex import DesmosLatexParser
+        self.assertIn('DesmosLatexParser', dir(desmos2python))
+        self.assertIs(desmos2python.DesmosLatexParser, DesmosLatexParser)
+
+
+class TestSweep(unittest.TestCase):
+    calc_state = {'expressions': {'list': [
+        {'type': 'expression', 'id': '2', 'latex': r'\alpha_{m}=1',
+         'sliderBounds': {'min': '0', 'max': '2', 'step': '0.5'}},
+    ]}}
+
+    def testSliderGrid(self):
+        from desmos2python.sweep import slider_bounds, slider_grid
+        self.assertEqual(slider_bounds(self.calc_state), {'alpha_m': (0.0, 2.0, 0.5)})
+        np.testing.assert_allclose(slider_grid(self.calc_state)['alpha_m'], [0, 0.5, 1, 1.5, 2])
+
+    def testSweep(self):
+        from desmos2python import DesmosLatexParser
+        x = np.linspace(0, 1, num=7)
+        for codegen in ('array', 'vectorize'):
+            dlp = DesmosLatexParser(codegen=codegen)
+            res = dlp.sweep(calc_state=self.calc_state, x=x)
+            self.assertEqual(res.dims, ('output', 'alpha_m', 'x'))
+            self.assertEqual(res.shape, (2, 5, 7))
+            dmn = dlp.exec_pycode()(alpha_m=1.5)
+            np.testing.assert_allclose(res.sel(output='F', alpha_m=1.5), dmn.F(x))
+            res_pool = dlp.sweep(calc_state=self.calc_state, x=x, workers=2)
+            np.testing.assert_allclose(res_pool, res)
+
+
+class TestParserStats(unittest.TestCase):
+    def testStages(self):
+        import tempfile
+        from desmos2python import DesmosLatexParser
+        from desmos2python.stats import ParserStats
+        events = []
+        dlp = DesmosLatexParser(stats_hook=events.append)
+        dlp.exec_pycode()
+        self.assertEqual(dlp.stats.stages['setup'].lines, 3)
+        self.assertIn('compile', dlp.stats.stages)
+        self.assertEqual([event.stage for event in events], list(dlp.stats.stages))
+        dlp.stats.reset()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fpath = Path(tmpdir).joinpath('build.prof')
+            profile = dlp.profile_build(fpath=fpath)
+            self.assertTrue(fpath.exists())
+            self.assertGreater(profile.total_calls, 0)
+        #: ! a cold build goes through every stage
+        for stage in ('plain_lines', 'pycode_lines', 'fixed_lines'):
+            self.assertEqual(dlp.stats.stages[stage].lines, 3)
+        self.assertIn('init_jinja_env', dlp.stats.stages)
+        self.assertIn('render', dlp.stats.stages)
+        self.assertEqual(dlp.stats.stages['fixed_lines'].failures, 0)
+        #: ! errors are recorded, tracebacks formatted on demand
+        stats = ParserStats()
+        with self.assertRaises(ZeroDivisionError):
+            with stats.stage('render'):
+                1 / 0
+        self.assertEqual(stats.stages['render'].failures, 1)
+        self.assertIn('ZeroDivisionError', stats.errors[0].format())
+
+
+class TestTemplateRegistry(unittest.TestCase):
+    def testSharedAndPrecompiled(self):
+        import tempfile
+        from desmos2python import DesmosLatexParser
+        from desmos2python.templates import TemplateRegistry
+        from desmos2python.render import render_jinja_html
+        #: ! parsers share one environment, the model template is compiled once
+        dlp1, dlp2 = DesmosLatexParser(), DesmosLatexParser()
+        self.assertIs(dlp1.env, dlp2.env)
+        self.assertIs(dlp1.template, dlp2.template)
+        html = render_jinja_html(data={'calc_state_json': {'version': 9}})
+        self.assertIn('Calc.setState({"version": 9})', html)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            registry = TemplateRegistry(precompiled=True, cache_dir=tmpdir)
+            template = registry.get_template('desmos_model_ns.jinja2')
+            self.assertEqual(len(list(Path(tmpdir).iterdir())), 1)
+            self.assertEqual(template.render(**dlp1.template_vars), dlp1.pycode_string)
+
+
+class TestSynthetic(unittest.TestCase):
+    def testGenerate(self):
+        from desmos2python import DesmosLatexParser
+        from desmos2python.synthetic import synthetic_latex, synthetic_calc_state
+        from desmos2python.sweep import slider_bounds
+        lines = synthetic_latex(30, depth=3, fan_in=2, n_lists=2, p_greek=0.5, seed=7)
+        self.assertEqual(lines, synthetic_latex(30, depth=3, fan_in=2, n_lists=2, p_greek=0.5, seed=7))
+        self.assertNotEqual(lines, synthetic_latex(30, depth=3, fan_in=2, n_lists=2, p_greek=0.5, seed=8))
+        dmn = DesmosLatexParser(lines=lines).exec_pycode()()
+        self.assertEqual(len(dmn.output_keys), 30 - 10 - 2)
+        self.assertEqual(len(dmn.params), 10 + 2)
+        with np.errstate(over='ignore'):
+            self.assertEqual(dmn.FA(np.linspace(0, 1, num=5)).shape, (5, ))
+        calc_state = synthetic_calc_state(30, n_folders=2, seed=7)
+        items = calc_state['expressions']['list']
+        self.assertEqual([item['latex'] for item in items if 'latex' in item],
+                         synthetic_latex(30, seed=7))
+        self.assertEqual(sum(item['type'] == 'folder' for item in items), 2)
+        self.assertEqual(len(slider_bounds(calc_state)), 10)
+
+
+class TestCalcState(unittest.TestCase):
+    def testRecords(self):
+        from desmos2python.api import make_calc_state_parser
+        from desmos2python.calc_state import read_calc_state_records
+        from desmos2python.synthetic import SyntheticGraph
+        graph = SyntheticGraph(20, n_params=5, n_folders=2, seed=3)
+        calc_state = graph.calc_state()
+        items = calc_state['expressions']['list']
+        items[-1]['hidden'] = True
+        items.append({'type': 'table', 'id': 't1', 'columns': [
+            {'id': 't2', 'latex': 'x_{1}', 'values': ['1', '2', '3']},
+            {'id': 't3', 'latex': 'y_{1}', 'values': ['1', '']}]})
+        state = read_calc_state_records(calc_state)
+        self.assertEqual(len(state.expressions), 20)
+        self.assertEqual(state.latex_list, graph.latex_lines()[:-1])
+        self.assertEqual([s.name for s in state.sliders], [g.split('=')[0] for g in graph.latex_lines()[:5]])
+        self.assertEqual([len(f.members) for f in state.folders], [8, 7])
+        self.assertEqual([c.list_latex for c in state.columns], [r'x_{1}=\left[1,2,3\right]', None])
+        #: ! straight to a model, no browser
+        dlp = make_calc_state_parser(calc_state, tables=True)
+        dmn = dlp.exec_pycode()()
+        self.assertEqual(list(dmn.x1), [1, 2, 3])
+        self.assertFalse(hasattr(dmn, SyntheticGraph.function_name(14)))
+
+    def testVisibility(self):
+        from desmos2python.calc_state import read_calc_state_records
+        state = read_calc_state_records({'expressions': {'list': [
+            {'type': 'expression', 'id': '1', 'latex': 'a=2'},
+            {'type': 'expression', 'id': '2', 'latex': 'b=3', 'lineStyle': 'DASHED'},
+            {'type': 'expression', 'id': '3', 'latex': 'c=4', 'lineStyle': ''},
+            {'type': 'expression', 'id': '4', 'latex': 'd=5', 'hidden': True},
+        ]}})
+        #: ! same filter as `DesmosCalcStrings.visibleFilter` (a missing lineStyle is the default)
+        self.assertEqual(state.latex_list, ['a=2', 'b=3'])
+        with self.assertRaises(ValueError):
+            read_calc_state_records({'expressions': {'list': [
+                {'type': 'expression', 'id': '1', 'latex': 'a=2', 'hidden': True}]}}).latex_parser()
+
+
+class TestCLI(unittest.TestCase):
+    def testCompile(self):
+        import io
+        import json
+        import shutil
+        import tempfile
+        from contextlib import redirect_stdout
+        from desmos2python import load_model
+        from desmos2python.cli import collect_jobs, main
+        from desmos2python.latex import get_filepath
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            tmpdir.joinpath('in').mkdir()
+            shutil.copy(get_filepath(), tmpdir.joinpath('in', 'ex.json'))
+            tmpdir.joinpath('in', 'bad.json').write_text('not json')
+            calc_state = {'expressions': {'list': [
+                {'type': 'expression', 'latex': 'a=2'},
+                {'type': 'expression', 'latex': r'G\left(x\right)=a\cdot x\cdot x'},
+            ]}}
+            tmpdir.joinpath('states.ndjson').write_text(
+                json.dumps(calc_state) + '\n{oops\n')
+            jobs = collect_jobs([tmpdir.joinpath('in'), tmpdir.joinpath('*.ndjson')])
+            self.assertEqual([job.name for job in jobs], ['bad', 'ex', 'states_1', 'states_2'])
+            out = io.StringIO()
+            with redirect_stdout(out):
+                rc = main(['compile', '-j', '2', '--json', '-o', str(tmpdir.joinpath('out')),
+                           str(tmpdir.joinpath('in')), str(tmpdir.joinpath('states.ndjson'))])
+            #: ! failures are reported, the batch isn't aborted
+            self.assertEqual(rc, 1)
+            *results, summary = [json.loads(line) for line in out.getvalue().splitlines()]
+            ok = {r['name']: r['ok'] for r in results}
+            self.assertEqual(ok, {'bad': False, 'ex': True, 'states_1': True, 'states_2': False})
+            self.assertEqual(summary['summary']['n_ok'], 2)
+            dmn = load_model(tmpdir.joinpath('out', 'states_1.d2p.py'))()
+            np.testing.assert_allclose(dmn.G(np.array([1.0, 2.0])), [2.0, 8.0])
+
+    def testCompileEmpty(self):
+        import tempfile
+        from desmos2python.cli import CompileJob, compile_job
+        hidden = {'expressions': {'list': [{'type': 'expression', 'latex': 'a=2', 'hidden': True}]}}
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fpath = Path(tmpdir).joinpath('empty.json')
+            fpath.write_text('[null, ""]')
+            jobs = [CompileJob('hidden', data=hidden), CompileJob('list', data=[]),
+                    CompileJob('nulls', data=[None, '']), CompileJob('empty', path=str(fpath))]
+            for job in jobs:
+                with self.subTest(job=job.name):
+                    #: ! never compiled as the sample graph
+                    result = compile_job(job, output_dir=tmpdir)
+                    self.assertFalse(result['ok'])
+                    self.assertIn('no visible expressions', result['error'])
+
+
+class TestBrowserPool(unittest.TestCase):
+    def testCheckoutRecycle(self):
+        from desmos2python.browser import BrowserPool
+        from desmos2python.api import make_web_session
+        drivers = []
+        def factory():
+            drivers.append(FakeWebDriver())
+            return drivers[-1]
+        with BrowserPool(max_size=1, max_uses=2, factory=factory, timeout=0.1) as pool:
+            with make_web_session('https://example.invalid/a', pool=pool) as dws:
+                self.assertEqual(dws.latex_list, ['a=2'])
+                #: ! bounded: no second browser while the first is checked out
+                with self.assertRaises(TimeoutError):
+                    pool.acquire()
+            with pool.session('https://example.invalid/b') as dws:
+                self.assertIs(dws.browser, drivers[0])
+            #: ! recycled after `max_uses` checkouts
+            self.assertTrue(drivers[0].quit_called)
+            with pool.checkout() as browser:
+                self.assertIs(browser, drivers[1])
+            #: ! unhealthy idle browsers are replaced
+            drivers[1].crashed = True
+            with pool.checkout() as browser:
+                self.assertIs(browser, drivers[2])
+            self.assertTrue(drivers[1].quit_called)
+            self.assertEqual((pool.size, pool.idle), (1, 1))
+        self.assertTrue(drivers[2].quit_called)
+        self.assertEqual(pool.size, 0)
+        with self.assertRaises(RuntimeError):
+            pool.acquire()
+
+    def testExtractAll(self):
+        from desmos2python.browser import DesmosWebSession
+        driver = FakeWebDriver()
+        dws = DesmosWebSession(url='https://example.invalid/a', browser=driver)
+        self.assertEqual(driver.n_get, 1)
+        extract = dws.extract_all()
+        #: ! one readiness probe + one round trip, no reload of the loaded url
+        self.assertEqual((driver.n_get, driver.n_scripts), (1, 2))
+        self.assertEqual(extract.latex_list, ['a=2'])
+        self.assertEqual(extract.calc_state['version'], 9)
+        self.assertEqual(extract.svg, '<svg></svg>')
+        self.assertEqual(dws.latex_list, ['a=2'])
+        dws.getState()
+        dws.extract_all()
+        self.assertEqual(driver.n_get, 1)
+        dws.extract_all(url='https://example.invalid/b')
+        dws.extract_all(force_reload=True)
+        self.assertEqual(driver.n_get, 3)
+        dws.close()
+        self.assertTrue(driver.quit_called)
+
+    def testBulkRender(self):
+        import json
+        import tempfile
+        from desmos2python.browser import BrowserPool
+        from desmos2python.render import BulkStateRenderer, iter_calc_states
+        drivers = []
+        def factory():
+            drivers.append(FakeWebDriver())
+            return drivers[-1]
+        states = [{'version': 9, 'expressions': {'list': [{'latex': f'a={j}', 'lineStyle': 'SOLID'}]}}
+                  for j in range(3)]
+        with tempfile.TemporaryDirectory() as tmpdir, BrowserPool(max_size=1, factory=factory) as pool:
+            tmpdir = Path(tmpdir)
+            for j, state in enumerate(states + [{'version': 9}]):
+                tmpdir.joinpath('in', f'state{j}.json').parent.mkdir(exist_ok=True)
+                tmpdir.joinpath('in', f'state{j}.json').write_text(json.dumps(state))
+            tmpdir.joinpath('in', 'state9.json').write_text('not json')
+            with BulkStateRenderer(pool=pool, output_dir=tmpdir.joinpath('out')) as renderer:
+                results = list(renderer.render_many(iter_calc_states([tmpdir.joinpath('in')])))
+            self.assertEqual([r.ok for r in results], [True, True, True, False, False])
+            self.assertEqual(json.loads(results[2].latex_fpath.read_text()), ['a=2'])
+            self.assertTrue(tmpdir.joinpath('out', 'screenshots', 'state0.svg').exists())
+            #: ! one page load for all states, the browser is recycled after a failure
+            self.assertEqual(drivers[0].n_get, 1)
+            self.assertTrue(drivers[0].quit_called)
+
+    def testBulkRenderPoolTimeout(self):
+        from desmos2python.browser import BrowserPool
+        from desmos2python.render import BulkStateRenderer
+        state = {'version': 9, 'expressions': {'list': [{'latex': 'a=1', 'lineStyle': 'SOLID'}]}}
+        with BrowserPool(max_size=1, factory=FakeWebDriver) as pool:
+            browser = pool.acquire()
+            #: ! the only browser is checked out: a failed state, not an exception
+            result = BulkStateRenderer(pool=pool, write=False, timeout=0.1).render_state('state0', state)
+            self.assertFalse(result.ok)
+            self.assertIn('TimeoutError', result.error)
+            pool.release(browser)
+
+
+class TestExportMany(unittest.TestCase):
+    def testExportMany(self):
+        import json
+        import asyncio
+        import tempfile
+        import threading
+        import time
+        import urllib.request
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from selenium.common import WebDriverException
+        from desmos2python.browser import BrowserPool
+        from desmos2python.export import HostRateLimiter, export_many_sync
+        from desmos2python.utils import load_model
+        requests = []
+
+        class GraphHandler(BaseHTTPRequestHandler):
+            """local stand-in for the graph pages: `/graphs/<id>` serves its expressions"""
+            def do_GET(self):
+                requests.append(self.path)
+                name = self.path.split('/')[-1]
+                if name == 'missing' or (name == 'flaky' and requests.count(self.path) == 1):
+                    self.send_error(503 if name == 'flaky' else 404)
+                    return
+                body = json.dumps([{'latex': 'a=2', 'lineStyle': 'SOLID'},
+                                   {'latex': r'G\left(x\right)=a\cdot x\cdot x', 'lineStyle': 'SOLID'}]
+                                  if name != 'empty' else [])
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        class HTTPFakeWebDriver(FakeWebDriver):
+            def get(self, url):
+                try:
+                    with urllib.request.urlopen(url) as response:
+                        self.expressions = json.loads(response.read())
+                except OSError as e:
+                    raise WebDriverException(str(e))
+                super().get(url)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), GraphHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f'http://127.0.0.1:{server.server_address[1]}/graphs/'
+        progress = []
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir, \
+                 BrowserPool(max_size=2, factory=HTTPFakeWebDriver) as pool:
+                results = export_many_sync(
+                    [base + name for name in ('g1', 'flaky', 'missing', 'g2', 'empty')], concurrency=2,
+                    pool=pool, output_dir=tmpdir, models_dir=Path(tmpdir).joinpath('models'),
+                    min_interval=0.0, retries=1, backoff=0.01,
+                    progress=lambda result, n_done, n_total: progress.append((result.id, n_done, n_total)))
+                self.assertEqual([r.ok for r in results], [True, True, False, True, False])
+                self.assertEqual([r.attempts for r in results], [1, 2, 2, 1, 1])
+                self.assertIn('404', results[2].error)
+                #: ! never compiled as the sample graph
+                self.assertEqual((results[4].error, results[4].model), ('no visible expressions', None))
+                self.assertEqual(json.loads(results[0].latex_fpath.read_text())[0], 'a=2')
+                dmn = load_model(results[1].model)()
+                np.testing.assert_allclose(dmn.G(np.array([1.0, 3.0])), [2.0, 18.0])
+                self.assertEqual(sorted(n_done for _, n_done, _ in progress), [1, 2, 3, 4, 5])
+        finally:
+            server.shutdown()
+        #: ! requests to a host are spaced, other hosts aren't delayed
+        async def _waits():
+            limiter = HostRateLimiter(min_interval=0.05)
+            t = time.monotonic()
+            for url in ('http://a/1', 'http://a/2', 'http://b/1', 'http://a/3'):
+                await limiter.wait(url)
+            return time.monotonic() - t
+        self.assertGreaterEqual(asyncio.run(_waits()), 0.1)
+
 
 if __name__ == '__main__':
     unittest.main()